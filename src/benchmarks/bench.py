@@ -0,0 +1,198 @@
+"""
+Runs the benchmark workloads and writes the results to a JSON file, to be compared across commits and engines.
+The working directory for activating this file should be "otml":
+
+    python -m src.benchmarks.bench -w french_deletion -e python -e numpy -r 3 -o bench_results.json
+
+Every run is a fixed-seed simulated annealing run of a fixed number of steps, in a freshly spawned process - so the
+caches start cold, and the peak memory is the run's own rather than including the memory of this process, as the
+peak memory of a forked process would. Profiling is on in every run, to time the annealing phases.
+
+As a regression gate, store the results of a known good commit as the baselines of the workloads, and compare the
+results of later commits with them (see src/benchmarks/regression.py):
+
+    python -m src.benchmarks.bench -r 5 --save-baselines benchmarks_baselines
+    python -m src.benchmarks.bench -r 5 --check-baselines benchmarks_baselines
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import time
+from io import StringIO
+from statistics import median
+from typing import get_args
+
+import click
+
+from src.benchmarks.regression import save_workloads_baselines, check_workloads_baselines, get_comparisons_report
+from src.benchmarks.workloads import WORKLOADS, PROJECT_FOLDER, load_workload_configuration
+from src.misc.memory_tools import get_peak_memory_usage, get_caches_hit_rates, clear_caches_statistics
+from src.misc.metrics_tools import to_json_number
+from src.misc.parallel_tools import get_worker_pool
+from src.misc.profiling_tools import get_spans_records, clear_profiling
+from src.otml import load_initial_hypothesis
+from src.otml_configuration import OtmlConfiguration
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+
+ENGINES = get_args(OtmlConfiguration.model_fields["transducer_optimization_engine"].annotation)
+RESULTS_VERSION = 1
+
+
+def run_benchmarks(workloads_names, engines, steps=None, seed=1, repeats=1):
+    """
+    runs every workload with every engine `repeats` times.
+    steps - the number of steps of every run, or None for the steps of the workload
+    """
+    runs = []
+    for workload_name in workloads_names:
+        workload = WORKLOADS[workload_name]
+        workload_steps = steps or workload.steps
+        for engine in engines:
+            load_workload_configuration(workload, random_seed=False, seed=seed, steps_limitation=workload_steps,
+                                        debug_logging_interval=workload_steps, checkpoint_interval=0,
+                                        write_metrics=False, profiling=True, transducer_optimization_engine=engine)
+            for repeat in range(repeats):
+                with get_worker_pool(1, start_method="spawn") as pool:
+                    run = pool.apply(_run_workload)
+                runs.append(dict({"workload": workload_name, "engine": engine, "seed": seed, "repeat": repeat},
+                                 **run))
+
+    return dict(get_environment(), runs=runs)
+
+
+def _run_workload():
+    """
+    runs simulated annealing with the published configuration - executed in a worker process
+    """
+    clear_modules_caching()
+    clear_profiling()
+    clear_caches_statistics()
+    simulated_annealing = SimulatedAnnealing(load_initial_hypothesis())
+
+    start_time = time.perf_counter()
+    start_cpu_time = time.process_time()
+    step, hypothesis = simulated_annealing.run()
+    wall_time = time.perf_counter() - start_time
+    cpu_time = time.process_time() - start_cpu_time
+
+    energy_memo = simulated_annealing.energy_memo
+    energy_memo_lookups = energy_memo.hits + energy_memo.misses
+    return {
+        "steps": step,
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        "steps_per_second": step / wall_time,
+        "final_energy": to_json_number(simulated_annealing.current_hypothesis_energy),
+        "evaluations": simulated_annealing.number_of_evaluations,
+        "phases": get_spans_records(),
+        "peak_memory_usage": get_peak_memory_usage(),
+        "caches_hit_rates": dict(get_caches_hit_rates(),
+                                 energy_memo=energy_memo.hits / energy_memo_lookups if energy_memo_lookups else None),
+    }
+
+
+def get_environment():
+    """
+    returns the fields that identify where and when results were measured
+    """
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def get_commit():
+    """
+    returns the git commit of the working tree, or None if it is not a git repository
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=PROJECT_FOLDER,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_results_summary(results):
+    """
+    returns a table of the median steps per second, wall time and peak memory of every workload and engine
+    """
+    runs_by_workload_and_engine = dict()
+    for run in results["runs"]:
+        runs_by_workload_and_engine.setdefault((run["workload"], run["engine"]), []).append(run)
+
+    summary = StringIO()
+    summary.write("{:<34}{:<10}{:>8}{:>14}{:>12}{:>12}".format("workload", "engine", "steps", "steps/sec",
+                                                                "wall time", "peak MB"))
+    for (workload_name, engine), runs in runs_by_workload_and_engine.items():
+        summary.write("\n{:<34}{:<10}{:>8,}{:>14.2f}{:>12.2f}{:>12.0f}".format(
+            workload_name, engine, runs[0]["steps"], median(run["steps_per_second"] for run in runs),
+            median(run["wall_time"] for run in runs), median(run["peak_memory_usage"] or 0 for run in runs)))
+    return summary.getvalue()
+
+
+@click.command()
+@click.option(
+    "-w", "--workload", "workloads_names", type=click.Choice(list(WORKLOADS)), multiple=True,
+    help="Workload to run, may be repeated. Default - all the workloads"
+)
+@click.option(
+    "-e", "--engine", "engines", type=click.Choice(ENGINES), multiple=True, default=["python"], show_default=True,
+    help="Transducer optimization engine, may be repeated to compare engines"
+)
+@click.option(
+    "-s", "--steps", "steps", type=click.IntRange(min=1), default=None,
+    help="Number of steps of every run. Default - the steps of every workload"
+)
+@click.option("--seed", "seed", type=int, default=1, show_default=True, help="Random seed of every run")
+@click.option(
+    "-r", "--repeats", "repeats", type=click.IntRange(min=1), default=1, show_default=True,
+    help="Number of runs of every workload and engine, whose medians are compared"
+)
+@click.option(
+    "-o", "--output", "output_file", type=click.Path(dir_okay=False), default="bench_results.json",
+    show_default=True, help="JSON file to write the results to"
+)
+@click.option(
+    "--save-baselines", "save_baselines_folder", type=click.Path(file_okay=False), default=None,
+    help="Folder to store the results in as the baselines of the workloads"
+)
+@click.option(
+    "--check-baselines", "check_baselines_folder", type=click.Path(file_okay=False), default=None,
+    help="Folder of the stored baselines to compare the results with - fails on a regression"
+)
+@click.option(
+    "--throughput-tolerance", "throughput_tolerance", type=click.FloatRange(min=0), default=0.1, show_default=True,
+    help="Relative drop of the median steps per second that is a regression"
+)
+@click.option(
+    "--memory-tolerance", "memory_tolerance", type=click.FloatRange(min=0), default=0.1, show_default=True,
+    help="Relative rise of the median peak memory that is a regression"
+)
+def main(workloads_names, engines, steps, seed, repeats, output_file, save_baselines_folder, check_baselines_folder,
+         throughput_tolerance, memory_tolerance):
+    results = run_benchmarks(workloads_names or list(WORKLOADS), engines, steps, seed, repeats)
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    print(get_results_summary(results))
+    print("Results written to {}".format(output_file))
+    if save_baselines_folder:
+        save_workloads_baselines(save_baselines_folder, results)
+        print("Baselines saved in {}".format(save_baselines_folder))
+    if check_baselines_folder:
+        comparisons = check_workloads_baselines(check_baselines_folder, results, throughput_tolerance,
+                                                memory_tolerance)
+        if not comparisons:
+            raise click.ClickException("There are no baselines of the runs in {}".format(check_baselines_folder))
+        print(get_comparisons_report(comparisons))
+        if any(comparison.regression for comparison in comparisons):
+            raise click.ClickException("Performance regressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Compares fresh benchmark results with stored baselines.
+A metric regressed when its median changed for the worse by more than the tolerance, and the interquartile ranges
+of the baseline and the fresh results do not overlap - so a change within the noise of the trials is not reported.
+"""
+import json
+import os
+from collections import namedtuple
+from io import StringIO
+from statistics import median, quantiles
+
+TRANSDUCERS_BASELINE = "transducers"
+
+Comparison = namedtuple("Comparison", ["name", "metric", "baseline", "current", "change", "regression"])
+
+
+class Summary(namedtuple("Summary", ["first_quartile", "median", "third_quartile"])):
+    @property
+    def interquartile_range(self):
+        return self.third_quartile - self.first_quartile
+
+
+def get_summary(values):
+    values = list(values)
+    if len(values) < 2:
+        return Summary(values[0], values[0], values[0])
+    first_quartile, _, third_quartile = quantiles(values, n=4, method="inclusive")
+    return Summary(first_quartile, median(values), third_quartile)
+
+
+def compare_summaries(name, metric, baseline, current, tolerance, higher_is_better):
+    change = current.median / baseline.median - 1 if baseline.median else 0
+    if higher_is_better:
+        regression = change < -tolerance and current.third_quartile < baseline.first_quartile
+    else:
+        regression = change > tolerance and current.first_quartile > baseline.third_quartile
+    return Comparison(name, metric, baseline, current, change, regression)
+
+
+def compare_workloads_runs(baseline_runs, runs, throughput_tolerance, memory_tolerance):
+    """
+    compares the steps per second and the peak memory of the runs of every workload and engine with the baseline
+    runs of the same workload, engine and number of steps
+    """
+    comparisons = []
+    runs_by_workload = _group_runs(runs)
+    baseline_runs_by_workload = _group_runs(baseline_runs)
+    for key, workload_runs in runs_by_workload.items():
+        workload_baseline_runs = baseline_runs_by_workload.get(key)
+        if not workload_baseline_runs:
+            continue
+        name = "{} {} {} steps".format(*key)
+        comparisons.append(compare_summaries(
+            name, "steps_per_second", get_summary(run["steps_per_second"] for run in workload_baseline_runs),
+            get_summary(run["steps_per_second"] for run in workload_runs), throughput_tolerance, True))
+        if all(run["peak_memory_usage"] for run in workload_runs + workload_baseline_runs):
+            comparisons.append(compare_summaries(
+                name, "peak_memory_usage", get_summary(run["peak_memory_usage"] for run in workload_baseline_runs),
+                get_summary(run["peak_memory_usage"] for run in workload_runs), memory_tolerance, False))
+    return comparisons
+
+
+def _group_runs(runs):
+    runs_by_workload = dict()
+    for run in runs:
+        runs_by_workload.setdefault((run["workload"], run["engine"], run["steps"]), []).append(run)
+    return runs_by_workload
+
+
+def compare_transducers_points(baseline_points, points, tolerance):
+    """
+    compares the time of every operation on every grammar of every point of the sweeps with the time on the same
+    grammar at the same baseline point. the times of different grammars of a point differ far more than the times
+    of the repeats of a grammar, so a regression would be within the interquartile range of their pooled times
+    """
+    comparisons = []
+    baseline_points_by_key = {_get_point_key(point): point for point in baseline_points}
+    for point in points:
+        baseline_point = baseline_points_by_key.get(_get_point_key(point))
+        if not baseline_point:
+            continue
+        baseline_grammars_times = {grammar["seed"]: grammar["times"] for grammar in baseline_point["grammars"]}
+        for grammar in point["grammars"]:
+            baseline_grammar_times = baseline_grammars_times.get(grammar["seed"])
+            if not baseline_grammar_times:
+                continue
+            name = "{} {} grammar {}".format(point["sweep"], ",".join("{}={}".format(*item)
+                                                                       for item in point["point"].items()),
+                                             grammar["seed"])
+            for operation, times in grammar["times"].items():
+                baseline_times = baseline_grammar_times.get(operation)
+                if baseline_times:
+                    comparisons.append(compare_summaries(name, operation, _get_times_summary(baseline_times),
+                                                         _get_times_summary(times), tolerance, False))
+    return comparisons
+
+
+def _get_point_key(point):
+    return point["sweep"], tuple(sorted(point["point"].items()))
+
+
+def _get_times_summary(times):
+    return Summary(times["first_quartile"], times["median"], times["third_quartile"])
+
+
+def get_comparisons_report(comparisons):
+    report = StringIO()
+    report.write("{:<44}{:<34}{:>22}{:>22}{:>9}".format("benchmark", "metric", "baseline (IQR)", "current (IQR)",
+                                                        "change"))
+    for comparison in comparisons:
+        report.write("\n{:<44}{:<34}{:>22}{:>22}{:>+8.1%}{}".format(
+            comparison.name, comparison.metric, _format_summary(comparison.baseline),
+            _format_summary(comparison.current), comparison.change, "  REGRESSION" if comparison.regression else ""))
+    regressions = [comparison for comparison in comparisons if comparison.regression]
+    report.write("\n{} of {} metrics regressed".format(len(regressions), len(comparisons)))
+    return report.getvalue()
+
+
+def _format_summary(summary):
+    return "{:.4g} ({:.2g})".format(summary.median, summary.interquartile_range)
+
+
+def get_baseline_file(baselines_folder, name):
+    return os.path.join(baselines_folder, "{}.json".format(name))
+
+
+def load_baseline(baselines_folder, name):
+    """
+    returns the stored baseline results of the given name, or None if there are none
+    """
+    baseline_file = get_baseline_file(baselines_folder, name)
+    if not os.path.exists(baseline_file):
+        return None
+    with open(baseline_file) as f:
+        return json.load(f)
+
+
+def save_baseline(baselines_folder, name, results):
+    os.makedirs(baselines_folder, exist_ok=True)
+    with open(get_baseline_file(baselines_folder, name), "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def save_workloads_baselines(baselines_folder, results):
+    """
+    stores the runs of every workload as its baseline, replacing the baseline runs of the same engines
+    """
+    workloads_names = {run["workload"] for run in results["runs"]}
+    for workload_name in workloads_names:
+        runs = [run for run in results["runs"] if run["workload"] == workload_name]
+        engines = {run["engine"] for run in runs}
+        baseline = load_baseline(baselines_folder, workload_name)
+        if baseline:
+            runs = [run for run in baseline["runs"] if run["engine"] not in engines] + runs
+        save_baseline(baselines_folder, workload_name, dict(results, runs=runs))
+
+
+def check_workloads_baselines(baselines_folder, results, throughput_tolerance, memory_tolerance):
+    """
+    returns the comparisons of the runs of every workload that has a baseline
+    """
+    comparisons = []
+    for workload_name in sorted({run["workload"] for run in results["runs"]}):
+        baseline = load_baseline(baselines_folder, workload_name)
+        if baseline:
+            runs = [run for run in results["runs"] if run["workload"] == workload_name]
+            comparisons.extend(compare_workloads_runs(baseline["runs"], runs, throughput_tolerance,
+                                                      memory_tolerance))
+    return comparisons
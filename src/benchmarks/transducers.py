@@ -0,0 +1,290 @@
+"""
+Micro-benchmarks of the transducer operations, on synthetic grammars whose size is swept one dimension at a time
+around a base point. The working directory for activating this file should be "otml":
+
+    python -m src.benchmarks.transducers -d constraints -d word_length -r 5 -o transducers_results.json
+
+With --save-baselines the results are stored as the baseline of the micro-benchmarks, and with --check-baselines the
+median time of every operation on every grammar of every point is compared with its baseline
+(see src/benchmarks/regression.py)
+
+Every point of a sweep is timed on a few random grammars, so that the times follow the size of the grammar rather
+than the constraints that happened to be drawn. Every sweep is printed as a table of the median time of every
+operation at every value of the swept dimension, followed by the exponent of the operation's growth - the slope
+of log(time) over log(value).
+"""
+import json
+import pickle
+import random
+import string
+import time
+from io import StringIO
+from itertools import cycle
+from math import log
+
+import click
+
+from src.benchmarks.bench import get_environment
+from src.benchmarks.regression import get_summary, TRANSDUCERS_BASELINE, save_baseline, load_baseline, \
+    compare_transducers_points, get_comparisons_report
+from src.benchmarks.workloads import load_base_configuration
+from src.grammar.constraint_set import ConstraintSet
+from src.grammar.feature_table import FeatureTable
+from src.grammar.lexicon import Word
+from src.misc import transducers_optimization_tools
+from src.misc.transducers_optimization_tools import make_optimal_paths, optimize_transducer_grammar_for_word, \
+    optimize_transducer_grammar_for_word_vectorized
+from src.models.transducer import Transducer
+from src.simulated_annealing import clear_modules_caching
+
+SEGMENTS_SYMBOLS = string.ascii_lowercase
+
+# the grammar of every sweep is the base point, with the swept dimension replaced by each of its values
+BASE_POINT = {"segments": 8, "features": 4, "constraints": 4, "bundles_depth": 2, "word_length": 4}
+SWEEPS = {
+    "segments": (4, 8, 12, 16),
+    "features": (2, 4, 6, 8),
+    "constraints": (2, 3, 4, 5, 6),
+    "bundles_depth": (1, 2, 3),
+    "word_length": (2, 4, 8, 16),
+}
+
+OPERATIONS = ("intersection", "make_optimal_paths", "word_intersection", "clear_dead_states",
+              "optimize_transducer_grammar_for_word", "optimize_transducer_grammar_for_word_vectorized", "get_range")
+
+
+def make_feature_table(number_of_segments, number_of_features, random_generator):
+    """
+    returns a feature table of binary features, whose segments differ in their feature values where the number
+    of features allows it
+    """
+    number_of_values_combinations = 2 ** number_of_features
+    codes = random_generator.sample(range(number_of_values_combinations),
+                                    min(number_of_segments, number_of_values_combinations))
+    codes = [codes[i % len(codes)] for i in range(number_of_segments)]
+    return FeatureTable({
+        "feature": [{"label": "f{}".format(i), "values": ["-", "+"]} for i in range(number_of_features)],
+        "feature_table": {symbol: ["+" if code >> i & 1 else "-" for i in range(number_of_features)]
+                          for symbol, code in zip(SEGMENTS_SYMBOLS, codes)},
+    })
+
+
+def make_constraint_set(feature_table, number_of_constraints, bundles_depth, random_generator):
+    """
+    returns Faith followed by distinct Phonotactic, Max and Dep constraints, in turn.
+    the phonotactic constraints have `bundles_depth` feature bundles, of a single feature each
+    """
+    labels = [feature.label for feature in feature_table.features_list]
+    constraint_set_list = [{"type": "Faith", "bundles": []}]
+    constraints_types = cycle(["Phonotactic", "Max", "Dep"])
+    for _ in range(1000 * number_of_constraints):
+        if len(constraint_set_list) == number_of_constraints:
+            break
+        constraint_type = next(constraints_types)
+        number_of_bundles = bundles_depth if constraint_type == "Phonotactic" else 1
+        constraint = {"type": constraint_type,
+                      "bundles": [{random_generator.choice(labels): random_generator.choice("-+")}
+                                  for _ in range(number_of_bundles)]}
+        if constraint not in constraint_set_list:
+            constraint_set_list.append(constraint)
+    else:
+        raise ValueError("There are less than {} distinct constraints of the features".format(number_of_constraints))
+    return ConstraintSet(constraint_set_list, feature_table)
+
+
+def make_word(feature_table, word_length, random_generator):
+    symbols = [segment.get_symbol() for segment in feature_table.get_segments()]
+    return Word("".join(random_generator.choice(symbols) for _ in range(word_length)), feature_table)
+
+
+def time_operations(point, repeats, seed=1):
+    """
+    returns the durations of every transducer operation on a random grammar of the given point,
+    and the sizes of the transducers the operations are applied to
+    """
+    random_generator = random.Random(seed)
+    feature_table = make_feature_table(point["segments"], point["features"], random_generator)
+    constraint_set = make_constraint_set(feature_table, point["constraints"], point["bundles_depth"],
+                                         random_generator)
+    word = make_word(feature_table, point["word_length"], random_generator)
+    clear_modules_caching()
+
+    durations = dict()
+    constraints_transducers = [constraint.get_transducer() for constraint in constraint_set.constraints]
+    durations["intersection"] = _time(lambda: Transducer.intersection(*constraints_transducers), repeats)
+    constraint_set_transducer = Transducer.intersection(*constraints_transducers)
+    durations["make_optimal_paths"] = _time(lambda: make_optimal_paths(constraint_set_transducer, feature_table),
+                                        repeats)
+    grammar_transducer = make_optimal_paths(constraint_set_transducer, feature_table)
+    word_transducer = word.get_transducer()
+    durations["word_intersection"] = _time(lambda: Transducer.intersection(word_transducer, grammar_transducer),
+                                       repeats)
+    word_grammar_transducer = Transducer.intersection(word_transducer, grammar_transducer)
+    durations["clear_dead_states"] = _time(lambda transducer: transducer.clear_dead_states(), repeats,
+                                       _copy_transducer(word_grammar_transducer))
+    word_grammar_transducer.clear_dead_states()
+    durations["optimize_transducer_grammar_for_word"] = _time(
+        lambda transducer: optimize_transducer_grammar_for_word(word, transducer), repeats,
+        _copy_transducer(word_grammar_transducer))
+    if transducers_optimization_tools.np is not None:
+        durations["optimize_transducer_grammar_for_word_vectorized"] = _time(
+            lambda transducer: optimize_transducer_grammar_for_word_vectorized(word, transducer), repeats,
+            _copy_transducer(word_grammar_transducer))
+    optimized_transducer = optimize_transducer_grammar_for_word(word, _copy_transducer(word_grammar_transducer)())
+    durations["get_range"] = _time(optimized_transducer.get_range, repeats)
+
+    sizes = {name: {"states": len(transducer.get_states()), "arcs": len(transducer.get_arcs())}
+             for name, transducer in [("constraint_set", constraint_set_transducer), ("grammar", grammar_transducer),
+                                      ("word_grammar", word_grammar_transducer)]}
+    return durations, sizes
+
+
+def _copy_transducer(transducer):
+    """
+    returns a function that returns a copy of the transducer, for operations that change the transducer
+    """
+    transducer_bytes = pickle.dumps(transducer, pickle.HIGHEST_PROTOCOL)
+    return lambda: pickle.loads(transducer_bytes)
+
+
+def _time(operation, repeats, setup=None):
+    """
+    returns the durations of the operation, in seconds.
+    setup - a function whose result is passed to the operation, and which is not timed
+    """
+    durations = []
+    for _ in range(repeats):
+        arguments = (setup(),) if setup else ()
+        start_time = time.perf_counter()
+        operation(*arguments)
+        durations.append(time.perf_counter() - start_time)
+    return durations
+
+
+def run_sweeps(dimensions, repeats, number_of_grammars=3, seed=1):
+    """
+    times the operations at every point of the sweeps of the given dimensions, on `number_of_grammars` grammars.
+    the times of every point are summarized over all its grammars, and over the repeats of every grammar
+    """
+    points = []
+    for dimension in dimensions:
+        for value in SWEEPS[dimension]:
+            point = dict(BASE_POINT, **{dimension: value})
+            durations = dict()
+            grammars = []
+            for grammar_seed in range(seed, seed + number_of_grammars):
+                grammar_durations, sizes = time_operations(point, repeats, grammar_seed)
+                for operation, operation_durations in grammar_durations.items():
+                    durations.setdefault(operation, []).extend(operation_durations)
+                grammars.append({"seed": grammar_seed, "times": _get_times(grammar_durations), "sizes": sizes})
+            points.append({"sweep": dimension, "point": point, "times": _get_times(durations), "grammars": grammars})
+    return dict(get_environment(), seed=seed, repeats=repeats, number_of_grammars=number_of_grammars,
+                base_point=BASE_POINT, points=points)
+
+
+def _get_times(durations):
+    return {operation: dict(get_summary(operation_durations)._asdict(), min=min(operation_durations))
+            for operation, operation_durations in durations.items()}
+
+
+def get_growth_exponent(values, durations):
+    """
+    returns the least squares slope of log(duration) over log(value) - 1 for linear growth, 2 for quadratic etc.
+    """
+    log_values = [log(value) for value in values]
+    log_durations = [log(duration) for duration in durations]
+    mean_log_value = sum(log_values) / len(log_values)
+    mean_log_duration = sum(log_durations) / len(log_durations)
+    covariance = sum((log_value - mean_log_value) * (log_duration - mean_log_duration)
+                     for log_value, log_duration in zip(log_values, log_durations))
+    variance = sum((log_value - mean_log_value) ** 2 for log_value in log_values)
+    return covariance / variance
+
+
+def get_scaling_tables(results):
+    """
+    returns a table of every sweep, of the median milliseconds of the operations at every value of the dimension
+    """
+    tables = StringIO()
+    for dimension in SWEEPS:
+        points = [point for point in results["points"] if point["sweep"] == dimension]
+        if not points:
+            continue
+        operations = [operation for operation in OPERATIONS if operation in points[0]["times"]]
+        base_point = ", ".join("{}={}".format(name, value) for name, value in results["base_point"].items()
+                               if name != dimension)
+        tables.write("Scaling with {} ({}), median milliseconds:\n".format(dimension, base_point))
+        tables.write("{:<16}".format(dimension) + "".join("{:>19}".format(_get_column_name(operation))
+                                                          for operation in operations))
+        for point in points:
+            tables.write("\n{:<16}".format(point["point"][dimension]) +
+                         "".join("{:>19.3f}".format(point["times"][operation]["median"] * 1000)
+                                 for operation in operations))
+        values = [point["point"][dimension] for point in points]
+        tables.write("\n{:<16}".format("exponent") +
+                     "".join("{:>19.2f}".format(get_growth_exponent(
+                         values, [point["times"][operation]["median"] for point in points]))
+                         for operation in operations))
+        tables.write("\n\n")
+    return tables.getvalue()
+
+
+def _get_column_name(operation):
+    return {"optimize_transducer_grammar_for_word": "optimize",
+            "optimize_transducer_grammar_for_word_vectorized": "optimize_numpy",
+            "make_optimal_paths": "optimal_paths"}.get(operation, operation)
+
+
+@click.command()
+@click.option(
+    "-d", "--dimension", "dimensions", type=click.Choice(list(SWEEPS)), multiple=True,
+    help="Dimension to sweep, may be repeated. Default - all the dimensions"
+)
+@click.option(
+    "-r", "--repeats", "repeats", type=click.IntRange(min=1), default=5, show_default=True,
+    help="Number of times every operation is timed"
+)
+@click.option(
+    "-g", "--grammars", "number_of_grammars", type=click.IntRange(min=1), default=3, show_default=True,
+    help="Number of random grammars every point is timed on"
+)
+@click.option("--seed", "seed", type=int, default=1, show_default=True, help="Random seed of the first grammar")
+@click.option(
+    "-o", "--output", "output_file", type=click.Path(dir_okay=False), default="transducers_results.json",
+    show_default=True, help="JSON file to write the results to"
+)
+@click.option(
+    "--save-baselines", "save_baselines_folder", type=click.Path(file_okay=False), default=None,
+    help="Folder to store the results in as the baseline of the micro-benchmarks"
+)
+@click.option(
+    "--check-baselines", "check_baselines_folder", type=click.Path(file_okay=False), default=None,
+    help="Folder of the stored baseline to compare the results with - fails on a regression"
+)
+@click.option(
+    "--time-tolerance", "time_tolerance", type=click.FloatRange(min=0), default=0.25, show_default=True,
+    help="Relative rise of the median time of an operation that is a regression"
+)
+def main(dimensions, repeats, number_of_grammars, seed, output_file, save_baselines_folder, check_baselines_folder,
+         time_tolerance):
+    load_base_configuration(max_feature_bundles_in_phonotactic_constraint=max(SWEEPS["bundles_depth"]))
+    results = run_sweeps(dimensions or list(SWEEPS), repeats, number_of_grammars, seed)
+    with open(output_file, "w") as f:
+        json.dump(results, f, indent=2)
+    print(get_scaling_tables(results))
+    print("Results written to {}".format(output_file))
+    if save_baselines_folder:
+        save_baseline(save_baselines_folder, TRANSDUCERS_BASELINE, results)
+        print("Baseline saved in {}".format(save_baselines_folder))
+    if check_baselines_folder:
+        baseline = load_baseline(check_baselines_folder, TRANSDUCERS_BASELINE)
+        if not baseline:
+            raise click.ClickException("There is no baseline in {}".format(check_baselines_folder))
+        comparisons = compare_transducers_points(baseline["points"], results["points"], time_tolerance)
+        print(get_comparisons_report(comparisons))
+        if any(comparison.regression for comparison in comparisons):
+            raise click.ClickException("Performance regressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Fixed workloads for the benchmarks, built from the test fixtures with the settings of the simulations in
+tests/simulation_tests
+"""
+import json
+import os
+import tempfile
+from collections import namedtuple
+
+from src.otml_configuration import OtmlConfiguration, get_configuration, CONFIG_FILE_NAME
+
+PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+FIXTURES_FOLDER = os.path.join(PROJECT_FOLDER, "tests", "fixtures")
+BASE_CONFIGURATION_FOLDER = os.path.join(PROJECT_FOLDER, "examples", "french_deletion")
+
+# the temporary folders of the loaded configurations, removed when the process exits
+configuration_folders = []
+
+# steps - the number of steps of a run, which keeps every workload at roughly ten seconds
+Workload = namedtuple("Workload", ["name", "features_file", "corpus_file", "constraints_file", "steps", "settings"])
+
+LEXICON_MUTATION_WEIGHTS = {"insert_segment": 1, "delete_segment": 1, "change_segment": 0}
+CONSTRAINT_SET_MUTATION_WEIGHTS = {
+    "insert_constraint": 1,
+    "remove_constraint": 1,
+    "demote_constraint": 1,
+    "insert_feature_bundle_phonotactic_constraint": 1,
+    "remove_feature_bundle_phonotactic_constraint": 1,
+    "augment_feature_bundle": 0,
+}
+DEMOTE_ONLY_CONSTRAINT_SET_MUTATION_WEIGHTS = dict(
+    CONSTRAINT_SET_MUTATION_WEIGHTS, insert_constraint=0, remove_constraint=0,
+    insert_feature_bundle_phonotactic_constraint=0, remove_feature_bundle_phonotactic_constraint=0)
+CONSTRAINT_INSERTION_WEIGHTS = {"dep": 1, "max": 1, "ident": 0, "phonotactic": 1}
+
+ASPIRATION_SETTINGS = {
+    "lexicon_mutation_weights": LEXICON_MUTATION_WEIGHTS,
+    "constraint_set_mutation_weights": CONSTRAINT_SET_MUTATION_WEIGHTS,
+    "constraint_insertion_weights": CONSTRAINT_INSERTION_WEIGHTS,
+    "initial_temp": 100,
+    "cooling_factor": 0.999985,
+    "initial_number_of_bundles_in_phonotactic_constraint": 1,
+    "min_feature_bundles_in_phonotactic_constraint": 1,
+    "data_encoding_length_multiplier": 100,
+    "restriction_on_alphabet": True,
+}
+# the simulations do not bound the feature bundles of the phonotactic constraints, which the configuration requires
+UNBOUNDED_FEATURE_BUNDLES = 10
+
+WORKLOADS = {workload.name: workload for workload in [
+    Workload("french_deletion", "feature_table/french_deletion_feature_table.json",
+             "corpora/french_deletion_corpus.txt", "constraint_sets/french_deletion_constraint_set.json", 500, {
+                 "lexicon_mutation_weights": LEXICON_MUTATION_WEIGHTS,
+                 "constraint_set_mutation_weights": DEMOTE_ONLY_CONSTRAINT_SET_MUTATION_WEIGHTS,
+                 "corpus_duplication_factor": 50,
+                 "data_encoding_length_multiplier": 1,
+                 "initial_temp": 100,
+                 "cooling_factor": 0.9999,
+                 "restriction_on_alphabet": False,
+             }),
+    Workload("t_aspiration", "feature_table/t_aspiration_feature_table.json",
+             "corpora/t_aspiration_for_paper_corpus.txt", "constraint_sets/faith_constraint_set.json", 100,
+             dict(ASPIRATION_SETTINGS, max_feature_bundles_in_phonotactic_constraint=5,
+                  max_constraints_in_constraint_set=8)),
+    Workload("tk_aspiration", "feature_table/tk_aspiration_feature_table.json",
+             "corpora/tk_aspiration_corpus.txt", "constraint_sets/faith_constraint_set.json", 100,
+             dict(ASPIRATION_SETTINGS, max_feature_bundles_in_phonotactic_constraint=UNBOUNDED_FEATURE_BUNDLES,
+                  max_constraints_in_constraint_set="INF")),
+    Workload("tpk_aiu_yimas", "feature_table/yimas_tpk_aiu_feature_table.csv",
+             "corpora/yimas_tpk_aiu_no_cicic_corpus.txt", "constraint_sets/yimas_tpk_aiu_constraint_set.txt", 10,
+             dict(ASPIRATION_SETTINGS, constraint_set_mutation_weights=DEMOTE_ONLY_CONSTRAINT_SET_MUTATION_WEIGHTS,
+                  cooling_factor=0.9997, max_feature_bundles_in_phonotactic_constraint=UNBOUNDED_FEATURE_BUNDLES,
+                  max_constraints_in_constraint_set="INF")),
+    Workload("aspiration_and_lengthening_448", "feature_table/aspiration_and_lengthening_feature_table.json",
+             "corpora/aspiration_and_lengthening_448_corpus.txt", "constraint_sets/faith_constraint_set.json", 40,
+             dict(ASPIRATION_SETTINGS, max_feature_bundles_in_phonotactic_constraint=5,
+                  max_constraints_in_constraint_set=16)),
+]}
+
+
+def load_base_configuration(**updates):
+    """
+    publishes the base configuration with the given updates.
+    the configuration folder is a temporary one, which also holds the outputs of the run, and is removed when the
+    process exits
+    """
+    with open(os.path.join(BASE_CONFIGURATION_FOLDER, CONFIG_FILE_NAME)) as f:
+        config_dict = json.load(f)
+    config_dict.update(updates)
+
+    configuration_folder = tempfile.TemporaryDirectory(prefix="otml_bench_")
+    configuration_folders.append(configuration_folder)
+    with open(os.path.join(configuration_folder.name, CONFIG_FILE_NAME), "w") as f:
+        json.dump(config_dict, f)
+    OtmlConfiguration.load(configuration_folder.name)
+
+
+def load_workload_configuration(workload, **updates):
+    """
+    publishes the base configuration with the settings of the workload and the given updates
+    """
+    load_base_configuration(**dict(workload.settings, simulation_name=workload.name, **updates))
+    get_configuration().update(features_file=os.path.join(FIXTURES_FOLDER, workload.features_file),
+                               corpus_file=os.path.join(FIXTURES_FOLDER, workload.corpus_file),
+                               constraints_file=os.path.join(FIXTURES_FOLDER, workload.constraints_file)).publish()
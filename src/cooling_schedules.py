@@ -0,0 +1,154 @@
+from collections import deque
+from math import ceil, log
+
+from src.misc.unicode_mixin import UnicodeMixin
+from src.otml_configuration import settings
+
+
+class GeometricSchedule(UnicodeMixin, object):
+    """
+    The temperature is multiplied by `cooling_factor` every step: T_k = initial_temp * cooling_factor ** k
+    """
+
+    def __init__(self, initial_temp, threshold, cooling_factor):
+        self.initial_temp = initial_temp
+        self.threshold = threshold
+        self.cooling_factor = cooling_factor
+        self.configured_cooling_factor = cooling_factor
+
+    def get_next_temperature(self, temperature):
+        return temperature * self.cooling_factor
+
+    def record_step(self, accepted):
+        """
+        called after every step, with whether the step moved to a new hypothesis
+        """
+        pass
+
+    def get_number_of_expected_steps(self):
+        return get_number_of_geometric_steps(self.initial_temp, self.threshold, self.cooling_factor)
+
+    def compress(self, temperature, number_of_steps):
+        """
+        cools faster than configured if needed, so that the temperature reaches the threshold
+        within `number_of_steps` steps
+        """
+        if temperature <= self.threshold:
+            return
+        required_cooling_factor = (self.threshold / temperature) ** (1 / max(number_of_steps, 1))
+        self.cooling_factor = min(self.configured_cooling_factor, required_cooling_factor)
+
+    def __unicode__(self):
+        return "Geometric schedule with cooling factor {}".format(self.cooling_factor)
+
+
+class AdaptiveSchedule(GeometricSchedule):
+    """
+    A geometric schedule that cools by `fast_cooling_factor` while the acceptance rate of the last
+    `acceptance_window` steps is outside [min_acceptance_rate, max_acceptance_rate] - at these temperatures
+    the search is either a random walk or frozen, so there is little to gain from spending steps in them.
+
+    It only cools faster than the geometric schedule, so the number of expected steps is an upper bound.
+    """
+
+    def __init__(self, initial_temp, threshold, cooling_factor, acceptance_window, min_acceptance_rate,
+                 max_acceptance_rate, fast_cooling_factor):
+        super(AdaptiveSchedule, self).__init__(initial_temp, threshold, cooling_factor)
+        self.min_acceptance_rate = min_acceptance_rate
+        self.max_acceptance_rate = max_acceptance_rate
+        self.fast_cooling_factor = fast_cooling_factor
+        self.acceptances = deque(maxlen=acceptance_window)
+        self.number_of_acceptances = 0
+
+    def get_next_temperature(self, temperature):
+        acceptance_rate = self.get_acceptance_rate()
+        if acceptance_rate is not None and not \
+                self.min_acceptance_rate <= acceptance_rate <= self.max_acceptance_rate:
+            return temperature * min(self.fast_cooling_factor, self.cooling_factor)
+        return temperature * self.cooling_factor
+
+    def record_step(self, accepted):
+        if len(self.acceptances) == self.acceptances.maxlen:
+            self.number_of_acceptances -= self.acceptances[0]
+        self.acceptances.append(accepted)
+        self.number_of_acceptances += accepted
+
+    def get_acceptance_rate(self):
+        """
+        returns None until the window is full
+        """
+        if len(self.acceptances) < self.acceptances.maxlen:
+            return None
+        return self.number_of_acceptances / len(self.acceptances)
+
+    def __unicode__(self):
+        return "Adaptive schedule, acceptance rate: {}".format(self.get_acceptance_rate())
+
+
+class ReheatingSchedule(GeometricSchedule):
+    """
+    A geometric schedule that multiplies the temperature by `reheat_factor` after `stuck_steps` steps without
+    an accepted move, up to `max_reheats` times.
+
+    Every reheat adds the steps it takes to cool back to the temperature it was made at,
+    so the number of expected steps is the one of the geometric schedule plus that of `max_reheats` reheats.
+    """
+
+    def __init__(self, initial_temp, threshold, cooling_factor, stuck_steps, reheat_factor, max_reheats):
+        super(ReheatingSchedule, self).__init__(initial_temp, threshold, cooling_factor)
+        self.stuck_steps = stuck_steps
+        self.reheat_factor = reheat_factor
+        self.max_reheats = max_reheats
+        self.steps_since_acceptance = 0
+        self.number_of_reheats = 0
+
+    def get_next_temperature(self, temperature):
+        if self.steps_since_acceptance >= self.stuck_steps and self.number_of_reheats < self.max_reheats:
+            self.number_of_reheats += 1
+            self.steps_since_acceptance = 0
+            return temperature * self.reheat_factor
+        return temperature * self.cooling_factor
+
+    def record_step(self, accepted):
+        if accepted:
+            self.steps_since_acceptance = 0
+        else:
+            self.steps_since_acceptance += 1
+
+    def compress(self, temperature, number_of_steps):
+        super(ReheatingSchedule, self).compress(temperature, number_of_steps)
+        self.max_reheats = self.number_of_reheats  # a reheat would take steps there is no time for
+
+    def get_number_of_expected_steps(self):
+        # a reheat replaces a cooling step, so cooling back takes log(reheat_factor) / -log(cooling_factor) + 1 steps
+        steps_per_reheat = ceil(log(self.reheat_factor) / -log(self.cooling_factor)) + 1
+        return super(ReheatingSchedule, self).get_number_of_expected_steps() + self.max_reheats * steps_per_reheat
+
+    def __unicode__(self):
+        return "Reheating schedule, {} reheats, {} steps since the last accepted move".format(
+            self.number_of_reheats, self.steps_since_acceptance)
+
+
+def get_number_of_geometric_steps(initial_temp, threshold, cooling_factor):
+    """
+    the smallest k for which initial_temp * cooling_factor ** k <= threshold
+    """
+    if initial_temp <= threshold:
+        return 0
+    return ceil(log(threshold / initial_temp) / log(cooling_factor))
+
+
+def get_cooling_schedule():
+    """
+    returns the schedule described by the `cooling_schedule` section of the configuration
+    """
+    schedule_settings = settings.cooling_schedule
+    if schedule_settings.type == "adaptive":
+        return AdaptiveSchedule(settings.initial_temp, settings.threshold, settings.cooling_factor,
+                                schedule_settings.acceptance_window, schedule_settings.min_acceptance_rate,
+                                schedule_settings.max_acceptance_rate, schedule_settings.fast_cooling_factor)
+    elif schedule_settings.type == "reheating":
+        return ReheatingSchedule(settings.initial_temp, settings.threshold, settings.cooling_factor,
+                                 schedule_settings.stuck_steps, schedule_settings.reheat_factor,
+                                 schedule_settings.max_reheats)
+    return GeometricSchedule(settings.initial_temp, settings.threshold, settings.cooling_factor)
@@ -13,6 +13,10 @@ class OtmlBaseException(Exception):
         return f"{self.msg}"
 
 
+class CheckpointError(OtmlBaseException):
+    pass
+
+
 class ConfigurationManagerError(OtmlBaseException):
     pass
 
@@ -41,10 +45,18 @@ class OtmlError(OtmlBaseException):
     pass
 
 
+class ResultsError(OtmlBaseException):
+    pass
+
+
 class StochasticTestError(OtmlBaseException):
     pass
 
 
+class TraceError(OtmlBaseException):
+    pass
+
+
 class TransducerError(OtmlBaseException):
     pass
 
@@ -0,0 +1,163 @@
+import logging
+import random
+from statistics import median
+
+from src.misc.parallel_tools import get_number_of_workers, get_worker_pool
+from src.otml_configuration import settings
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching, enforce_memory_limit
+
+logger = logging.getLogger(__name__)
+
+# the number of hypotheses evaluated by this worker process, used to clear its caches periodically
+number_of_worker_evaluations = 0
+
+
+class GeneticSearch(SimulatedAnnealing):
+    """
+    Evolves a population of `population_size` hypotheses, with the energy as the fitness to minimize.
+
+    Every generation, the `elite_size` best hypotheses pass on unchanged, and the rest of the population is
+    replaced by offspring: parents are selected by tournaments of `tournament_size` hypotheses, recombined with
+    probability `crossover_rate` (see `Grammar.make_crossover`) and then mutated by the mutation operators
+    of simulated annealing. The offspring are evaluated concurrently in a process pool.
+
+    A step is the creation of a single offspring, so the steps limitation and the logging intervals count
+    the same amount of work as in simulated annealing. The best hypothesis of the population is reported
+    as the current hypothesis.
+    """
+
+    def __init__(self, traversable_hypothesis, target_lexicon_indicator_function=None, sample_target_lexicon=None,
+                 sample_target_outputs=None, target_energy=None):
+        super(GeneticSearch, self).__init__(traversable_hypothesis, target_lexicon_indicator_function,
+                                            sample_target_lexicon, sample_target_outputs, target_energy)
+        self.generation = 0
+        self.population = None
+        self.population_energies = None
+        self.number_of_crossovers = 0
+
+    def run(self):
+        """
+        staring genetic search
+        """
+        self.before_loop()
+
+        number_of_offspring = settings.genetic_search.population_size - settings.genetic_search.elite_size
+        number_of_workers = get_number_of_workers(settings.genetic_search.number_of_workers, number_of_offspring)
+        logger.info("Evolving a population of {} hypotheses on {} workers".format(
+            settings.genetic_search.population_size, number_of_workers))
+        with get_worker_pool(number_of_workers) as pool:
+            while self.step < self.number_of_expected_steps and not self._should_stop():
+                self.make_generation(pool)
+
+        self.current_hypothesis = self.best_hypothesis
+        self.current_hypothesis_energy = self.best_hypothesis_energy
+        self._after_loop()
+        return self.step, self.best_hypothesis
+
+    def before_loop(self):
+        super(GeneticSearch, self).before_loop()
+        self.population = [self.current_hypothesis] * settings.genetic_search.population_size
+        self.population_energies = [self.current_hypothesis_energy] * settings.genetic_search.population_size
+
+    def _set_number_of_expected_steps(self):
+        self.step_limitation = settings.steps_limitation
+        if self.step_limitation != float("inf"):
+            self.number_of_expected_steps = self.step_limitation
+        else:
+            number_of_offspring = settings.genetic_search.population_size - settings.genetic_search.elite_size
+            self.number_of_expected_steps = settings.genetic_search.number_of_generations * number_of_offspring
+
+        logger.info("Number of expected steps is: {:,}".format(self.number_of_expected_steps))
+
+    def make_generation(self, pool):
+        """
+        replaces the population by its elite and the offspring of its selected hypotheses
+        """
+        self.generation += 1
+        number_of_offspring = min(settings.genetic_search.population_size - settings.genetic_search.elite_size,
+                                  self.number_of_expected_steps - self.step)
+        offspring = [self._make_offspring() for _ in range(number_of_offspring)]
+        offspring_energies = self._evaluate(offspring, pool)
+
+        previous_step = self.step
+        self.step += number_of_offspring
+        elite = sorted(range(len(self.population)), key=lambda i: self.population_energies[i])
+        elite = elite[:settings.genetic_search.population_size - number_of_offspring]
+        population = [(self.population_energies[i], self.population[i]) for i in elite] + \
+            list(zip(offspring_energies, offspring))
+        population.sort(key=lambda energy_and_hypothesis: energy_and_hypothesis[0])
+        self.population_energies = [energy for energy, _ in population]
+        self.population = [hypothesis for _, hypothesis in population]
+
+        self.current_hypothesis = self.population[0]
+        self.current_hypothesis_energy = self.population_energies[0]
+        self._update_best_hypothesis()
+
+        if self.step // settings.clear_modules_caching_interval > \
+                previous_step // settings.clear_modules_caching_interval:
+            self.clear_modules_caching()
+        self._enforce_memory_limit()
+        if self.step // settings.debug_logging_interval > previous_step // settings.debug_logging_interval:
+            self._update_plateau()
+            self._debug_interval()
+
+    def _make_offspring(self):
+        parent = self._select_parent()
+        if random.random() < settings.genetic_search.crossover_rate:
+            crossover_result, parent = parent.get_offspring(self._select_parent())
+            self.number_of_crossovers += crossover_result
+        mutation_result, offspring = parent.get_neighbor()
+        self.mutation_operators_statistics.record(offspring.grammar.mutation_operator, mutation_result)
+        return offspring
+
+    def _select_parent(self):
+        tournament = random.sample(range(len(self.population)), settings.genetic_search.tournament_size)
+        return self.population[min(tournament, key=lambda i: self.population_energies[i])]
+
+    def _evaluate(self, hypotheses, pool):
+        """
+        returns the energies of the hypotheses, evaluating the ones that are not in the energy memo in the pool
+        """
+        fingerprints = [hypothesis.get_fingerprint() for hypothesis in hypotheses]
+        unevaluated = []
+        for hypothesis, fingerprint in zip(hypotheses, fingerprints):
+            evaluation = self.energy_memo.get(fingerprint)
+            if evaluation is None:
+                unevaluated.append((hypothesis, fingerprint))
+            else:
+                hypothesis.set_evaluation(evaluation)
+
+        evaluations = pool.map(_evaluate_hypothesis, [hypothesis for hypothesis, _ in unevaluated])
+        for (hypothesis, fingerprint), evaluation in zip(unevaluated, evaluations):
+            hypothesis.set_evaluation(evaluation)
+            self.energy_memo.put(fingerprint, evaluation)
+        self.number_of_evaluations += len(unevaluated)
+        return [hypothesis.combined_energy for hypothesis in hypotheses]
+
+    def _debug_interval(self):
+        super(GeneticSearch, self)._debug_interval()
+        finite_energies = [energy for energy in self.population_energies if energy != float("inf")]
+        if finite_energies:
+            logger.info("Generation {:,} energies: min {:,}, median {:,}, max {:,} ({} infinite)".format(
+                self.generation, min(finite_energies), median(finite_energies), max(finite_energies),
+                len(self.population_energies) - len(finite_energies)))
+        distinct_hypotheses = {hypothesis.get_fingerprint() for hypothesis in self.population}
+        logger.info("Distinct hypotheses in the population: {} of {}".format(len(distinct_hypotheses),
+                                                                            len(self.population)))
+        logger.info("Successful crossovers: {:,}".format(self.number_of_crossovers))
+        logger.info("Best energy: {:,}".format(self.best_hypothesis_energy))
+
+
+def _evaluate_hypothesis(hypothesis):
+    """
+    computes the energy of a hypothesis - executed in the worker processes.
+    returns the computed fields rather than the hypothesis, which the main process already has
+    """
+    global number_of_worker_evaluations
+    number_of_worker_evaluations += 1
+    if not number_of_worker_evaluations % settings.clear_modules_caching_interval:
+        clear_modules_caching()
+    enforce_memory_limit()
+
+    hypothesis.get_energy()
+    return hypothesis.get_evaluation()
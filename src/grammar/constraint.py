@@ -12,6 +12,7 @@ from src.exceptions import ConstraintError
 from src.exceptions import GrammarParseError
 from src.grammar.feature_bundle import FeatureBundle
 from src.grammar.feature_table import JOKER_SEGMENT, NULL_SEGMENT
+from src.misc.memory_tools import cache_lookup
 from src.misc.unicode_mixin import UnicodeMixin
 from src.models.transducer import CostVector, Arc, State, Transducer
 from src.otml_configuration import settings
@@ -84,12 +85,11 @@ class Constraint(with_metaclass(ConstraintMetaClass, UnicodeMixin)):
 
     def get_transducer(self):
         constraint_key = str(self)
-        if constraint_key in constraint_transducers:
-            return constraint_transducers[constraint_key]
-        else:
+        transducer = cache_lookup(constraint_transducers, constraint_key, "constraint_transducers")
+        if transducer is None:
             transducer = self._make_transducer()
             constraint_transducers[constraint_key] = transducer
-            return transducer
+        return transducer
 
     @staticmethod
     def clear_caching():
@@ -275,8 +275,10 @@ class PhonotacticConstraint(Constraint):
         segments = self.feature_table.get_segments()
         transducer = Transducer(segments, name=str(self))
 
+        natural_classes = [self.feature_table.get_natural_class(feature_bundle.get_feature_dict()) for
+                           feature_bundle in self.feature_bundles]
         symbol_bundle_characteristic_matrix = {
-            segment: [segment.has_feature_bundle(self.feature_bundles[i]) for i in range(n + 1)] for segment in
+            segment: [bool(natural_class >> segment.index & 1) for natural_class in natural_classes] for segment in
             segments}
 
         states = {i: {j: 0 for j in range(i)} for i in range(n + 1)}
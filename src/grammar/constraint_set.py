@@ -6,13 +6,15 @@ import json
 import logging
 import pickle
 from math import ceil, log
-from random import choice, randrange
+from random import choice, randint, randrange
 
 from six import StringIO, PY3
 
 from src.exceptions import GrammarParseError
 from src.grammar.constraint import Constraint, get_number_of_constraints
 from src.grammar.constraint import MaxConstraint, DepConstraint, PhonotacticConstraint, IdentConstraint
+from src.misc.memory_tools import cache_lookup
+from src.misc.profiling_tools import profiled
 from src.misc.randomization_tools import choose_by_weight
 from src.misc.unicode_mixin import UnicodeMixin
 from src.models.transducer import Transducer
@@ -39,6 +41,9 @@ class ConstraintSet(UnicodeMixin, object):
 
             constraint_class = Constraint.get_constraint_class_by_name(constraint_name)
             self.constraints.append(constraint_class(bundles_list, feature_table))
+        self.fingerprint = None
+        self.mutation_operator = None  # the operator of the last mutation
+        self.mutation_target = None  # the (constraint index, None) of the last mutation
 
     def get_encoding_length(self):
         k = ceil(log(get_number_of_constraints() + self.feature_table.get_number_of_features() + 2 + 1, 2))
@@ -46,23 +51,54 @@ class ConstraintSet(UnicodeMixin, object):
 
     def make_mutation(self):
         mutation_weights = [
-            (self._insert_constraint, settings.constraint_set_mutation_weights.insert_constraint),
-            (self._remove_constraint, settings.constraint_set_mutation_weights.remove_constraint),
-            (self._demote_constraint, settings.constraint_set_mutation_weights.demote_constraint),
-            (self._insert_feature_bundle_phonotactic_constraint,
+            ("insert_constraint", settings.constraint_set_mutation_weights.insert_constraint),
+            ("remove_constraint", settings.constraint_set_mutation_weights.remove_constraint),
+            ("demote_constraint", settings.constraint_set_mutation_weights.demote_constraint),
+            ("insert_feature_bundle_phonotactic_constraint",
              settings.constraint_set_mutation_weights.insert_feature_bundle_phonotactic_constraint),
-            (self._remove_feature_bundle_phonotactic_constraint,
+            ("remove_feature_bundle_phonotactic_constraint",
              settings.constraint_set_mutation_weights.remove_feature_bundle_phonotactic_constraint),
-            (self._augment_feature_bundle,
+            ("augment_feature_bundle",
              settings.constraint_set_mutation_weights.augment_feature_bundle)
         ]
-        return choose_by_weight(mutation_weights)()
+        self.fingerprint = None  # recomputed by get_fingerprint after the mutation
+        self.mutation_target = None
+        self.mutation_operator = choose_by_weight(mutation_weights)
+        return getattr(self, "_" + self.mutation_operator)()
+
+    def make_crossover(self, other_constraint_set):
+        """
+        keeps a random prefix of the ranking and ranks the constraints of the other constraint set that are not in it
+        below it, in their order
+        rtype: boolean - whether the ranking changed
+        """
+        logger.debug("make_crossover")
+        prefix = self.constraints[:randint(0, len(self.constraints))]
+        other_constraints = [constraint for constraint in other_constraint_set.constraints if constraint not in prefix]
+        if len(prefix) + len(other_constraints) > settings.max_constraints_in_constraint_set:
+            return False
+        constraints = prefix + pickle.loads(pickle.dumps(other_constraints, -1))  # the other constraints are shared
+        if constraints == self.constraints:
+            return False
+        self.constraints = constraints
+        self.fingerprint = None
+        return True
+
+    def get_fingerprint(self):
+        """
+        the printed constraint set, which identifies the constraint set transducer as well
+        """
+        if self.fingerprint is None:
+            self.fingerprint = str(self)
+        return self.fingerprint
 
     def _remove_constraint(self):
         logger.debug("_remove_constraint")
         if len(self.constraints) > settings.min_constraints_in_constraint_set:
             removable_constraints = list(filter(lambda x: x.get_constraint_name() != "Faith", self.constraints))
-            self.constraints.remove(choice(removable_constraints))
+            constraint = choice(removable_constraints)
+            self.mutation_target = (self.constraints.index(constraint), None)
+            self.constraints.remove(constraint)
             return True
         else:  # can not remove constraint, resulting constraint_set length will br beneath minimum length
             return False
@@ -74,7 +110,9 @@ class ConstraintSet(UnicodeMixin, object):
         logger.debug("_insert_feature_bundle_phonotactic_constraint")
         phonotactic_constraints = list(filter(lambda x: x.get_constraint_name() == "Phonotactic", self.constraints))
         if phonotactic_constraints:
-            if choice(phonotactic_constraints).insert_feature_bundle():
+            constraint = choice(phonotactic_constraints)
+            self.mutation_target = (self.constraints.index(constraint), None)
+            if constraint.insert_feature_bundle():
                 return True
             else:  # augment_constraint did not succeed
                 return False
@@ -88,7 +126,9 @@ class ConstraintSet(UnicodeMixin, object):
         logger.debug("_remove_feature_bundle_phonotactic_constraint")
         phonotactic_constraints = list(filter(lambda x: x.get_constraint_name() == "Phonotactic", self.constraints))
         if phonotactic_constraints:
-            if choice(phonotactic_constraints).remove_feature_bundle():
+            constraint = choice(phonotactic_constraints)
+            self.mutation_target = (self.constraints.index(constraint), None)
+            if constraint.remove_feature_bundle():
                 return True
             else:  # augment_constraint did not succeed
                 return False
@@ -99,7 +139,9 @@ class ConstraintSet(UnicodeMixin, object):
         logger.debug("_augment_feature_bundle")
         augmentable_constraints = list(filter(lambda x: x.get_constraint_name() != "Faith", self.constraints))
         if augmentable_constraints:
-            if choice(augmentable_constraints).augment_feature_bundle():
+            constraint = choice(augmentable_constraints)
+            self.mutation_target = (self.constraints.index(constraint), None)
+            if constraint.augment_feature_bundle():
                 return True
             else:  # augment_feature_bundle did not succeed
                 return False
@@ -117,6 +159,7 @@ class ConstraintSet(UnicodeMixin, object):
             index_of_demotion = randrange(len(self.constraints) - 1)  # index of a random constraint
             i = index_of_demotion  # (which is not the lowest ranked)
             j = index_of_demotion + 1  # index of the constraint lower by 1
+            self.mutation_target = (i, None)
             self.constraints[i], self.constraints[j] = self.constraints[j], self.constraints[i]  # swap places
 
             if demote_caching_flag:
@@ -140,6 +183,7 @@ class ConstraintSet(UnicodeMixin, object):
             new_constraint_class = choose_by_weight(mutation_weights_for_insert)
             new_constraint = new_constraint_class.generate_random(self.feature_table)
             index_of_insertion = randrange(len(self.constraints) + 1)
+            self.mutation_target = (index_of_insertion, None)
             if new_constraint in self.constraints:  # newly generated constraint is already in constraint_set
                 return False
             else:
@@ -150,13 +194,13 @@ class ConstraintSet(UnicodeMixin, object):
 
     def get_transducer(self):
         constraint_set_key = str(self)
-        if constraint_set_key in constraint_set_transducers:
-            return constraint_set_transducers[constraint_set_key]
-        else:
+        transducer = cache_lookup(constraint_set_transducers, constraint_set_key, "constraint_set_transducers")
+        if transducer is None:
             transducer = self._make_transducer()
             constraint_set_transducers[constraint_set_key] = transducer
-            return transducer
+        return transducer
 
+    @profiled("constraint_set_transducer")
     def _make_transducer(self):
         if len(self.constraints) == 1:  # if there is only on constraint in the
             return pickle.loads(
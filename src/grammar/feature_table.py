@@ -5,7 +5,6 @@ import codecs
 import json
 import logging
 import os
-from copy import deepcopy
 from random import choice
 
 from pydantic import BaseModel, model_validator
@@ -65,7 +64,6 @@ class FeatureTable(UnicodeMixin, object):
     def __init__(self, feature_table_dict_from_json):
         self.feature_table_dict = dict()
         self.features_list = FeatureList.model_validate(dict(features=feature_table_dict_from_json["feature"]))
-        self.segments_list = list()
 
         self.feature_order_dict = dict()
         for i, feature in enumerate(self.features_list):
@@ -83,8 +81,36 @@ class FeatureTable(UnicodeMixin, object):
                 symbol_feature_dict[feature.label] = feature_value
             self.feature_table_dict[symbol] = symbol_feature_dict
 
-        for symbol in self.get_alphabet():
-            self.segments_list.append(Segment(symbol, self))
+        # natural classes are represented as bitsets over the segment indices
+        self.segment_index_dict = {symbol: i for i, symbol in enumerate(self.get_alphabet())}
+        self.all_segments_bitset = (1 << len(self.segment_index_dict)) - 1
+        self.feature_value_bitsets = dict()  # (feature label, feature value) -> bitset of the segments that have it
+        for symbol, index in self.segment_index_dict.items():
+            for feature_label, feature_value in self.feature_table_dict[symbol].items():
+                feature_value_key = (feature_label, feature_value)
+                self.feature_value_bitsets[feature_value_key] = self.feature_value_bitsets.get(feature_value_key,
+                                                                                               0) | (1 << index)
+        self.natural_classes = dict()  # frozen feature bundle -> bitset of the segments in its natural class
+
+        self._intern_segments()
+
+    def _intern_segments(self):
+        """
+        creates the single, shared instance of each segment of the feature table
+        """
+        self.segments_list = [Segment(symbol, self) for symbol in self.get_alphabet()]
+        self.segments_by_symbol = {segment.symbol: segment for segment in self.segments_list}
+
+    def __getstate__(self):
+        # segments are interned per feature table - they are recreated rather than copied
+        state = self.__dict__.copy()
+        del state["segments_list"]
+        del state["segments_by_symbol"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._intern_segments()
 
     @classmethod
     def loads(cls, feature_table_str):
@@ -132,7 +158,27 @@ class FeatureTable(UnicodeMixin, object):
         return list(iterkeys(self.feature_table_dict))
 
     def get_segments(self):
-        return deepcopy(self.segments_list)
+        return list(self.segments_list)  # segments are immutable, so only the list itself is copied
+
+    def get_segment(self, symbol):
+        return self.segments_by_symbol[symbol]
+
+    def get_segment_index(self, symbol):
+        return self.segment_index_dict[symbol]
+
+    def get_natural_class(self, feature_dict):
+        """
+        returns a bitset (over segment indices) of the segments that have all the features in feature_dict
+        """
+        frozen_feature_bundle = frozenset(feature_dict.items())
+        if frozen_feature_bundle in self.natural_classes:
+            return self.natural_classes[frozen_feature_bundle]
+
+        natural_class = self.all_segments_bitset
+        for feature_value_key in frozen_feature_bundle:
+            natural_class &= self.feature_value_bitsets.get(feature_value_key, 0)
+        self.natural_classes[frozen_feature_bundle] = natural_class
+        return natural_class
 
     def get_random_segment(self):
         return choice(self.get_alphabet())
@@ -181,19 +227,38 @@ class FeatureTable(UnicodeMixin, object):
 
 
 class Segment(UnicodeMixin, object):
+    """
+    Segments are immutable flyweights - a feature table holds a single instance of each of its segments
+    (see FeatureTable.get_segment), which is shared by words, arcs and transducers.
+    """
+    __slots__ = ["symbol", "feature_table", "feature_dict", "index", "hash"]
+
     def __init__(self, symbol, feature_table=None):
-        self.symbol = symbol  # JOKER and NULL segments need feature_table=None
+        object.__setattr__(self, "symbol", symbol)  # JOKER and NULL segments need feature_table=None
         if feature_table:
-            self.feature_table = feature_table
-            self.feature_dict = feature_table[symbol]
+            object.__setattr__(self, "feature_table", feature_table)
+            object.__setattr__(self, "feature_dict", feature_table[symbol])
+            object.__setattr__(self, "index", feature_table.get_segment_index(symbol))
+
+        object.__setattr__(self, "hash", hash(self.symbol))
 
-        self.hash = hash(self.symbol)
+    def __setattr__(self, key, value):
+        raise AttributeError("Segment is immutable")
+
+    def __delattr__(self, item):
+        raise AttributeError("Segment is immutable")
+
+    def __reduce__(self):
+        if hasattr(self, "feature_table"):
+            return _get_interned_segment, (self.feature_table, self.symbol)
+        return _get_special_segment, (self.symbol,)
 
     def get_encoding_length(self):
         return len(self.feature_dict)
 
     def has_feature_bundle(self, feature_bundle):
-        return all(item in self.feature_dict.items() for item in feature_bundle.get_feature_dict().items())
+        natural_class = self.feature_table.get_natural_class(feature_bundle.get_feature_dict())
+        return bool(natural_class >> self.index & 1)
 
     def get_symbol(self):
         return self.symbol
@@ -255,6 +320,18 @@ class Segment(UnicodeMixin, object):
 NULL_SEGMENT = Segment("-")
 JOKER_SEGMENT = Segment("*")
 
+_special_segments = {NULL_SEGMENT.symbol: NULL_SEGMENT, JOKER_SEGMENT.symbol: JOKER_SEGMENT}
+
+
+def _get_interned_segment(feature_table, symbol):
+    return feature_table.get_segment(symbol)
+
+
+def _get_special_segment(symbol):
+    if symbol in _special_segments:
+        return _special_segments[symbol]
+    return Segment(symbol)
+
 
 # ----------------------
 
@@ -5,8 +5,11 @@ import logging
 
 from src.grammar.lexicon import Word
 from src.misc.debug_tools import write_to_dot
+from src.misc.memory_tools import cache_lookup
+from src.misc.profiling_tools import profiled, span
 from src.misc.randomization_tools import choose_by_weight
-from src.misc.transducers_optimization_tools import optimize_transducer_grammar_for_word, make_optimal_paths
+from src.misc.transducers_optimization_tools import optimize_transducer_grammar_for_word, make_optimal_paths, \
+    optimize_transducer_grammar_for_word_vectorized
 from src.misc.unicode_mixin import UnicodeMixin
 from src.models.transducer import Transducer
 from src.otml_configuration import settings
@@ -25,10 +28,19 @@ class Grammar(UnicodeMixin, object):
         self.feature_table = feature_table
         self.constraint_set = constraint_set
         self.lexicon = lexicon
+        self.mutation_operator = None  # the operator of the last mutation
+        self.mutation_target = None  # the indices of the target of the last mutation, see Lexicon and ConstraintSet
 
     def get_encoding_length(self):
         return self.constraint_set.get_encoding_length() + self.lexicon.get_encoding_length()
 
+    def get_fingerprint(self):
+        """
+        identifies the grammar up to the order of the lexicon words, which does not affect its energy
+        """
+        return self.constraint_set.get_fingerprint(), self.lexicon.fingerprint
+
+    @profiled("mutation")
     def make_mutation(self):
         mutation_weights = [
             (self.lexicon, settings.lexicon_mutation_weights.sum),
@@ -37,21 +49,32 @@ class Grammar(UnicodeMixin, object):
 
         object_to_mutate = choose_by_weight(mutation_weights)
         mutation_result = object_to_mutate.make_mutation()
+        self.mutation_operator = object_to_mutate.mutation_operator
+        self.mutation_target = object_to_mutate.mutation_target
         return mutation_result
 
+    def make_crossover(self, other_grammar):
+        """
+        recombines the constraint ranking and the lexicon with the ones of the other grammar
+        rtype: boolean - whether the grammar changed
+        """
+        constraint_set_result = self.constraint_set.make_crossover(other_grammar.constraint_set)
+        lexicon_result = self.lexicon.make_crossover(other_grammar.lexicon)
+        return constraint_set_result or lexicon_result
+
     def get_transducer(self):
         constraint_set_key = str(self.constraint_set)  # constraint_set is the identifier of the grammar transducer
-        if constraint_set_key in grammar_transducers:
-            return grammar_transducers[constraint_set_key]
-        else:
+        transducer = cache_lookup(grammar_transducers, constraint_set_key, "grammar_transducers")
+        if transducer is None:
             transducer = self._make_transducer()
             grammar_transducers[constraint_set_key] = transducer
-            return transducer
+        return transducer
 
     def _make_transducer(self):
         constraint_set_transducer = self.constraint_set.get_transducer()
         try:
-            make_optimal_paths_result = make_optimal_paths(constraint_set_transducer, self.feature_table)
+            with span("grammar_transducer"):
+                make_optimal_paths_result = make_optimal_paths(constraint_set_transducer, self.feature_table)
         except Exception as ex:
             logger.error("make_optimal_paths failed. transducer dot are being printed")
             # write_to_dot(constraint_set_transducer,"constraint_set_transducer")
@@ -64,25 +87,29 @@ class Grammar(UnicodeMixin, object):
 
     def generate(self, word):
         constraint_set_and_word_key = str(self.constraint_set) + str(word)
-        if constraint_set_and_word_key in outputs_by_constraint_set_and_word:
-            return outputs_by_constraint_set_and_word[constraint_set_and_word_key]
-        else:
+        outputs = cache_lookup(outputs_by_constraint_set_and_word, constraint_set_and_word_key,
+                               "outputs_by_constraint_set_and_word")
+        if outputs is None:
             outputs = self._get_outputs(word)
             outputs_by_constraint_set_and_word[constraint_set_and_word_key] = outputs
-            return outputs
+        return outputs
 
     def _get_outputs(self, word):
-        grammar_transducer = self.get_transducer()
-        word_transducer = word.get_transducer()
-        write_to_dot(grammar_transducer, "grammar_transducer")
-        write_to_dot(word_transducer, "word_transducer")
-        intersected_transducer = Transducer.intersection(word_transducer,
-                                                         # a transducer with NULLs on inputs and JOKERs on outputs
-                                                         grammar_transducer)  # a transducer with segments on inputs and sets on outputs
-
-        intersected_transducer.clear_dead_states()
-        intersected_transducer = optimize_transducer_grammar_for_word(word, intersected_transducer)
-        outputs = intersected_transducer.get_range()
+        grammar_transducer = self.get_transducer()  # recorded in its own spans, so it is left out of "generate"
+        with span("generate"):
+            word_transducer = word.get_transducer()
+            write_to_dot(grammar_transducer, "grammar_transducer")
+            write_to_dot(word_transducer, "word_transducer")
+            intersected_transducer = Transducer.intersection(word_transducer,
+                                                             # a transducer with NULLs on inputs and JOKERs on outputs
+                                                             grammar_transducer)  # a transducer with segments on inputs and sets on outputs
+
+            intersected_transducer.clear_dead_states()
+            if settings.transducer_optimization_engine == "numpy":
+                intersected_transducer = optimize_transducer_grammar_for_word_vectorized(word, intersected_transducer)
+            else:
+                intersected_transducer = optimize_transducer_grammar_for_word(word, intersected_transducer)
+            outputs = intersected_transducer.get_range()
         return outputs
 
     def get_all_outputs_grammar(self, new_string_word_list=[]):
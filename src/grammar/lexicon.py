@@ -2,12 +2,15 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import codecs
+import hashlib
 import logging
+from array import array
 from ast import literal_eval
 from math import log, ceil
-from random import choice, randint
+from random import choice, randint, random
 
-from src.grammar.feature_table import Segment
+from src.exceptions import GrammarParseError
+from src.misc.memory_tools import cache_lookup
 from src.misc.randomization_tools import choose_by_weight
 from src.misc.unicode_mixin import UnicodeMixin
 from src.models.transducer import CostVector, Arc, State, Transducer, NULL_SEGMENT, JOKER_SEGMENT
@@ -17,6 +20,12 @@ logger = logging.getLogger(__name__)
 
 word_transducers = dict()
 
+compact_lexicon_words = dict()
+
+# a lexicon fingerprint is the sum of the fingerprints of its words, so it is independent of the order of the words
+# and a mutation updates it by the fingerprints of the word before and after the mutation
+FINGERPRINT_MODULUS = 2 ** 128
+
 
 class Word(UnicodeMixin, object):
     __slots__ = ["word_string", "feature_table", "segments"]
@@ -28,7 +37,7 @@ class Word(UnicodeMixin, object):
         """
         self.word_string = word_string
         self.feature_table = feature_table
-        self.segments = [Segment(char, self.feature_table) for char in self.word_string]
+        self.segments = [self.feature_table.get_segment(char) for char in self.word_string]
 
     def change_segment(self):
         """changing the word_string and therefore the segments composing it
@@ -87,16 +96,15 @@ class Word(UnicodeMixin, object):
 
     def _set_word_string(self, new_word_string):
         self.word_string = new_word_string
-        self.segments = [Segment(char, self.feature_table) for char in self.word_string]
+        self.segments = [self.feature_table.get_segment(char) for char in self.word_string]
 
     def get_transducer(self):
         word_key = str(self)
-        if word_key in word_transducers:
-            return word_transducers[word_key]
-        else:
+        transducer = cache_lookup(word_transducers, word_key, "word_transducers")
+        if transducer is None:
             transducer = self._make_transducer()
             word_transducers[word_key] = transducer
-            return transducer
+        return transducer
 
     def _make_transducer(self):
         segments = self.feature_table.get_segments()
@@ -151,21 +159,25 @@ class Lexicon(UnicodeMixin, object):
             string_words = get_words_from_file(input_words)
         self.words = [Word(word_string, feature_table) for word_string in string_words]
         self.feature_table = feature_table
+        self.fingerprint = sum(get_word_fingerprint(word.word_string) for word in self.words) % FINGERPRINT_MODULUS
+        self.mutation_operator = None  # the operator of the last mutation
+        self.mutation_target = None  # the (word index, segment position) of the last mutation
 
     def make_mutation(self):
         """
         rtype: boolean - the mutation success
         """
         mutation_weights = [
-            (self._insert_segment, settings.lexicon_mutation_weights.insert_segment),
-            (self._delete_segment, settings.lexicon_mutation_weights.delete_segment),
-            (self._change_segment, settings.lexicon_mutation_weights.change_segment)
+            ("insert_segment", settings.lexicon_mutation_weights.insert_segment),
+            ("delete_segment", settings.lexicon_mutation_weights.delete_segment),
+            ("change_segment", settings.lexicon_mutation_weights.change_segment)
         ]
 
-        return choose_by_weight(mutation_weights)()
+        self.mutation_operator = choose_by_weight(mutation_weights)
+        return getattr(self, "_" + self.mutation_operator)()
 
     def _change_segment(self):
-        return choice(self.words).change_segment()
+        return self._mutate_word(choice(range(len(self.words))), Word.change_segment)  # draws like choice(words)
 
     def _insert_segment(self):
         segment_to_insert = self.feature_table.get_random_segment()
@@ -174,17 +186,55 @@ class Lexicon(UnicodeMixin, object):
         if index_of_word_to_change == n:
             w = Word(segment_to_insert, self.feature_table)  # create a new monosegmental word
             self.words.append(w)
+            self._update_fingerprint(added_word_string=w.word_string)
+            self.mutation_target = (n, 0)
             return True
         else:
-            return self.words[index_of_word_to_change].insert_segment(segment_to_insert)
+            return self._mutate_word(index_of_word_to_change, Word.insert_segment, segment_to_insert)
 
     def _delete_segment(self):
-        selected_word = choice(self.words)
+        word_index = choice(range(len(self.words)))
+        selected_word = self.words[word_index]
         if len(selected_word) == 1:
+            self.mutation_target = (self.words.index(selected_word), 0)  # the word that list.remove removes
             self.words.remove(selected_word)
+            self._update_fingerprint(removed_word_string=selected_word.word_string)
             return True
         else:
-            return selected_word.delete_segment()
+            return self._mutate_word(word_index, Word.delete_segment)
+
+    def make_crossover(self, other_lexicon):
+        """
+        keeps the words before a random cut point and the words of the other lexicon after the same relative point
+        rtype: boolean - whether the lexicon changed
+        """
+        cut_point = random()
+        other_word_strings = [str(word) for word in other_lexicon.get_words()]
+        words = self.words[:round(cut_point * len(self.words))] + \
+            [Word(word_string, self.feature_table)
+             for word_string in other_word_strings[round(cut_point * len(other_word_strings)):]]
+        if not words or words == self.words:
+            return False
+        self.words = words
+        self.fingerprint = sum(get_word_fingerprint(word.word_string) for word in self.words) % FINGERPRINT_MODULUS
+        return True
+
+    def _mutate_word(self, word_index, word_mutation, *args):
+        word = self.words[word_index]
+        old_word_string = word.word_string
+        mutation_result = word_mutation(word, *args)
+        self.mutation_target = (word_index, get_changed_position(old_word_string, word.word_string)
+                                if mutation_result else None)
+        if mutation_result:
+            self._update_fingerprint(removed_word_string=old_word_string, added_word_string=word.word_string)
+        return mutation_result
+
+    def _update_fingerprint(self, removed_word_string=None, added_word_string=None):
+        if removed_word_string is not None:
+            self.fingerprint -= get_word_fingerprint(removed_word_string)
+        if added_word_string is not None:
+            self.fingerprint += get_word_fingerprint(added_word_string)
+        self.fingerprint %= FINGERPRINT_MODULUS
 
     def get_encoding_length(self):
         if settings.restriction_on_alphabet:
@@ -232,6 +282,260 @@ class Lexicon(UnicodeMixin, object):
         return len(self.words)
 
 
+class CompactLexicon(UnicodeMixin, object):
+    """
+    An alternative storage for Lexicon: every word is a run of segment indices (one byte per segment)
+    inside a single contiguous buffer, located by its offset and length.
+
+    Mutating a word writes its new segment indices in place (or at the end of the buffer when it grows),
+    so a mutation only touches the mutated word, and pickling it for a hypothesis copy copies three flat arrays.
+    Word objects are only materialized on demand (e.g. for logging and Grammar.generate) and are shared
+    through a module-level cache - they must not be mutated.
+
+    The mutations draw the same random numbers as the ones of Lexicon, so both storages produce
+    the same simulation for the same seed.
+    """
+
+    def __init__(self, input_words, feature_table):
+        if type(input_words) == list:
+            string_words = input_words
+        else:
+            string_words = get_words_from_file(input_words)
+        self.feature_table = feature_table
+        self.symbols = feature_table.get_alphabet()  # segment index -> symbol
+        if len(self.symbols) > 256:
+            raise GrammarParseError("CompactLexicon supports up to 256 segments",
+                                    {"number_of_segments": len(self.symbols)})
+        self.buffer = bytearray()
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.unused_bytes = 0
+        self.fingerprint = 0
+        self.mutation_operator = None  # the operator of the last mutation
+        self.mutation_target = None  # the (word index, segment position) of the last mutation
+        for word_string in string_words:
+            self._append_word(self._encode(word_string))
+
+    def _encode(self, word_string):
+        return bytes(self.feature_table.get_segment_index(symbol) for symbol in word_string)
+
+    def _decode(self, word_bytes):
+        return "".join([self.symbols[segment_index] for segment_index in word_bytes])
+
+    def _get_word_bytes(self, word_index):
+        offset = self.offsets[word_index]
+        return bytes(self.buffer[offset:offset + self.lengths[word_index]])
+
+    def _append_word(self, word_bytes):
+        self.offsets.append(len(self.buffer))
+        self.lengths.append(len(word_bytes))
+        self.buffer.extend(word_bytes)
+        self.fingerprint = (self.fingerprint + get_word_fingerprint(word_bytes)) % FINGERPRINT_MODULUS
+
+    def _set_word_bytes(self, word_index, word_bytes):
+        self.fingerprint = (self.fingerprint - get_word_fingerprint(self._get_word_bytes(word_index)) +
+                            get_word_fingerprint(word_bytes)) % FINGERPRINT_MODULUS
+        offset = self.offsets[word_index]
+        old_length = self.lengths[word_index]
+        new_length = len(word_bytes)
+        if new_length <= old_length:
+            self.buffer[offset:offset + new_length] = word_bytes
+            self.unused_bytes += old_length - new_length
+        else:  # the word does not fit in its place anymore
+            self.offsets[word_index] = len(self.buffer)
+            self.buffer.extend(word_bytes)
+            self.unused_bytes += old_length
+        self.lengths[word_index] = new_length
+        self._compact_if_needed()
+
+    def _remove_word(self, word_index):
+        self.fingerprint = (self.fingerprint - get_word_fingerprint(self._get_word_bytes(word_index))) % \
+            FINGERPRINT_MODULUS
+        self.unused_bytes += self.lengths[word_index]
+        self.offsets.pop(word_index)
+        self.lengths.pop(word_index)
+        self._compact_if_needed()
+
+    def _compact_if_needed(self):
+        if self.unused_bytes > len(self.buffer) // 2:
+            self._set_words([self._get_word_bytes(word_index) for word_index in range(len(self))])
+
+    def _set_words(self, words_bytes):
+        self.buffer = bytearray()
+        self.offsets = array("I")
+        self.lengths = array("I")
+        self.unused_bytes = 0
+        self.fingerprint = 0
+        for word_bytes in words_bytes:
+            self._append_word(word_bytes)
+
+    def make_crossover(self, other_lexicon):
+        """
+        keeps the words before a random cut point and the words of the other lexicon after the same relative point
+        rtype: boolean - whether the lexicon changed
+        """
+        cut_point = random()
+        words_bytes = [self._get_word_bytes(word_index) for word_index in range(len(self))]
+        other_words_bytes = [self._encode(word_string) for word_string in other_lexicon.get_word_strings()]
+        new_words_bytes = words_bytes[:round(cut_point * len(words_bytes))] + \
+            other_words_bytes[round(cut_point * len(other_words_bytes)):]
+        if not new_words_bytes or new_words_bytes == words_bytes:
+            return False
+        self._set_words(new_words_bytes)
+        return True
+
+    def make_mutation(self):
+        """
+        rtype: boolean - the mutation success
+        """
+        mutation_weights = [
+            ("insert_segment", settings.lexicon_mutation_weights.insert_segment),
+            ("delete_segment", settings.lexicon_mutation_weights.delete_segment),
+            ("change_segment", settings.lexicon_mutation_weights.change_segment)
+        ]
+
+        self.mutation_operator = choose_by_weight(mutation_weights)
+        return getattr(self, "_" + self.mutation_operator)()
+
+    def _change_segment(self):
+        word_index = choice(range(len(self)))
+        word_bytes = self._get_word_bytes(word_index)
+        index_of_change = randint(0, len(word_bytes) - 1)
+        old_segment_index = word_bytes[index_of_change]
+
+        segment_options_list = list(range(len(self.symbols)))
+        segment_options_list.remove(old_segment_index)
+        if not segment_options_list:  # there are no change candidates
+            self.mutation_target = (word_index, None)
+            return False
+
+        new_segment_index = choice(segment_options_list)
+        self._set_word_bytes(word_index, word_bytes[:index_of_change] + bytes([new_segment_index]) +
+                             word_bytes[index_of_change + 1:])
+        self.mutation_target = (word_index, index_of_change)
+        return True
+
+    def _insert_segment(self):
+        segment_to_insert = self._encode(self.feature_table.get_random_segment())
+        n = len(self)
+        index_of_word_to_change = randint(0, n)
+        if index_of_word_to_change == n:
+            self._append_word(segment_to_insert)  # create a new monosegmental word
+            self.mutation_target = (n, 0)
+        else:
+            word_bytes = self._get_word_bytes(index_of_word_to_change)
+            index_of_insertion = randint(0, len(word_bytes))
+            new_word_bytes = word_bytes[:index_of_insertion] + segment_to_insert + word_bytes[index_of_insertion:]
+            self._set_word_bytes(index_of_word_to_change, new_word_bytes)
+            self.mutation_target = (index_of_word_to_change, get_changed_position(word_bytes, new_word_bytes))
+        return True
+
+    def _delete_segment(self):
+        word_index = choice(range(len(self)))
+        word_bytes = self._get_word_bytes(word_index)
+        if len(word_bytes) == 1:
+            # like list.remove in Lexicon - the first word equal to the selected word is removed
+            first_word_index = next(i for i in range(len(self)) if self._get_word_bytes(i) == word_bytes)
+            self._remove_word(first_word_index)
+            self.mutation_target = (first_word_index, 0)
+        else:
+            index_of_deletion = randint(0, len(word_bytes) - 1)
+            new_word_bytes = word_bytes[:index_of_deletion] + word_bytes[index_of_deletion + 1:]
+            self._set_word_bytes(word_index, new_word_bytes)
+            self.mutation_target = (word_index, get_changed_position(word_bytes, new_word_bytes))
+        return True
+
+    def get_encoding_length(self):
+        if settings.restriction_on_alphabet:
+            alphabet_size = len(self.symbols)
+            restricted_alphabet_size = len(self.get_distinct_segments())
+            number_of_bits = ceil(log(alphabet_size + 1, 2))
+            restriction_set_length = number_of_bits * (restricted_alphabet_size + 1)
+            number_of_bits = ceil(log(restricted_alphabet_size + 1, 2))
+            lexicon_length = number_of_bits * (sum((length + 1) for length in self.lengths) + 1)
+            return restriction_set_length + lexicon_length
+        else:
+            number_of_bits = 2
+            segment_encoding_lengths = [segment.get_encoding_length() for segment in self.feature_table.get_segments()]
+            words_encoding_length = sum(sum(segment_encoding_lengths[segment_index]
+                                            for segment_index in self._get_word_bytes(word_index)) + 1
+                                        for word_index in range(len(self)))
+            return number_of_bits * (words_encoding_length + 1)
+
+    def get_distinct_segments(self):
+        distinct_segment_indices = set()
+        for word_index in range(len(self)):
+            distinct_segment_indices.update(self._get_word_bytes(word_index))
+        return {self.feature_table.get_segment(self.symbols[segment_index])
+                for segment_index in distinct_segment_indices}
+
+    def get_word(self, word_index):
+        word_bytes = self._get_word_bytes(word_index)
+        word = cache_lookup(compact_lexicon_words, word_bytes, "compact_lexicon_words")
+        if word is None:
+            word = Word(self._decode(word_bytes), self.feature_table)
+            compact_lexicon_words[word_bytes] = word
+        return word
+
+    def get_words(self):
+        return [self.get_word(word_index) for word_index in range(len(self))]
+
+    def get_word_strings(self):
+        return [self._decode(self._get_word_bytes(word_index)) for word_index in range(len(self))]
+
+    def get_number_of_distinct_words(self):
+        return len({self._get_word_bytes(word_index) for word_index in range(len(self))})
+
+    def _get_number_of_segments(self):
+        return sum(self.lengths)
+
+    @staticmethod
+    def clear_caching():
+        global compact_lexicon_words
+        compact_lexicon_words = dict()
+
+    def __unicode__(self):
+        if settings.log_lexicon_words:
+            return "Lexicon, number of words: {0}, number of segments: {1}, {2}".format(len(self),
+                                                                                        self._get_number_of_segments(),
+                                                                                        self.get_word_strings())
+        else:
+            return "Lexicon, number of words: {0}, number of segments: {1}".format(len(self),
+                                                                                   self._get_number_of_segments())
+
+    def __getitem__(self, item):
+        return self.get_word(item).get_segments()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactLexicon) and self.get_word_strings() == other.get_word_strings()
+
+    def __hash__(self):
+        return hash(tuple(self._get_word_bytes(word_index) for word_index in range(len(self))))
+
+
+def get_word_fingerprint(word):
+    """
+    word - a word string, or the segment indices of a word in CompactLexicon
+    """
+    if isinstance(word, str):
+        word = word.encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(word, digest_size=16).digest(), "big")
+
+
+def get_changed_position(old_word, new_word):
+    """
+    returns the first position at which a mutation changed the word - a word string, or segment indices.
+    an insertion or a deletion in a run of equal segments is at the first position of the run
+    """
+    for position, (old_segment, new_segment) in enumerate(zip(old_word, new_word)):
+        if old_segment != new_segment:
+            return position
+    return min(len(old_word), len(new_word))
+
+
 def get_words_from_file(corpus_file_name):
     with codecs.open(corpus_file_name, "r") as f:
         corpus_string = f.read()
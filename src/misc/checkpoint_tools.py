@@ -0,0 +1,57 @@
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+from src.exceptions import CheckpointError
+
+# raised whenever the keys of the checkpoint change, so an older checkpoint is rejected with a CheckpointError
+CHECKPOINT_VERSION = 5
+
+
+class CheckpointWriter(object):
+    """
+    Writes checkpoints to a file in a background thread.
+    The checkpoint is pickled by the caller, so it is a consistent snapshot of the run, and only the slow part -
+    writing the file and syncing it to disk - happens off the annealing loop.
+    The file is replaced atomically, so a crash during a write leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, checkpoint_file):
+        self.checkpoint_file = checkpoint_file
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending_writes = []
+
+    def write(self, checkpoint):
+        checkpoint_bytes = pickle.dumps(dict(checkpoint, version=CHECKPOINT_VERSION), pickle.HIGHEST_PROTOCOL)
+        self._check_finished_writes()
+        self.pending_writes.append(self.executor.submit(_write_file, self.checkpoint_file, checkpoint_bytes))
+
+    def close(self):
+        """
+        waits for the pending writes, raising the error of a failed write
+        """
+        self.executor.shutdown(wait=True)
+        self._check_finished_writes()
+
+    def _check_finished_writes(self):
+        finished_writes = [write for write in self.pending_writes if write.done()]
+        self.pending_writes = [write for write in self.pending_writes if not write.done()]
+        for write in finished_writes:
+            write.result()
+
+
+def load_checkpoint(checkpoint_file):
+    with open(checkpoint_file, "rb") as f:
+        checkpoint = pickle.load(f)
+    if not isinstance(checkpoint, dict) or checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise CheckpointError("Unsupported checkpoint file", {"checkpoint_file": checkpoint_file})
+    return checkpoint
+
+
+def _write_file(file_path, file_bytes):
+    temporary_file_path = file_path + ".tmp"
+    with open(temporary_file_path, "wb") as f:
+        f.write(file_bytes)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary_file_path, file_path)
@@ -1,31 +1,120 @@
 import atexit
+import copy
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 
 from src.otml_configuration import settings
 
-def setup_logger(verbose, very_verbose):
-    if very_verbose:
-        log_level = logging.DEBUG
-    elif verbose:
-        log_level = logging.INFO
-    else:
-        log_level = logging.WARNING
+LOG_FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# the thread that formats and writes the log records in the asynchronous mode
+logs_listener = None
+
+
+class LazyFormat(object):
+    """
+    A log argument that is formatted as `function(*args)` only when the log record is - on the logging thread in
+    the asynchronous mode, and not at all if the record's level is disabled.
+    The arguments must not change after the record is logged, which is the case for the hypotheses of a search
+    """
+    __slots__ = ["function", "args"]
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return str(self.function(*self.args))
+
+
+# records whose message and arguments are of these types are formatted on the logging thread. other records are
+# formatted when they are logged, since their objects may change before the logging thread gets to them
+DEFERRED_TYPES = (str, int, float, bool, type(None), LazyFormat)
+
+
+class DeferredQueueHandler(QueueHandler):
+    def prepare(self, record):
+        if record.exc_info is None and record.stack_info is None and isinstance(record.msg, DEFERRED_TYPES) and \
+                isinstance(record.args, tuple) and all(isinstance(arg, DEFERRED_TYPES) for arg in record.args):
+            return copy.copy(record)
+        return super(DeferredQueueHandler, self).prepare(record)
+
+
+def setup_logger(verbose, very_verbose, append=False):
+    setup_logs_file(get_log_level(verbose, very_verbose), append)
+    atexit.register(clean_logger)
 
-    if os.path.exists(settings.logs_file):
+
+def setup_logs_file(log_level, append=False):
+    """
+    directs the log records to `settings.logs_file`, which is started afresh unless `append` is set.
+    with `settings.asynchronous_logging` the records are formatted and written by a background thread
+    """
+    global logs_listener
+    stop_logs_thread()
+    if not append and os.path.exists(settings.logs_file):
         os.remove(settings.logs_file)
 
+    if not settings.asynchronous_logging:
+        _set_logs_file_handler(log_level)
+        return
+
+    file_handler = logging.FileHandler(settings.logs_file, mode="a")
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    logs_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(logs_queue)
+    queue_handler.setFormatter(logging.Formatter())  # the message only - the file handler adds the time and level
+    logging.basicConfig(level=log_level, handlers=[queue_handler], force=True)
+    logs_listener = QueueListener(logs_queue, file_handler)
+    logs_listener.start()
+
+
+def _set_logs_file_handler(log_level):
     logging.basicConfig(
         level=log_level,
-        format="%(asctime)s %(levelname)-8s %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+        format=LOG_FORMAT,
+        datefmt=DATE_FORMAT,
         filename=settings.logs_file,
         filemode="a",
+        force=True,  # replace the handlers inherited by worker processes
     )
-    atexit.register(clean_logger)
+
+
+def stop_logs_thread():
+    """
+    writes the records that are still queued, and stops the thread of the asynchronous mode
+    """
+    global logs_listener
+    if logs_listener is not None:
+        logs_listener.stop()
+        for handler in logs_listener.handlers:
+            handler.close()
+        logs_listener = None
+
+
+def setup_worker_logs():
+    """
+    a forked worker process does not have the logging thread, so it writes its records directly to the logs file
+    """
+    global logs_listener
+    if logs_listener is not None:
+        logs_listener = None
+        _set_logs_file_handler(logging.getLogger().level)
+
+
+def get_log_level(verbose, very_verbose):
+    if very_verbose:
+        return logging.DEBUG
+    elif verbose:
+        return logging.INFO
+    else:
+        return logging.WARNING
 
 
 def clean_logger():
+    stop_logs_thread()
     if os.path.getsize(settings.logs_file) == 0:
         os.remove(settings.logs_file)
-
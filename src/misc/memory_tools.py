@@ -0,0 +1,86 @@
+import os
+import sys
+from collections import Counter
+from itertools import islice
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+STATM_FILE = "/proc/self/statm"
+STATUS_FILE = "/proc/self/status"
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# the hits and misses of the caches read through `cache_lookup` in this process, by cache name
+caches_hits = Counter()
+caches_misses = Counter()
+
+
+def get_memory_usage():
+    """
+    returns the resident set size of the process in MB, read from /proc without forking a process.
+    where /proc is missing, returns the peak resident set size, or None if it is not available either
+    """
+    try:
+        with open(STATM_FILE) as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+        return resident_pages * PAGE_SIZE / 2 ** 20
+    except OSError:
+        return get_peak_memory_usage()
+
+
+def get_peak_memory_usage():
+    """
+    returns the peak resident set size of the process in MB, or None if it is not available.
+    it is read from /proc where it exists - the peak that getrusage returns is kept across fork and exec, so in a
+    worker process it is at least the peak of the process that started it
+    """
+    try:
+        with open(STATUS_FILE) as status_file:
+            for line in status_file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2 ** 10  # kilobytes
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":  # bytes on macos, kilobytes elsewhere
+        return max_rss / 2 ** 20
+    return max_rss / 2 ** 10
+
+
+def cache_lookup(cache, key, cache_name):
+    """
+    returns the cached value of the key, or None if it is not cached.
+    the key is moved to the end of the cache, so the cache is ordered from the least to the most recently used
+    """
+    value = cache.pop(key, None)
+    if value is None:
+        caches_misses[cache_name] += 1
+    else:
+        cache[key] = value
+        caches_hits[cache_name] += 1
+    return value
+
+
+def get_caches_hit_rates():
+    """
+    returns the part of the lookups of every cache that were hits
+    """
+    return {cache_name: caches_hits[cache_name] / (caches_hits[cache_name] + caches_misses[cache_name])
+            for cache_name in caches_hits | caches_misses}
+
+
+def clear_caches_statistics():
+    caches_hits.clear()
+    caches_misses.clear()
+
+
+def evict_least_recently_used(cache, fraction):
+    """
+    removes the given fraction of the entries of a cache that is ordered by `cache_lookup`
+    """
+    for key in list(islice(cache, int(len(cache) * fraction))):
+        del cache[key]
@@ -0,0 +1,77 @@
+import json
+import os
+import time
+from math import isfinite
+
+from src.otml_configuration import settings
+
+METRICS_FILE_SUFFIX = ".metrics.jsonl"
+BUFFER_SIZE = 2 ** 16
+# the records are flushed to the file at most this often, in seconds, so a monitor sees them soon after they are
+# written without a disk write per record
+FLUSH_INTERVAL = 5
+
+
+class MetricsWriter(object):
+    """
+    Writes metrics records to a JSON Lines file - one JSON object per line, which is readable with `read_metrics`
+    while the run is still writing it
+    """
+
+    def __init__(self, metrics_file, append=False):
+        self.metrics_file = metrics_file
+        self.file = open(metrics_file, "a" if append else "w", buffering=BUFFER_SIZE)
+        self.last_flush_time = time.time()
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        current_time = time.time()
+        if current_time - self.last_flush_time >= FLUSH_INTERVAL:
+            self.file.flush()
+            self.last_flush_time = current_time
+
+    def close(self):
+        self.file.close()
+
+
+class NullMetricsWriter(object):
+    def write(self, record):
+        pass
+
+    def close(self):
+        pass
+
+
+def get_metrics_file(logs_file=None):
+    """
+    returns the path of the metrics file that accompanies the logs file
+    """
+    return os.path.splitext(logs_file or settings.logs_file)[0] + METRICS_FILE_SUFFIX
+
+
+def get_metrics_writer(append=False):
+    """
+    returns a writer to the metrics file of `settings.logs_file`, or one that does nothing if metrics are off
+    """
+    if settings.write_metrics:
+        return MetricsWriter(get_metrics_file(), append)
+    return NullMetricsWriter()
+
+
+def read_metrics(metrics_file):
+    """
+    yields the records of a metrics file, skipping a last line that is still being written
+    """
+    with open(metrics_file) as f:
+        for line in f:
+            if line.endswith("\n"):
+                yield json.loads(line)
+
+
+def to_json_number(number):
+    """
+    JSON has no infinity, so infinite energies are written as null
+    """
+    if number is None or not isfinite(number):
+        return None
+    return number
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+from src.misc.logger import setup_worker_logs
+from src.otml_configuration import get_configuration
+
+
+def get_number_of_workers(number_of_workers, number_of_tasks=None):
+    """
+    0 workers means one worker per cpu, and there is no need for more workers than tasks
+    """
+    if not number_of_workers:
+        number_of_workers = os.cpu_count() or 1
+    if number_of_tasks:
+        number_of_workers = min(number_of_workers, number_of_tasks)
+    return number_of_workers
+
+
+def get_worker_pool(number_of_workers, initializer=None, initargs=(), start_method=None):
+    """
+    returns a process pool whose workers use the currently published configuration.
+    `initializer(*initargs)` is then called in every worker, if given.
+    start_method - the multiprocessing start method of the workers, or None for the default of the platform
+    """
+    return multiprocessing.get_context(start_method).Pool(number_of_workers, initializer=_initialize_worker,
+                                                          initargs=(get_configuration(), initializer, initargs))
+
+
+def _initialize_worker(configuration, initializer, initargs):
+    configuration.publish()
+    setup_worker_logs()
+    if initializer:
+        initializer(*initargs)
@@ -0,0 +1,146 @@
+from bisect import bisect_right
+from functools import wraps
+from io import StringIO
+from time import perf_counter_ns
+
+from src.misc.debug_tools import get_time_string
+from src.otml_configuration import settings
+
+# the upper bounds of the latency histogram buckets, in nanoseconds: 4 buckets per doubling, from 100 nanoseconds
+# to about 30 hours, so a percentile read from the histogram is within 19% of the true one
+HISTOGRAM_BUCKETS_BOUNDS = [int(100 * 2 ** (i / 4)) for i in range(4 * 40)]
+
+PERCENTILES = (50, 90, 99)
+
+spans_statistics = dict()
+
+
+class SpanStatistics(object):
+    """
+    The number of times a span was entered and a histogram of its latencies
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0
+        self.max_time = 0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_BOUNDS) + 1)
+
+    def record(self, duration):
+        self.count += 1
+        self.total_time += duration
+        if duration > self.max_time:
+            self.max_time = duration
+        self.histogram[bisect_right(HISTOGRAM_BUCKETS_BOUNDS, duration)] += 1
+
+    def get_percentile(self, percentile):
+        """
+        returns the upper bound of the histogram bucket of the percentile, in nanoseconds
+        """
+        rank = self.count * percentile / 100
+        cumulative_count = 0
+        for bucket, bucket_count in enumerate(self.histogram):
+            cumulative_count += bucket_count
+            if cumulative_count >= rank and bucket_count:
+                if bucket == len(HISTOGRAM_BUCKETS_BOUNDS):
+                    return self.max_time
+                return min(HISTOGRAM_BUCKETS_BOUNDS[bucket], self.max_time)
+        return self.max_time
+
+
+class Span(object):
+    __slots__ = ["name", "start_time"]
+
+    def __init__(self, name):
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record_span(self.name, perf_counter_ns() - self.start_time)
+
+
+class NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+null_span = NullSpan()
+
+
+def span(name):
+    """
+    returns a context manager that records the latency of its block under the given name,
+    or one that does nothing if profiling is off
+    """
+    if settings.profiling:
+        return Span(name)
+    return null_span
+
+
+def profiled(span_name):
+    """
+    a decorator that records the latency of every call to the function under the given span name
+    """
+    def decorator(function):
+        @wraps(function)
+        def profiled_function(*args, **kwargs):
+            if not settings.profiling:
+                return function(*args, **kwargs)
+            start_time = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record_span(span_name, perf_counter_ns() - start_time)
+
+        return profiled_function
+
+    return decorator
+
+
+def record_span(name, duration):
+    span_statistics = spans_statistics.get(name)
+    if span_statistics is None:
+        span_statistics = spans_statistics[name] = SpanStatistics()
+    span_statistics.record(duration)
+
+
+def get_profiling_summary():
+    """
+    returns a table of the recorded spans, sorted by their total time
+    """
+    summary = StringIO()
+    header = ["span", "count", "total", "mean"] + ["p{}".format(percentile) for percentile in PERCENTILES] + ["max"]
+    summary.write("Profiling spans:\n")
+    summary.write("{:<28}{:>10}".format(*header[:2]) + "".join("{:>20}".format(column) for column in header[2:]))
+    for name, span_statistics in sorted(spans_statistics.items(), key=lambda item: -item[1].total_time):
+        times = [span_statistics.total_time, span_statistics.total_time / span_statistics.count] + \
+            [span_statistics.get_percentile(percentile) for percentile in PERCENTILES] + [span_statistics.max_time]
+        summary.write("\n{:<28}{:>10,}".format(name, span_statistics.count) +
+                      "".join("{:>20}".format(get_time_string(time / 1e9)) for time in times))
+    return summary.getvalue()
+
+
+def get_spans_records():
+    """
+    returns the statistics of the recorded spans, in seconds, by span name
+    """
+    spans_records = dict()
+    for name, span_statistics in spans_statistics.items():
+        span_record = {"count": span_statistics.count, "total": span_statistics.total_time / 1e9,
+                       "mean": span_statistics.total_time / span_statistics.count / 1e9}
+        for percentile in PERCENTILES:
+            span_record["p{}".format(percentile)] = span_statistics.get_percentile(percentile) / 1e9
+        span_record["max"] = span_statistics.max_time / 1e9
+        spans_records[name] = span_record
+    return spans_records
+
+
+def clear_profiling():
+    spans_statistics.clear()
@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import sqlite3
+from math import isinf
+
+from src.exceptions import ResultsError
+from src.otml_configuration import settings, get_configuration
+
+# seconds to wait for the restarts that write their results at the same time
+LOCK_TIMEOUT = 60
+
+RESULTS_COLUMNS = (
+    "simulation_name", "search", "started_at", "logs_file", "configuration", "seed", "outcome", "steps",
+    "evaluations", "runtime", "steps_per_second", "final_energy", "best_energy", "target_energy",
+    "target_reached_step", "constraint_set", "lexicon",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    simulation_name TEXT NOT NULL,
+    search TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    logs_file TEXT,
+    configuration TEXT NOT NULL,
+    seed INTEGER,
+    outcome TEXT NOT NULL,
+    steps INTEGER NOT NULL,
+    evaluations INTEGER NOT NULL,
+    runtime REAL NOT NULL,
+    steps_per_second REAL,
+    final_energy REAL,
+    best_energy REAL,
+    target_energy REAL,
+    target_reached_step INTEGER,
+    constraint_set TEXT NOT NULL,
+    lexicon TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_simulation_name ON runs (simulation_name, best_energy);
+CREATE INDEX IF NOT EXISTS runs_outcome ON runs (outcome, target_reached_step);
+"""
+
+# a configuration field, possibly nested, e.g. "cooling_schedule.type"
+CONFIGURATION_FIELD_PATTERN = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$")
+
+
+class ResultsStore(object):
+    """
+    A SQLite database of run summaries - one row in the `runs` table for every finished run.
+    The configuration of a run is stored as JSON, so a sweep can be queried by any of its fields
+    """
+
+    def __init__(self, database_file):
+        self.database_file = database_file
+        self.connection = sqlite3.connect(database_file, timeout=LOCK_TIMEOUT)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+
+    def add_run(self, results):
+        """
+        returns the id of the row of the results, a dict of `RESULTS_COLUMNS`
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs ({}) VALUES ({})".format(", ".join(RESULTS_COLUMNS),
+                                                           ", ".join("?" * len(RESULTS_COLUMNS))),
+                [results[column] for column in RESULTS_COLUMNS])
+        return cursor.lastrowid
+
+    def get_runs(self, filters=None, limit=None):
+        """
+        returns the rows of the runs that match the filters, best energy first
+        """
+        where_clause, parameters = _get_where_clause(filters or {})
+        query = "SELECT * FROM runs {} ORDER BY best_energy IS NULL, best_energy, id".format(where_clause)
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        return self.connection.execute(query, parameters).fetchall()
+
+    def get_summary(self, group_by, filters=None):
+        """
+        returns a row for every group of the runs that match the filters, with the number of runs and of target hits,
+        and the energies and speed of the group.
+        group_by - columns of `RESULTS_COLUMNS` and configuration fields
+        """
+        group_expressions = []
+        group_parameters = []
+        for key in group_by:
+            expression, key_parameters = _get_expression(key)
+            group_expressions.append(expression)
+            group_parameters.extend(key_parameters)
+        where_clause, parameters = _get_where_clause(filters or {})
+        query = """
+            SELECT {groups},
+                COUNT(*) AS runs,
+                COUNT(target_reached_step) AS target_hits,
+                MIN(best_energy) AS min_best_energy,
+                AVG(best_energy) AS mean_best_energy,
+                AVG(steps_per_second) AS mean_steps_per_second,
+                AVG(runtime) AS mean_runtime
+            FROM runs {where_clause}
+            GROUP BY {group_numbers}
+            ORDER BY min_best_energy IS NULL, min_best_energy
+        """.format(groups=", ".join("{} AS group_{}".format(expression, i)
+                                    for i, expression in enumerate(group_expressions)),
+                   where_clause=where_clause,
+                   group_numbers=", ".join(str(i) for i in range(1, len(group_expressions) + 1)))
+        return self.connection.execute(query, group_parameters + parameters).fetchall()
+
+    def close(self):
+        self.connection.close()
+
+
+def _get_expression(key):
+    """
+    returns the SQL expression of a column, or of a configuration field, and its parameters
+    """
+    if key in RESULTS_COLUMNS:
+        return key, []
+    if not CONFIGURATION_FIELD_PATTERN.match(key):
+        raise ResultsError("Unknown results column or configuration field", {"key": key})
+    return "json_extract(configuration, ?)", ["$." + key]
+
+
+def _get_where_clause(filters):
+    conditions = []
+    parameters = []
+    for key, value in filters.items():
+        expression, key_parameters = _get_expression(key)
+        if value is None:
+            conditions.append("{} IS NULL".format(expression))
+        else:
+            conditions.append("{} = ?".format(expression))
+            key_parameters = key_parameters + [value]
+        parameters.extend(key_parameters)
+    if not conditions:
+        return "", parameters
+    return "WHERE " + " AND ".join(conditions), parameters
+
+
+def get_results_database(results_database=None):
+    """
+    returns the path of the results database - `settings.results_database` is relative to the output folder
+    """
+    return os.path.join(settings.output_folder, results_database or settings.results_database)
+
+
+def write_run_results(results):
+    """
+    adds the results of a finished run to the results database, and returns their row id
+    """
+    results_store = ResultsStore(get_results_database())
+    try:
+        return results_store.add_run(results)
+    finally:
+        results_store.close()
+
+
+def get_configuration_record():
+    """
+    returns the published configuration as JSON, with infinities written "INF" as in config.json
+    """
+    return json.dumps(_replace_infinities(get_configuration().model_dump()), sort_keys=True)
+
+
+def _replace_infinities(value):
+    if isinstance(value, dict):
+        return {key: _replace_infinities(item) for key, item in value.items()}
+    if isinstance(value, float) and isinf(value):
+        return "INF" if value > 0 else "-INF"
+    return value
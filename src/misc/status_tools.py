@@ -0,0 +1,88 @@
+import json
+import threading
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+LOCAL_HOST = "127.0.0.1"
+STATUS_PATHS = ("/", "/status")
+
+# the server of `start_status_server`, which the search publishes its status to
+status_server = None
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] in STATUS_PATHS:
+            self._send_json(HTTPStatus.OK, self.server.status)
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "unknown path {}".format(self.path)})
+
+    def _send_json(self, status_code, content):
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # the requests of a monitor are not part of the run logs
+
+
+class StatusServer(ThreadingHTTPServer):
+    """
+    Serves the latest published status of a run as JSON over HTTP, from a background thread.
+    The search thread only replaces the reference to the status - the requests are answered on the server threads,
+    so a monitor never blocks the search
+    """
+    daemon_threads = True
+
+    def __init__(self, port, host=LOCAL_HOST):
+        super(StatusServer, self).__init__((host, port), StatusRequestHandler)
+        self.status = {"state": "starting"}
+        self.thread = threading.Thread(target=self.serve_forever, name="status server", daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return "http://{}:{}/status".format(host, port)
+
+    def start(self):
+        self.thread.start()
+
+    def publish(self, status):
+        """
+        the status is served as is, so it must not change after it is published
+        """
+        self.status = status
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        self.thread.join()
+
+
+def start_status_server(port, host=LOCAL_HOST):
+    """
+    returns a started server of the run status on the port, 0 for any free one
+    """
+    global status_server
+    stop_status_server()
+    status_server = StatusServer(port, host)
+    status_server.start()
+    return status_server
+
+
+def get_status_server():
+    """
+    returns the server started by `start_status_server`, or None if the status is not served
+    """
+    return status_server
+
+
+def stop_status_server():
+    global status_server
+    if status_server is not None:
+        status_server.close()
+        status_server = None
@@ -0,0 +1,176 @@
+"""
+A compact binary trace of the steps of simulated annealing, written next to the logs file.
+
+The trace starts with a header of the random seed of the run, followed by a record of every step: the mutation
+operator, the indices of the mutation target, whether the mutation succeeded and the neighbor was accepted, the
+energy delta of the neighbor and the time of its evaluation - 12 bytes a step. Adaptive mutation weights depend on
+cpu times, so every re-weighting is traced as well, as a record of the published weights.
+"""
+import os
+import struct
+from collections import namedtuple
+
+from src.exceptions import TraceError
+from src.mutation_operators_statistics import MUTATION_OPERATORS
+from src.otml_configuration import settings
+
+TRACE_FILE_SUFFIX = ".trace"
+TRACE_MAGIC = b"OTMLTRACE"
+TRACE_VERSION = 1
+BUFFER_SIZE = 2 ** 16
+
+# magic, version, seed, hash seed - the string hashes order the sets some mutations choose from
+HEADER = struct.Struct("<9sBqI")
+RANDOM_HASH_SEED = 2 ** 32 - 1
+# operator, target indices, flags, energy delta, evaluation time as a half precision float of seconds
+STEP_RECORD = struct.Struct("<BHHBfe")
+WEIGHTS_RECORD = struct.Struct("<B{}I".format(len(MUTATION_OPERATORS)))
+WEIGHTS_RECORD_MARKER = 255
+NO_TARGET = 2 ** 16 - 1
+MUTATION_SUCCEEDED = 1
+ACCEPTED = 2
+
+TraceHeader = namedtuple("TraceHeader", ["version", "seed", "hash_seed"])
+TraceStep = namedtuple("TraceStep", ["step", "operator", "target", "mutation_result", "accepted", "delta",
+                                     "evaluation_time"])
+TraceWeights = namedtuple("TraceWeights", ["step", "weights"])  # published before the mutation of `step`
+
+OPERATORS_CODES = {operator: code for code, operator in enumerate(MUTATION_OPERATORS)}
+
+
+class TraceWriter(object):
+    """
+    Writes the trace of a run.
+    offset - the size of the trace at a checkpoint, to continue the trace of the resumed run from. the steps traced
+    after the checkpoint are truncated, since the resumed run makes them again
+    """
+
+    def __init__(self, trace_file, seed=None, offset=None):
+        self.trace_file = trace_file
+        if offset is None:
+            self.file = open(trace_file, "wb", buffering=BUFFER_SIZE)
+            self.file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, seed, get_hash_seed()))
+        else:
+            self.file = open(trace_file, "r+b", buffering=BUFFER_SIZE)
+            if os.fstat(self.file.fileno()).st_size < offset:
+                self.file.close()
+                raise TraceError("The trace is shorter than the checkpoint", {"trace_file": trace_file})
+            self.file.truncate(offset)
+            self.file.seek(offset)
+
+    def write_step(self, operator, target, mutation_result, accepted=False, delta=float("nan"), evaluation_time=0.0):
+        first_index, second_index = _encode_target(target)
+        flags = (MUTATION_SUCCEEDED if mutation_result else 0) | (ACCEPTED if accepted else 0)
+        self.file.write(STEP_RECORD.pack(OPERATORS_CODES[operator], first_index, second_index, flags, delta,
+                                         evaluation_time))
+
+    def write_weights(self, weights):
+        self.file.write(WEIGHTS_RECORD.pack(WEIGHTS_RECORD_MARKER,
+                                            *[weights[operator] for operator in MUTATION_OPERATORS]))
+
+    def tell(self):
+        """
+        returns the size of the trace, writing the buffered records so that it is the size of the file
+        """
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class NullTraceWriter(object):
+    def write_step(self, operator, target, mutation_result, accepted=False, delta=float("nan"), evaluation_time=0.0):
+        pass
+
+    def write_weights(self, weights):
+        pass
+
+    def tell(self):
+        return None
+
+    def close(self):
+        pass
+
+
+def get_trace_file(logs_file=None):
+    """
+    returns the path of the trace file that accompanies the logs file
+    """
+    return os.path.splitext(logs_file or settings.logs_file)[0] + TRACE_FILE_SUFFIX
+
+
+def get_trace_writer(seed=None, offset=None):
+    """
+    returns a writer to the trace file of `settings.logs_file`, or one that does nothing if tracing is off
+    """
+    if settings.write_trace:
+        return TraceWriter(get_trace_file(), seed, offset)
+    return NullTraceWriter()
+
+
+def get_hash_seed():
+    hash_seed = os.environ.get("PYTHONHASHSEED", "random")
+    return RANDOM_HASH_SEED if hash_seed == "random" else int(hash_seed)
+
+
+def read_trace(trace_file):
+    """
+    returns the header of the trace and a generator of its records, skipping a last record that is still being
+    written
+    """
+    f = open(trace_file, "rb")
+    header_bytes = f.read(HEADER.size)
+    if len(header_bytes) < HEADER.size:
+        f.close()
+        raise TraceError("Not a trace file", {"trace_file": trace_file})
+    magic, version, seed, hash_seed = HEADER.unpack(header_bytes)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        f.close()
+        raise TraceError("Unsupported trace file", {"trace_file": trace_file})
+    return TraceHeader(version, seed, None if hash_seed == RANDOM_HASH_SEED else hash_seed), _read_records(f)
+
+
+def _read_records(f):
+    with f:
+        step = 0
+        while True:
+            marker = f.read(1)
+            if not marker:
+                return
+            if marker[0] == WEIGHTS_RECORD_MARKER:
+                record_bytes = marker + f.read(WEIGHTS_RECORD.size - 1)
+                if len(record_bytes) < WEIGHTS_RECORD.size:
+                    return
+                weights = WEIGHTS_RECORD.unpack(record_bytes)[1:]
+                yield TraceWeights(step + 1, dict(zip(MUTATION_OPERATORS, weights)))
+            else:
+                record_bytes = marker + f.read(STEP_RECORD.size - 1)
+                if len(record_bytes) < STEP_RECORD.size:
+                    return
+                code, first_index, second_index, flags, delta, evaluation_time = STEP_RECORD.unpack(record_bytes)
+                step += 1
+                yield TraceStep(step, MUTATION_OPERATORS[code], _decode_target(first_index, second_index),
+                                bool(flags & MUTATION_SUCCEEDED), bool(flags & ACCEPTED), delta, evaluation_time)
+
+
+def _encode_target(target):
+    """
+    an index that does not fit the record is traced as no index
+    """
+    if target is None:
+        return NO_TARGET, NO_TARGET
+    return tuple(NO_TARGET if index is None or index >= NO_TARGET else index for index in target)
+
+
+def _decode_target(first_index, second_index):
+    if first_index == NO_TARGET:
+        return None
+    return first_index, None if second_index == NO_TARGET else second_index
+
+
+def get_traced_target(target):
+    """
+    returns the target as it is read from a trace
+    """
+    return _decode_target(*_encode_target(target))
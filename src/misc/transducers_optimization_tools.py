@@ -4,8 +4,11 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import itertools
 import logging
 import pickle
-import random
-from functools import reduce
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional - only required by the "numpy" transducer optimization engine
+    np = None
 
 from src.exceptions import TransducerOptimizationError
 from src.grammar.lexicon import Word
@@ -15,7 +18,11 @@ logger = logging.getLogger(__name__)
 
 
 def get_cheapest_state(list_of_states, cost_by_state_dict):
-    most_harmonic_state = random.choice(list_of_states)
+    """
+    ties are broken by the order of `list_of_states`, so that compiling a transducer does not draw from the random
+    number generator of the search - the search is then independent of which transducers happen to be cached
+    """
+    most_harmonic_state = list_of_states[0]
     try:  # TODO for debug prints
         most_harmonic_cost_vector = cost_by_state_dict[most_harmonic_state]
     except KeyError as ex:
@@ -123,7 +130,7 @@ def _best_arcs(arcs_from_current_index, state_costs):
         else:  # arc.terminus is newly introduced
             best_arcs_by_state[arc.terminal_state] = [arc]
             state_costs[arc.terminal_state] = current_cost
-    return reduce(lambda a, b: a + b, best_arcs_by_state.values())
+    return list(itertools.chain.from_iterable(best_arcs_by_state.values()))
 
 
 def optimize_transducer_grammar_for_word(word, eval):
@@ -170,3 +177,106 @@ def optimize_transducer_grammar_for_word(word, eval):
     # new_transducer.clear_dead_states(with_impasse_states=True) #TODO give it a try
 
     return new_transducer
+
+
+def _best_arcs_vectorized(arcs_from_current_index, state_ids, state_cost_matrix, arc_cost_matrix):
+    """
+    Vectorized equivalent of _best_arcs for a single position.
+    Every terminal state keeps all of its incoming arcs whose total cost equals the lexicographic minimum,
+    and the arcs are returned grouped by the order in which their terminal state first appears,
+    exactly like _best_arcs does.
+    """
+    origin_ids = np.array([state_ids[arc.origin_state] for arc in arcs_from_current_index], dtype=np.intp)
+    terminal_ids = np.array([state_ids[arc.terminal_state] for arc in arcs_from_current_index], dtype=np.intp)
+    total_costs = state_cost_matrix[origin_ids] + arc_cost_matrix
+
+    # np.lexsort uses the last key as the primary one: sort by terminal state, then by the cost vectors
+    sort_keys = tuple(total_costs[:, i] for i in reversed(range(total_costs.shape[1]))) + (terminal_ids,)
+    order = np.lexsort(sort_keys)
+    sorted_terminal_ids = terminal_ids[order]
+    group_starts = np.ones(len(order), dtype=bool)
+    group_starts[1:] = sorted_terminal_ids[1:] != sorted_terminal_ids[:-1]
+
+    best_costs = np.empty((state_cost_matrix.shape[0], total_costs.shape[1]), dtype=total_costs.dtype)
+    best_costs[sorted_terminal_ids[group_starts]] = total_costs[order[group_starts]]
+    is_best = (total_costs == best_costs[terminal_ids]).all(axis=1)
+
+    unique_terminal_ids, first_appearance = np.unique(terminal_ids, return_index=True)
+    first_appearance_by_state = np.empty(state_cost_matrix.shape[0], dtype=np.intp)
+    first_appearance_by_state[unique_terminal_ids] = first_appearance
+    best_positions = np.flatnonzero(is_best)
+    best_positions = best_positions[np.argsort(first_appearance_by_state[terminal_ids[best_positions]],
+                                               kind="stable")]
+
+    state_cost_matrix[unique_terminal_ids] = best_costs[unique_terminal_ids]
+    return best_positions
+
+
+def optimize_transducer_grammar_for_word_vectorized(word, eval):
+    """
+    NumPy engine for optimize_transducer_grammar_for_word.
+    Costs are kept in an (arcs x constraints) matrix and a (states x constraints) matrix, and the best
+    incoming arcs of each position are selected in a single vectorized pass.
+    The resulting transducer is identical to the one of optimize_transducer_grammar_for_word.
+
+    The sweep requires every arc to advance one position (which is always the case for a word intersected
+    with a grammar transducer), otherwise the pure python implementation is used.
+    """
+    if np is None:
+        raise TransducerOptimizationError("numpy is required for the vectorized transducer optimization")
+
+    if any(arc.origin_state.index == arc.terminal_state.index for arc in eval._arcs):
+        return optimize_transducer_grammar_for_word(word, eval)
+
+    state_ids = {state: i for i, state in enumerate(eval.states)}
+    state_ids.setdefault(eval.initial_state, len(state_ids))
+    for arc in eval._arcs:
+        state_ids.setdefault(arc.origin_state, len(state_ids))
+        state_ids.setdefault(arc.terminal_state, len(state_ids))
+
+    arcs_by_index = {}
+    for arc in eval._arcs:
+        if arc.origin_state.index in arcs_by_index.keys():
+            arcs_by_index[arc.origin_state.index].append(arc)
+        else:
+            arcs_by_index[arc.origin_state.index] = [arc]
+
+    length_of_cost_vectors = eval.get_length_of_cost_vectors()
+    state_cost_matrix = np.zeros((len(state_ids), length_of_cost_vectors), dtype=np.int64)
+    reached_states = {eval.initial_state}
+
+    new_transducer = Transducer(eval.get_alphabet())
+    new_transducer.add_state(eval.initial_state)
+    new_transducer.initial_state = eval.initial_state
+
+    for index in range(len(word.get_segments())):
+        arcs = arcs_by_index[index]
+        for arc in arcs:
+            if arc.origin_state not in reached_states:
+                raise KeyError(arc.origin_state)
+        arc_cost_matrix = np.array([arc.cost_vector.vector for arc in arcs], dtype=np.int64).reshape(
+            len(arcs), length_of_cost_vectors)
+        for position in _best_arcs_vectorized(arcs, state_ids, state_cost_matrix, arc_cost_matrix):
+            arc = arcs[position]
+            new_transducer.add_arc(arc)
+            new_transducer.add_state(arc.terminal_state)
+            reached_states.add(arc.terminal_state)
+
+    def get_state_cost(state):
+        if state not in reached_states:
+            raise KeyError(state)
+        return tuple(state_cost_matrix[state_ids[state]].tolist())
+
+    new_final_states = [eval.final_states[0]]
+    for state in eval.final_states[1:]:
+        state_cost = get_state_cost(state)
+        final_cost = get_state_cost(new_final_states[0])
+        if state_cost < final_cost:
+            new_final_states = [state]
+        elif state_cost == final_cost:
+            new_final_states.append(state)
+
+    for state in new_final_states:
+        new_transducer.add_final_state(state)
+
+    return new_transducer
@@ -5,6 +5,8 @@ from six import PY3
 
 
 class UnicodeMixin(object):
+    __slots__ = ()  # so that the instances of subclasses with __slots__ have no __dict__
+
     if PY3:
         __str__ = lambda x: x.__unicode__()
     else:
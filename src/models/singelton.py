@@ -2,7 +2,7 @@ class Singleton:
     instance = None
 
     def __new__(cls, *args, **kwargs):
-        if not cls.instance:
+        if not cls.__dict__.get("instance"):  # every subclass holds its own instance
             cls.instance = super().__new__(cls)
             return cls.instance
         else:
@@ -10,7 +10,7 @@ class Singleton:
 
     @classmethod
     def get_instance(cls):
-        if cls.instance:
+        if cls.__dict__.get("instance"):
             return cls.instance
         else:
             raise ValueError("Tried to fetch non-instantiated Singleton type", {"type": cls.__name__})
@@ -3,8 +3,11 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 import logging
 import pickle
+from collections import Counter, OrderedDict
 from math import ceil, log
 
+from src.misc.memory_tools import evict_least_recently_used
+from src.misc.profiling_tools import profiled, span
 from src.misc.unicode_mixin import UnicodeMixin
 from src.otml_configuration import settings
 
@@ -21,44 +24,100 @@ class TraversableGrammarHypothesis(UnicodeMixin, object):
         self.data_energy = None
         self.combined_energy = None
 
-    # @timeit
-    def get_energy(self):
-        data_length = self.get_data_length_given_grammar()
-        grammar_length = self.grammar.get_encoding_length()
+    @profiled("energy")
+    def get_energy(self, energy_budget=float("inf")):
+        """
+        energy_budget - the evaluation is aborted with an infinite energy as soon as the energy is known to exceed it
+        """
+        with span("grammar_encoding"):
+            grammar_length = self.grammar.get_encoding_length()
         data_multiplier = settings.data_encoding_length_multiplier
         grammar_multiplier = settings.grammar_encoding_length_multiplier
         self.grammar_energy = grammar_length * grammar_multiplier
+        if data_multiplier:
+            data_length_budget = (energy_budget - self.grammar_energy) / data_multiplier
+        else:
+            data_length_budget = float("inf")
+        data_length = self.get_data_length_given_grammar(data_length_budget)
         self.data_energy = data_length * data_multiplier
         self.combined_energy = self.grammar_energy + self.data_energy
         return self.combined_energy
 
-    def get_data_length_given_grammar(self):
+    @profiled("data_encoding")
+    def get_data_length_given_grammar(self, length_budget=float("inf")):
         """
         data_parse_dict is a dictionary with:
             keys: words of the data;
             values: sets of parses of a word [parse = a pair (input, number_of_outputs)]
 
+        every word costs at least the length of choosing its input, so the data length is bounded from below before
+        the data is parsed. while the lexicon words are generated, the words parsed so far cost their shortest
+        encoding yet, less what the lexicon words left to generate can still shorten them (see `_get_savings_bound`).
+        returns inf as soon as this bound exceeds length_budget, without generating the rest of the lexicon words
         """
-        data_parse_dict = self.parse_data()
+        input_choice_length = ceil(log(self.grammar.lexicon.get_number_of_distinct_words(), 2))
+        minimal_length = len(self.data) * input_choice_length
+        if minimal_length > length_budget:
+            return float("inf")
+
+        data_parse_dict = {word: set() for word in self.data}
+        words_counts = Counter(self.data)
+        excess_lengths = {}  # the shortest encoding yet of every parsed word, beyond the length of choosing its input
+        total_excess_length = 0  # of all the occurrences of the parsed words in the data
+        lexicon_words = list(set(self.grammar.lexicon.get_words()))
+        for number_of_generated_words, word_in_lexicon in enumerate(lexicon_words, start=1):
+            outputs = self.grammar.generate(word_in_lexicon)
+            parse = (word_in_lexicon, len(outputs))
+            for output in outputs:
+                if output in words_counts:
+                    data_parse_dict[output].add(parse)
+                    excess_length = self.encode_output(parse, input_choice_length) - input_choice_length
+                    previous_excess_length = excess_lengths.get(output)
+                    if previous_excess_length is None or excess_length < previous_excess_length:
+                        excess_lengths[output] = excess_length
+                        total_excess_length += (excess_length - (previous_excess_length or 0)) * words_counts[output]
+            if minimal_length + total_excess_length > length_budget:
+                savings_bound = _get_savings_bound(excess_lengths, words_counts,
+                                                   len(lexicon_words) - number_of_generated_words)
+                if minimal_length + total_excess_length - savings_bound > length_budget:
+                    return float("inf")
 
         for word in self.data:
             if not data_parse_dict[word]:  # if data_parse_dict[word] is the empty set
                 return float("inf")
 
-        input_choice_length = ceil(log(self.grammar.lexicon.get_number_of_distinct_words(), 2))
+        self.data_parse = data_parse_dict
+        return minimal_length + total_excess_length
 
-        total_length = 0
-        for word in self.data:
-            total_length += min([self.encode_output(parse, input_choice_length) for parse in data_parse_dict[word]])
+    def get_evaluation(self):
+        """
+        returns the energies computed by get_energy, to be set on an equal hypothesis with set_evaluation.
+        the data parse is left out, since it is far larger than the energies - see get_data_parse
+        """
+        return self.combined_energy, self.grammar_energy, self.data_energy
 
-        self.data_parse = data_parse_dict
-        return total_length
+    def set_evaluation(self, evaluation):
+        self.combined_energy, self.grammar_energy, self.data_energy = evaluation
+        self.data_parse = None
+
+    def get_data_parse(self):
+        """
+        returns the data parse of the last evaluation, parsing the data again if the energies were set from an
+        evaluation of an equal hypothesis
+        """
+        if self.data_parse is None:
+            self.data_parse = self.parse_data()
+        return self.data_parse
+
+    def get_fingerprint(self):
+        return self.grammar.get_fingerprint()
 
     def get_recent_data_parse(self):
         result = ""
+        data_parse = self.get_data_parse()
         data_parse_with_string_keys = dict()
-        for word in self.data_parse:
-            data_parse_with_string_keys[str(word)] = self.data_parse[word]
+        for word in data_parse:
+            data_parse_with_string_keys[str(word)] = data_parse[word]
 
         word_list = [word for word in data_parse_with_string_keys]
         word_list.sort(key=lambda item: (len(item), item))  # sort by length first and then alphabetically
@@ -105,7 +164,6 @@ class TraversableGrammarHypothesis(UnicodeMixin, object):
                     data_parse_dict[output].add(parse)
         return data_parse_dict
 
-    # @timeit
     def encode_output(self, parse, input_choice_length):
         input, number_of_outputs = parse
         output_choice_length = ceil(log(number_of_outputs, 2))
@@ -116,10 +174,72 @@ class TraversableGrammarHypothesis(UnicodeMixin, object):
         mutation_result = new_hypothesis.grammar.make_mutation()
         return mutation_result, new_hypothesis
 
-    # @timeit
+    def get_offspring(self, other_hypothesis):
+        new_hypothesis = self.get_hypothesis_copy()
+        crossover_result = new_hypothesis.grammar.make_crossover(other_hypothesis.grammar)
+        return crossover_result, new_hypothesis
+
+    @profiled("neighbor_copy")
     def get_hypothesis_copy(self):
         grammar_copy = pickle.loads(pickle.dumps(self.grammar, -1))
         return TraversableGrammarHypothesis(grammar_copy, self.data)
 
     def __unicode__(self):
         return "Hypothesis with energy: {0}".format(self.get_energy())
+
+
+def _get_savings_bound(excess_lengths, words_counts, number_of_inputs):
+    """
+    returns an upper bound of how much the encoding of the parsed words can still be shortened by number_of_inputs
+    more inputs. an input of n outputs encodes each of them in ceil(log2(n)) bits beyond the input choice, so with
+    at most 2 ** k outputs of k bits, one input shortens at most the 2 ** k words that gain the most
+    """
+    if not number_of_inputs:
+        return 0
+    input_savings_bound = 0
+    for output_choice_length in range(max(excess_lengths.values(), default=0)):
+        savings = sorted((words_counts[word] * (excess_length - output_choice_length)
+                          for word, excess_length in excess_lengths.items() if excess_length > output_choice_length),
+                         reverse=True)
+        input_savings_bound = max(input_savings_bound, sum(savings[:2 ** output_choice_length]))
+    total_savings = sum(words_counts[word] * excess_length for word, excess_length in excess_lengths.items())
+    return min(number_of_inputs * input_savings_bound, total_savings)
+
+
+class EnergyMemo(object):
+    """
+    A bounded memo of hypotheses evaluations, keyed by the hypotheses fingerprints.
+    When full, the least recently used evaluation is dropped. A memo of size 0 memoizes nothing
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.evaluations = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fingerprint):
+        evaluation = self.evaluations.get(fingerprint)
+        if evaluation is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.evaluations.move_to_end(fingerprint)
+        return evaluation
+
+    def put(self, fingerprint, evaluation):
+        if not self.size:
+            return
+        self.evaluations[fingerprint] = evaluation
+        self.evaluations.move_to_end(fingerprint)
+        if len(self.evaluations) > self.size:
+            self.evaluations.popitem(last=False)
+
+    def evict(self, fraction):
+        """
+        removes the given fraction of the least recently used evaluations
+        """
+        evict_least_recently_used(self.evaluations, fraction)
+
+    def __len__(self):
+        return len(self.evaluations)
@@ -0,0 +1,116 @@
+import logging
+import os
+import random
+from collections import namedtuple
+from random import choice
+
+from src.misc.logger import setup_logs_file, stop_logs_thread
+from src.misc.parallel_tools import get_number_of_workers, get_worker_pool
+from src.otml_configuration import settings, get_configuration
+from src.simulated_annealing import SimulatedAnnealing, get_modules_caches, set_modules_caches
+
+logger = logging.getLogger(__name__)
+
+RESTART_LOGS_FILE = "log_restart_{}.txt"
+RESTART_CHECKPOINT_FILE = "checkpoint_restart_{}.pkl"
+
+# the caches compiled by the parent process, installed afresh at the beginning of every restart
+shared_modules_caches = None
+
+RestartResult = namedtuple("RestartResult", ["restart", "seed", "energy", "steps", "constraint_set", "logs_file"])
+
+
+class MultiStartAnnealing(object):
+    """
+    Runs `number_of_restarts` independent simulated annealing runs from the same initial hypothesis in a process pool.
+    Every restart is seeded with a seed derived from the configured seed, so the whole batch is reproducible,
+    and writes its own log file to the output folder.
+
+    The transducers of the initial hypothesis are compiled once, before the workers start, and handed to them
+    so that the restarts do not compile them again. Every restart starts from a copy of these caches, so the caches
+    of the restarts that ran before it in the same worker are released.
+    """
+
+    def __init__(self, traversable_hypothesis, number_of_restarts, number_of_workers=0, target_energy=None):
+        self.traversable_hypothesis = traversable_hypothesis
+        self.number_of_restarts = number_of_restarts
+        self.number_of_workers = get_number_of_workers(number_of_workers, number_of_restarts)
+        self.target_energy = target_energy
+        self.results = None
+
+    def run(self):
+        """
+        runs the restarts and returns their results, sorted by final energy
+        """
+        if settings.random_seed:
+            seed = choice(range(1, 1000))
+            logger.info("Seed: {} - randomly selected".format(seed))
+        else:
+            seed = settings.seed
+            logger.info("Seed: {} - specified".format(seed))
+
+        self.traversable_hypothesis.get_energy()  # compiles the transducers that every restart starts from
+        log_level = logging.getLogger().level
+        tasks = [(restart, derive_seed(seed, restart), self.traversable_hypothesis, self.target_energy, log_level)
+                 for restart in range(self.number_of_restarts)]
+
+        logger.info("Running {} restarts on {} workers".format(self.number_of_restarts, self.number_of_workers))
+        results = []
+        with get_worker_pool(self.number_of_workers, _share_modules_caches, (get_modules_caches(),)) as pool:
+            for result in pool.imap_unordered(_run_restart, tasks):
+                logger.info("Restart {} finished with energy {:,}".format(result.restart, result.energy))
+                results.append(result)
+
+        self.results = sorted(results, key=lambda result: (result.energy, result.restart))
+        logger.info(self.get_summary())
+        return self.results
+
+    def get_summary(self):
+        lines = ["Restarts ranked by final energy:"]
+        for rank, result in enumerate(self.results, start=1):
+            lines.append("{}. restart {} (seed {}): energy {:,} after {:,} steps - {}".format(
+                rank, result.restart, result.seed, result.energy, result.steps, result.constraint_set))
+        if self.target_energy is not None:
+            number_of_hits = len([result for result in self.results if is_target_reached(result, self.target_energy)])
+            lines.append("Target energy {:,} reached by {} of {} restarts ({:.0%})".format(
+                self.target_energy, number_of_hits, len(self.results), number_of_hits / len(self.results)))
+        return "\n".join(lines)
+
+
+def derive_seed(seed, restart):
+    """
+    returns the seed of a restart. string seeds are hashed with sha512, so the result does not depend on the process
+    """
+    return random.Random("{}-{}".format(seed, restart)).randrange(1, 2 ** 31)
+
+
+def is_target_reached(result, target_energy):
+    return result.energy <= target_energy
+
+
+def _share_modules_caches(modules_caches):
+    global shared_modules_caches
+    shared_modules_caches = modules_caches
+
+
+def _run_restart(task):
+    """
+    runs a single restart with its own seed and log file - executed in the worker processes
+    """
+    restart, seed, traversable_hypothesis, target_energy, log_level = task
+    logs_file = os.path.join(settings.output_folder, RESTART_LOGS_FILE.format(restart))
+    checkpoint_file = os.path.join(settings.output_folder, RESTART_CHECKPOINT_FILE.format(restart))
+    get_configuration().update(random_seed=False, seed=seed, logs_file=logs_file,
+                               checkpoint_file=checkpoint_file).publish()
+    setup_logs_file(log_level)
+    set_modules_caches({key: dict(cache) for key, cache in shared_modules_caches.items()})  # the values are shared
+
+    logger.info("Restart {}".format(restart))
+    simulated_annealing = SimulatedAnnealing(traversable_hypothesis, target_energy=target_energy)
+    try:
+        steps, final_hypothesis = simulated_annealing.run()
+    finally:
+        stop_logs_thread()  # the worker may be reused, or terminated before the thread writes the records
+
+    return RestartResult(restart, seed, simulated_annealing.current_hypothesis_energy, steps,
+                         str(final_hypothesis.grammar.constraint_set), logs_file)
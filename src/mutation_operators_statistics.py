@@ -0,0 +1,133 @@
+import logging
+
+from src.misc.unicode_mixin import UnicodeMixin
+from src.otml_configuration import settings, get_configuration, LexiconMutationWeights, \
+    ConstraintSetMutationWeights
+
+logger = logging.getLogger(__name__)
+
+LEXICON_MUTATION_OPERATORS = tuple(LexiconMutationWeights.model_fields)
+CONSTRAINT_SET_MUTATION_OPERATORS = tuple(ConstraintSetMutationWeights.model_fields)
+MUTATION_OPERATORS = LEXICON_MUTATION_OPERATORS + CONSTRAINT_SET_MUTATION_OPERATORS
+
+# the sum of the published weights, which are integers
+WEIGHTS_SCALE = 1000
+# the part of the rewards and costs kept at every re-weighting, so that the weights follow the current rates
+REWARDS_DECAY = 0.5
+
+
+class OperatorStatistics(object):
+    def __init__(self):
+        self.proposals = 0
+        self.successes = 0
+        self.acceptances = 0
+        self.improvement = 0
+        self.cpu_time = 0.0
+        # the decayed improvement and cpu time the re-weighting is based on
+        self.recent_improvement = 0
+        self.recent_cpu_time = 0.0
+
+    def record(self, mutation_result, accepted, improvement, cpu_time):
+        self.proposals += 1
+        self.successes += mutation_result
+        self.acceptances += accepted
+        self.improvement += improvement
+        self.cpu_time += cpu_time
+        self.recent_improvement += improvement
+        self.recent_cpu_time += cpu_time
+
+    def get_improvement_rate(self):
+        """
+        energy improvement per cpu second, or None if the operator was not used
+        """
+        if not self.recent_cpu_time:
+            return None
+        return self.recent_improvement / self.recent_cpu_time
+
+    def decay(self):
+        self.recent_improvement *= REWARDS_DECAY
+        self.recent_cpu_time *= REWARDS_DECAY
+
+
+class MutationOperatorsStatistics(UnicodeMixin, object):
+    """
+    Tracks, for every mutation operator, the rate of successful mutations and of accepted neighbors, the energy
+    improvement of the accepted neighbors and the cpu time spent on copying, mutating and evaluating.
+
+    `reweight` publishes new mutation weights in the manner of a bandit: every operator gets
+    `exploration / number_of_operators` of the weight, and the rest is divided in proportion to the operators
+    energy improvement per cpu second. Operators whose configured weight is 0 are never used.
+    """
+
+    def __init__(self, exploration):
+        self.exploration = exploration
+        self.initial_weights = get_mutation_weights()
+        self.operators = {operator: OperatorStatistics() for operator in MUTATION_OPERATORS}
+        self.number_of_reweightings = 0
+
+    def record(self, operator, mutation_result, accepted=False, improvement=0, cpu_time=0.0):
+        self.operators[operator].record(mutation_result, accepted, improvement, cpu_time)
+
+    def get_weights(self):
+        """
+        returns the weights of the enabled operators, normalized to sum to 1
+        """
+        enabled_operators = [operator for operator, weight in self.initial_weights.items() if weight]
+        rates = {operator: self.operators[operator].get_improvement_rate() for operator in enabled_operators}
+        known_rates = [rate for rate in rates.values() if rate is not None]
+        if not any(known_rates):  # no improvement yet - nothing to prefer an operator by
+            initial_weights_sum = sum(self.initial_weights.values())
+            return {operator: self.initial_weights[operator] / initial_weights_sum for operator in enabled_operators}
+
+        optimistic_rate = max(known_rates)  # operators that were not used yet are given a chance
+        rates = {operator: optimistic_rate if rate is None else rate for operator, rate in rates.items()}
+        rates_sum = sum(rates.values())
+        return {operator: (1 - self.exploration) * rate / rates_sum + self.exploration / len(enabled_operators)
+                for operator, rate in rates.items()}
+
+    def reweight(self):
+        weights = self.get_weights()
+        publish_mutation_weights({operator: max(1, round(weight * WEIGHTS_SCALE))
+                                  for operator, weight in weights.items()})
+        for operator_statistics in self.operators.values():
+            operator_statistics.decay()
+        self.number_of_reweightings += 1
+
+    def __unicode__(self):
+        weights = get_mutation_weights()
+        lines = ["Mutation operators (operator: weight, proposals, success rate, acceptance rate, "
+                 "improvement, cpu seconds):"]
+        for operator in MUTATION_OPERATORS:
+            operator_statistics = self.operators[operator]
+            if not operator_statistics.proposals:
+                continue
+            lines.append("{}: {}, {:,}, {:.2f}, {:.2f}, {:,}, {:.2f}".format(
+                operator, weights[operator], operator_statistics.proposals,
+                operator_statistics.successes / operator_statistics.proposals,
+                operator_statistics.acceptances / operator_statistics.proposals,
+                operator_statistics.improvement, operator_statistics.cpu_time))
+        return "\n".join(lines)
+
+
+def get_mutation_weights():
+    """
+    returns the published weight of every mutation operator
+    """
+    weights = {operator: getattr(settings.lexicon_mutation_weights, operator)
+               for operator in LEXICON_MUTATION_OPERATORS}
+    weights.update({operator: getattr(settings.constraint_set_mutation_weights, operator)
+                    for operator in CONSTRAINT_SET_MUTATION_OPERATORS})
+    return weights
+
+
+def publish_mutation_weights(weights):
+    """
+    publishes the given weights, keeping the weights of operators that are not given
+    """
+    weights = dict(get_mutation_weights(), **weights)
+    lexicon_mutation_weights = LexiconMutationWeights(
+        **{operator: weights[operator] for operator in LEXICON_MUTATION_OPERATORS})
+    constraint_set_mutation_weights = ConstraintSetMutationWeights(
+        **{operator: weights[operator] for operator in CONSTRAINT_SET_MUTATION_OPERATORS})
+    get_configuration().update(lexicon_mutation_weights=lexicon_mutation_weights,
+                               constraint_set_mutation_weights=constraint_set_mutation_weights).publish()
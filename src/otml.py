@@ -10,16 +10,27 @@ from uuid import uuid4
 
 import click
 
+from src.genetic_search import GeneticSearch
 from src.grammar.constraint_set import ConstraintSet
 from src.grammar.feature_table import FeatureTable
 from src.grammar.grammar import Grammar
-from src.grammar.lexicon import Lexicon
+from src.grammar.lexicon import Lexicon, CompactLexicon
 from src.misc.logger import setup_logger
+from src.misc.status_tools import start_status_server, stop_status_server
+from src.multi_start_annealing import MultiStartAnnealing
 from src.models.corpus import Corpus
 from src.models.traversable_grammar_hypothesis import TraversableGrammarHypothesis
-from src.otml_configuration import OtmlConfiguration, settings
+from src.otml_configuration import OtmlConfiguration, settings, get_configuration
+from src.parallel_tempering import ParallelTempering
 from src.simulated_annealing import SimulatedAnnealing
+from src.speculative_annealing import SpeculativeAnnealing
 
+SEARCH_MODES = {
+    "annealing": SimulatedAnnealing,
+    "parallel_tempering": ParallelTempering,
+    "speculative_annealing": SpeculativeAnnealing,
+    "genetic_search": GeneticSearch,
+}
 
 
 @click.command()
@@ -28,27 +39,95 @@ from src.simulated_annealing import SimulatedAnnealing
 )
 @click.option("-v", "--verbose", "verbose", is_flag=True, default=False, help="Set log level to info")
 @click.option("-vv", "--very-verbose", "very_verbose", is_flag=True, default=False, help="Set log level to debug")
-def main(config_folder_path, verbose, very_verbose):
+@click.option(
+    "-m", "--mode", "mode", type=click.Choice(list(SEARCH_MODES)), default="annealing", show_default=True,
+    help="Search algorithm. parallel_tempering, speculative_annealing and genetic_search are configured by "
+         "the sections of the same name in config.json"
+)
+@click.option(
+    "-r", "--restarts", "restarts", type=click.IntRange(min=1), default=1, show_default=True,
+    help="Number of independent annealing runs, each with a seed derived from the configured seed"
+)
+@click.option(
+    "-w", "--workers", "workers", type=click.IntRange(min=0), default=0, show_default=True,
+    help="Number of worker processes for the restarts. 0 - one per cpu"
+)
+@click.option(
+    "-t", "--target-energy", "target_energy", type=float, default=None,
+    help="Energy of the target grammar, used to report how close the search got"
+)
+@click.option(
+    "--resume", "checkpoint_file", type=click.Path(exists=True, dir_okay=False), default=None,
+    help="Continue the annealing run saved in a checkpoint file, with the configuration it was started with. "
+         "Only the file paths, the steps and time limitations and profiling are read from the configuration folder"
+)
+@click.option(
+    "--profile", "profiling", is_flag=True, default=False,
+    help="Record the latency of the search phases and log a summary at every debug interval"
+)
+@click.option(
+    "--status-port", "status_port", type=click.IntRange(min=0, max=65535), default=None,
+    help="Serve the status of the run as JSON on this local port, updated at every debug interval. 0 - any free port"
+)
+def main(config_folder_path, verbose, very_verbose, mode, restarts, workers, target_energy, checkpoint_file,
+         profiling, status_port):
+    if restarts > 1 and mode != "annealing":
+        raise click.UsageError("--restarts is only supported in annealing mode")
+    if checkpoint_file and (restarts > 1 or mode != "annealing"):
+        raise click.UsageError("--resume is only supported for a single run in annealing mode")
+    if status_port is not None and restarts > 1:
+        raise click.UsageError("--status-port is only supported for a single run")
+
     # load configurations
     OtmlConfiguration.load(config_folder_path)
-    setup_logger(verbose, very_verbose)
+    if profiling:
+        get_configuration().update(profiling=True).publish()
+    setup_logger(verbose, very_verbose, append=bool(checkpoint_file))  # a resumed run continues its log
+
+    traversable_hypothesis = load_initial_hypothesis()
+
+    if status_port is not None:
+        try:
+            status_server = start_status_server(status_port)
+        except OSError as error:
+            raise click.ClickException("Can not serve the run status on port {}: {}".format(status_port, error))
+        print("Serving the run status on {}".format(status_server.url))
+
+    # run the search
+    print("Starting optimization")
+    try:
+        if restarts > 1:
+            multi_start_annealing = MultiStartAnnealing(traversable_hypothesis, restarts, workers, target_energy)
+            multi_start_annealing.run()
+            print(multi_start_annealing.get_summary())
+        else:
+            search = SEARCH_MODES[mode](traversable_hypothesis, target_energy=target_energy)
+            if checkpoint_file:
+                search.resume(checkpoint_file)
+            else:
+                search.run()
+    finally:
+        stop_status_server()
+    print("Done")
+
 
+def load_initial_hypothesis():
+    """
+    returns the hypothesis the search starts from, loaded from the files of the published configuration
+    """
     # load grammar and data
     feature_table = FeatureTable.load(settings.features_file)
     corpus = Corpus.load(settings.corpus_file)
     constraint_set = ConstraintSet.load(settings.constraints_file, feature_table)
-    lexicon = Lexicon(corpus.get_words(), feature_table)
+    if settings.lexicon_storage == "compact":
+        lexicon = CompactLexicon(corpus.get_words(), feature_table)
+    else:
+        lexicon = Lexicon(corpus.get_words(), feature_table)
     grammar = Grammar(feature_table, constraint_set, lexicon)
     data = corpus.get_words()
 
     # prepare data for optimization
-    traversable_hypothesis = TraversableGrammarHypothesis(grammar, data)
-    simulated_annealing = SimulatedAnnealing(traversable_hypothesis)
-
-    # run simulated annealing
-    print("Starting optimization")
-    simulated_annealing.run()
-    print("Done")
+    return TraversableGrammarHypothesis(grammar, data)
 
 
 def get_log_name():
@@ -1,11 +1,13 @@
 import datetime
+import importlib.util
 import json
 import logging
 import os
 from io import StringIO
-from typing import Any, Self
+from typing import Any, Literal, Self
 
-from pydantic import BaseModel, field_validator, model_validator, ConfigDict, NonNegativeInt
+from pydantic import BaseModel, field_validator, model_validator, ConfigDict, NonNegativeFloat, NonNegativeInt, \
+    PositiveFloat, PositiveInt
 
 from src.exceptions import OtmlConfigurationError
 from src.models.singelton import Singleton
@@ -20,6 +22,7 @@ DATA_FILES = {
 }
 OUTPUT_FOLDER = "out"
 LOGS_FILE = "log.txt"
+CHECKPOINT_FILE = "checkpoint.pkl"
 
 
 class Model(BaseModel):
@@ -84,6 +87,82 @@ class ConstraintInsertionWeights(Weights):
     phonotactic: NonNegativeInt
 
 
+class ParallelTemperingSettings(Model):
+    number_of_replicas: PositiveInt = 4
+    min_temp: PositiveFloat = 1
+    max_temp: PositiveFloat = 100
+    swap_interval: PositiveInt = 100
+    number_of_workers: NonNegativeInt = 0  # 0 - one worker per replica, up to the number of cpus
+
+    @model_validator(mode="after")
+    def _validate_temperatures(self):
+        if self.number_of_replicas < 2:
+            raise OtmlConfigurationError("Parallel tempering requires at least 2 replicas")
+        if self.min_temp >= self.max_temp:
+            raise OtmlConfigurationError("Parallel tempering min_temp must be lower than max_temp")
+        return self
+
+
+class GeneticSearchSettings(Model):
+    population_size: PositiveInt = 20
+    elite_size: NonNegativeInt = 2  # the best hypotheses that pass to the next generation unchanged
+    tournament_size: PositiveInt = 3
+    crossover_rate: NonNegativeFloat = 0.5  # the rest of the offspring are mutated copies of a single parent
+    number_of_generations: PositiveInt = 500
+    number_of_workers: NonNegativeInt = 0  # 0 - one worker per offspring of a generation, up to the number of cpus
+
+    @model_validator(mode="after")
+    def _validate_population(self):
+        if self.elite_size >= self.population_size:
+            raise OtmlConfigurationError("Genetic search elite_size must be lower than population_size")
+        if self.tournament_size > self.population_size:
+            raise OtmlConfigurationError("Genetic search tournament_size must not be greater than population_size")
+        if self.crossover_rate > 1:
+            raise OtmlConfigurationError("Genetic search crossover_rate must not be greater than 1")
+        return self
+
+
+class CoolingScheduleSettings(Model):
+    type: Literal["geometric", "adaptive", "reheating"] = "geometric"
+    # adaptive
+    acceptance_window: PositiveInt = 100
+    min_acceptance_rate: NonNegativeFloat = 0.01
+    max_acceptance_rate: NonNegativeFloat = 0.9
+    fast_cooling_factor: PositiveFloat = 0.99
+    # reheating
+    stuck_steps: PositiveInt = 1000
+    reheat_factor: PositiveFloat = 10
+    max_reheats: NonNegativeInt = 3
+
+    @model_validator(mode="after")
+    def _validate_factors(self):
+        if not self.min_acceptance_rate < self.max_acceptance_rate <= 1:
+            raise OtmlConfigurationError("Acceptance rates must satisfy min_acceptance_rate < max_acceptance_rate <= 1")
+        if self.fast_cooling_factor >= 1:
+            raise OtmlConfigurationError("fast_cooling_factor must be lower than 1")
+        if self.reheat_factor <= 1:
+            raise OtmlConfigurationError("reheat_factor must be greater than 1")
+        return self
+
+
+class MutationWeightingSettings(Model):
+    adaptive: bool = False  # re-weight the mutation operators by their energy improvement per cpu second
+    reweighting_interval: PositiveInt = 1000
+    exploration: PositiveFloat = 0.1  # the part of the weight divided equally between the operators
+
+    @field_validator("exploration")
+    @classmethod
+    def _validate_exploration(cls, value):
+        if value > 1:
+            raise OtmlConfigurationError("exploration must not be greater than 1")
+        return value
+
+
+class SpeculativeAnnealingSettings(Model):
+    batch_size: PositiveInt = 4
+    number_of_workers: NonNegativeInt = 0  # 0 - one worker per neighbor of a batch, up to the number of cpus
+
+
 class OtmlConfiguration(Model, Singleton):
     simulation_name: str
 
@@ -95,6 +174,7 @@ class OtmlConfiguration(Model, Singleton):
 
     output_folder: str
     logs_file: str
+    checkpoint_file: str
 
     log_lexicon_words: bool
 
@@ -117,13 +197,30 @@ class OtmlConfiguration(Model, Singleton):
     lexicon_mutation_weights: LexiconMutationWeights
     constraint_set_mutation_weights: ConstraintSetMutationWeights
     constraint_insertion_weights: ConstraintInsertionWeights
+    mutation_weighting: MutationWeightingSettings = MutationWeightingSettings()
 
     initial_temp: int
     threshold: float
     cooling_factor: float
+    cooling_schedule: CoolingScheduleSettings = CoolingScheduleSettings()
     debug_logging_interval: int
     clear_modules_caching_interval: int
     steps_limitation: int | float
+    time_limitation: PositiveFloat = float("inf")  # seconds, counted from the start or the resume of the run
+    evaluations_limitation: int | float = float("inf")
+    stop_at_target_energy: bool = False
+    plateau_intervals: NonNegativeInt = 0  # stop after this many debug intervals without a new best energy, 0 - never
+    checkpoint_interval: NonNegativeInt = 0  # 0 - no checkpoints
+    energy_memo_size: NonNegativeInt = 10000  # 0 - no memo
+    memory_limit: PositiveFloat = float("inf")  # MB of resident memory, over which the caches are evicted
+    memory_eviction_fraction: PositiveFloat = 0.5  # the part of every cache that is evicted
+    write_metrics: bool = True  # write a JSON Lines record at every debug interval, next to the logs file
+    write_trace: bool = False  # write a binary record of every step of annealing mode, next to the logs file
+    # SQLite database of the run summaries, relative to the output folder - an absolute path is shared between
+    # configurations. None - no summaries
+    results_database: str | None = "results.sqlite"
+    asynchronous_logging: bool = False  # format and write the log records on a background thread
+    profiling: bool = False  # record the latency of the annealing phases and log it at every debug interval
 
     random_seed: bool
     seed: int
@@ -131,6 +228,13 @@ class OtmlConfiguration(Model, Singleton):
     data_encoding_length_multiplier: int
     grammar_encoding_length_multiplier: int
 
+    transducer_optimization_engine: Literal["python", "numpy"] = "python"
+    lexicon_storage: Literal["words", "compact"] = "words"
+
+    parallel_tempering: ParallelTemperingSettings = ParallelTemperingSettings()
+    speculative_annealing: SpeculativeAnnealingSettings = SpeculativeAnnealingSettings()
+    genetic_search: GeneticSearchSettings = GeneticSearchSettings()
+
     @field_validator("*", mode="before")
     @classmethod
     def _parse_json_field(cls, raw):
@@ -150,9 +254,28 @@ class OtmlConfiguration(Model, Singleton):
         with open(config_dict["config_file"], "r") as f:
             config_dict.update(json.load(f))
 
-        config = cls.model_validate(config_dict)
+        config = cls._create(config_dict)
+        config.publish()
+
+    @classmethod
+    def _create(cls, values: dict[str, Any]) -> Self:
+        """
+        returns a new configuration of the values, detached from the published one - `Singleton.__new__`, which
+        `model_validate` and `model_copy` go through, would return the published configuration and change it in place
+        """
+        configuration = object.__new__(cls)
+        cls.__pydantic_validator__.validate_python(values, self_instance=configuration)
+        return configuration
+
+    def publish(self) -> None:
+        """
+        makes this configuration the one read through `settings` and `get_configuration`, and the singleton instance.
+        configurations returned by `update` are not used until they are published
+        """
         global _settings
-        _settings = config
+        type(self).instance = self
+        _settings = self
+        settings._publish(self)
 
     @staticmethod
     def _build_file_paths(config_folder_path) -> dict[str, str]:
@@ -163,6 +286,7 @@ class OtmlConfiguration(Model, Singleton):
             "config_folder": absolute_folder_path,
             "output_folder": output_folder,
             "logs_file": os.path.join(output_folder, LOGS_FILE),
+            "checkpoint_file": os.path.join(output_folder, CHECKPOINT_FILE),
         }
         for field_name, file_name in DATA_FILES.items():
             file_paths[field_name] = os.path.join(absolute_folder_path, file_name)
@@ -179,9 +303,17 @@ class OtmlConfiguration(Model, Singleton):
 
     def update(self, **updates) -> Self:
         """
-        returns a copy of the configuration, updating the values per the given kwargs
+        returns a validated copy of the configuration, updating the values per the given kwargs.
+        call `publish` on the copy to apply it to `settings` and `get_configuration`
         """
-        return self.model_copy(update=updates, deep=True)
+        return self._create(dict(self.model_dump(), **updates))
+
+    @field_validator("memory_eviction_fraction")
+    @classmethod
+    def _validate_memory_eviction_fraction(cls, value):
+        if value > 1:
+            raise OtmlConfigurationError("memory_eviction_fraction must not be greater than 1")
+        return value
 
     @model_validator(mode="after")
     def _validate_weights(self):
@@ -211,6 +343,12 @@ class OtmlConfiguration(Model, Singleton):
             )
         return self
 
+    @model_validator(mode="after")
+    def _validate_transducer_optimization_engine(self):
+        if self.transducer_optimization_engine == "numpy" and importlib.util.find_spec("numpy") is None:
+            raise OtmlConfigurationError("The numpy transducer optimization engine requires numpy to be installed")
+        return self
+
     @model_validator(mode="after")
     def _validate_change_segment_has_logical_weight(self):  # the logic for these isn't actually implemented yet
         if self.lexicon_mutation_weights.change_segment ^ self.allow_candidates_with_changed_segments:
@@ -228,11 +366,61 @@ class OtmlConfiguration(Model, Singleton):
 _settings: OtmlConfiguration | None = None
 
 
-class LazySettings:
-    def __getattr__(self, item):
+def _snapshot_values(model: BaseModel) -> dict[str, Any]:
+    values = dict()
+    for field_name in type(model).model_fields:
+        value = getattr(model, field_name)
+        if isinstance(value, BaseModel):
+            value = SettingsSnapshot(_snapshot_values(value))
+        values[field_name] = value
+    if isinstance(model, Weights):
+        values["sum"] = model.sum
+    return values
+
+
+class SettingsSnapshot:
+    """
+    an immutable, plain-attribute copy of a configuration model.
+    reading an attribute is a plain instance dict lookup - no pydantic descriptors or validation
+    """
+
+    def __init__(self, values: dict[str, Any]):
+        self.__dict__.update(values)
+
+    def __setattr__(self, key, value):
+        raise OtmlConfigurationError("Settings are read-only. Use `OtmlConfiguration.update` and `publish` instead")
+
+    def __delattr__(self, item):
+        raise OtmlConfigurationError("Settings are read-only. Use `OtmlConfiguration.update` and `publish` instead")
+
+    def __repr__(self):
+        return repr(vars(self))
+
+
+def get_configuration() -> OtmlConfiguration:
+    """
+    returns the published configuration, e.g. to publish it again in a worker process
+    """
+    if _settings is None:
+        raise OtmlConfigurationError("Settings have not been initialized. Call 'OtmlConfiguration.load' first.")
+    return _settings
+
+
+class LazySettings(SettingsSnapshot):
+    def __init__(self):
+        super().__init__(dict())
+
+    def _publish(self, configuration: OtmlConfiguration) -> None:
+        self.__dict__.clear()
+        self.__dict__.update(_snapshot_values(configuration))
+
+    def __getattr__(self, item):  # only reached for fields that were not published
         if _settings is None:
             raise OtmlConfigurationError("Settings have not been initialized. Call 'OtmlConfiguration.load' first.")
         return getattr(_settings, item)
 
+    def __repr__(self):
+        return repr(_settings)
+
 
 settings: OtmlConfiguration = LazySettings()
@@ -0,0 +1,153 @@
+import logging
+import random
+
+from src.misc.parallel_tools import get_number_of_workers, get_worker_pool
+from src.otml_configuration import settings
+from src.simulated_annealing import SimulatedAnnealing, metropolis_criterion, clear_modules_caching, \
+    get_energy_budget, enforce_memory_limit
+
+logger = logging.getLogger(__name__)
+
+
+class ParallelTempering(SimulatedAnnealing):
+    """
+    Replica exchange annealing:
+    runs `number_of_replicas` chains, each at a fixed temperature of a geometric ladder between `min_temp` and
+    `max_temp`, in a process pool. Every `swap_interval` steps, neighboring replicas swap their hypotheses
+    according to the Metropolis criterion, so good hypotheses found at high temperatures drift down the ladder.
+
+    The coldest replica is reported as the current hypothesis, and the best hypothesis seen by any replica
+    is returned.
+    """
+
+    def __init__(self, traversable_hypothesis, target_lexicon_indicator_function=None, sample_target_lexicon=None,
+                 sample_target_outputs=None, target_energy=None):
+        super(ParallelTempering, self).__init__(traversable_hypothesis, target_lexicon_indicator_function,
+                                                sample_target_lexicon, sample_target_outputs, target_energy)
+        self.round = 0
+        self.temperatures = None
+        self.replica_hypotheses = None
+        self.replica_energies = None
+        self.swap_attempts = None
+        self.swap_acceptances = None
+
+    def run(self):
+        """
+        staring parallel tempering
+        """
+        self.before_loop()
+
+        number_of_workers = get_number_of_workers(settings.parallel_tempering.number_of_workers,
+                                                  len(self.temperatures))
+        logger.info("Running {} replicas on {} workers".format(len(self.temperatures), number_of_workers))
+        with get_worker_pool(number_of_workers) as pool:
+            while self.step < self.number_of_expected_steps and not self._should_stop():
+                self.make_round(pool)
+
+        self.current_hypothesis = self.best_hypothesis
+        self.current_hypothesis_energy = self.best_hypothesis_energy
+        self._after_loop()
+        return self.step, self.best_hypothesis
+
+    def before_loop(self):
+        super(ParallelTempering, self).before_loop()
+        self.temperatures = get_temperature_ladder(settings.parallel_tempering.min_temp,
+                                                   settings.parallel_tempering.max_temp,
+                                                   settings.parallel_tempering.number_of_replicas)
+        logger.info("Replica temperatures: {}".format(self.temperatures))
+        number_of_replicas = len(self.temperatures)
+        self.replica_hypotheses = [self.current_hypothesis] * number_of_replicas
+        self.replica_energies = [self.current_hypothesis_energy] * number_of_replicas
+        self.swap_attempts = [0] * (number_of_replicas - 1)
+        self.swap_acceptances = [0] * (number_of_replicas - 1)
+        self.best_hypothesis = self.current_hypothesis
+        self.best_hypothesis_energy = self.current_hypothesis_energy
+        self.current_temperature = self.temperatures[0]
+
+    def make_round(self, pool):
+        """
+        advances every replica by `swap_interval` steps and then tries to swap neighboring replicas
+        """
+        self.round += 1
+        number_of_steps = min(settings.parallel_tempering.swap_interval, self.number_of_expected_steps - self.step)
+        tasks = [(hypothesis, energy, temperature, self.step, number_of_steps, random.getrandbits(32))
+                 for hypothesis, energy, temperature in
+                 zip(self.replica_hypotheses, self.replica_energies, self.temperatures)]
+        results = pool.map(_run_replica, tasks)
+
+        previous_step = self.step
+        self.step += number_of_steps
+        for i, (hypothesis, energy, best_hypothesis, best_energy, number_of_evaluations) in enumerate(results):
+            self.number_of_evaluations += number_of_evaluations
+            self.replica_hypotheses[i] = hypothesis
+            self.replica_energies[i] = energy
+            if best_energy < self.best_hypothesis_energy:
+                self.best_hypothesis = best_hypothesis
+                self.best_hypothesis_energy = best_energy
+
+        self._check_target_energy()
+        self._swap_replicas()
+        self.current_hypothesis = self.replica_hypotheses[0]
+        self.current_hypothesis_energy = self.replica_energies[0]
+
+        if self.step // settings.debug_logging_interval > previous_step // settings.debug_logging_interval:
+            self._update_plateau()
+            self._debug_interval()
+
+    def _swap_replicas(self):
+        """
+        neighbors i, i+1 swap with probability min(1, exp((E_i - E_i+1) * (1/T_i - 1/T_i+1))).
+        even and odd pairs are tried on alternate rounds
+        """
+        for i in range(self.round % 2, len(self.temperatures) - 1, 2):
+            self.swap_attempts[i] += 1
+            inverse_temperatures_delta = 1 / self.temperatures[i] - 1 / self.temperatures[i + 1]
+            delta = (self.replica_energies[i + 1] - self.replica_energies[i]) * inverse_temperatures_delta
+            if metropolis_criterion(delta, 1):
+                self.swap_acceptances[i] += 1
+                self.replica_hypotheses[i], self.replica_hypotheses[i + 1] = \
+                    self.replica_hypotheses[i + 1], self.replica_hypotheses[i]
+                self.replica_energies[i], self.replica_energies[i + 1] = \
+                    self.replica_energies[i + 1], self.replica_energies[i]
+
+    def _debug_interval(self):
+        super(ParallelTempering, self)._debug_interval()
+        logger.info("Replica energies: {}".format(self.replica_energies))
+        swap_rates = ["{:.2f}".format(acceptances / attempts) if attempts else "-"
+                      for acceptances, attempts in zip(self.swap_acceptances, self.swap_attempts)]
+        logger.info("Swap acceptance rates: {}".format(swap_rates))
+        logger.info("Best energy: {:,}".format(self.best_hypothesis_energy))
+
+
+def get_temperature_ladder(min_temp, max_temp, number_of_replicas):
+    ratio = (max_temp / min_temp) ** (1 / (number_of_replicas - 1))
+    return [min_temp * ratio ** i for i in range(number_of_replicas)]
+
+
+def _run_replica(task):
+    """
+    runs a replica at a fixed temperature - executed in the worker processes
+    """
+    hypothesis, energy, temperature, first_step, number_of_steps, seed = task
+    random.seed(seed)
+    best_hypothesis, best_energy = hypothesis, energy
+    number_of_evaluations = 0
+    for step in range(first_step + 1, first_step + number_of_steps + 1):
+        if not step % settings.clear_modules_caching_interval:
+            clear_modules_caching()
+        enforce_memory_limit()
+
+        mutation_result, neighbor_hypothesis = hypothesis.get_neighbor()
+        if not mutation_result:
+            continue
+
+        acceptance_random_number = random.random()
+        neighbor_hypothesis_energy = neighbor_hypothesis.get_energy(get_energy_budget(energy, temperature,
+                                                                                      acceptance_random_number))
+        number_of_evaluations += 1
+        if metropolis_criterion(neighbor_hypothesis_energy - energy, temperature, acceptance_random_number):
+            hypothesis, energy = neighbor_hypothesis, neighbor_hypothesis_energy
+            if energy < best_energy:
+                best_hypothesis, best_energy = hypothesis, energy
+
+    return hypothesis, energy, best_hypothesis, best_energy, number_of_evaluations
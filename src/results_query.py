@@ -0,0 +1,117 @@
+"""
+Queries the results database, which holds a summary of every finished run (see src/misc/results_tools.py).
+The working directory for activating this file should be "otml":
+
+    python -m src.results_query -c examples/french_deletion -f outcome=plateau
+    python -m src.results_query -c examples/french_deletion -g simulation_name -g cooling_factor
+
+Filters and groups are columns of the results, or fields of the configurations of the runs, e.g. "seed",
+"cooling_factor" or "cooling_schedule.type". Filter values are parsed as JSON, so "-f cooling_factor=0.999" is
+a number and "-f target_reached_step=null" matches the runs that did not reach the target energy.
+"""
+import json
+import os
+from io import StringIO
+
+import click
+
+from src.exceptions import ResultsError
+from src.misc.results_tools import ResultsStore, get_results_database
+from src.otml_configuration import OtmlConfiguration
+
+
+def parse_filters(filters):
+    """
+    returns a dict of "key=value" filters, with the values parsed as JSON, or as strings if they are not JSON
+    """
+    parsed_filters = {}
+    for key_value in filters:
+        key, separator, value = key_value.partition("=")
+        if not separator:
+            raise ResultsError("A filter should be key=value", {"filter": key_value})
+        try:
+            parsed_filters[key] = json.loads(value)
+        except ValueError:
+            parsed_filters[key] = value
+    return parsed_filters
+
+
+def get_runs_table(runs):
+    table = StringIO()
+    table.write("{:>6}  {:<30}{:>11}  {:<24}{:>10}{:>14}{:>12}{:>10}{:>13}  {}".format(
+        "id", "simulation", "seed", "outcome", "steps", "best energy", "runtime", "steps/s", "target step",
+        "constraint set"))
+    for run in runs:
+        table.write("\n{:>6}  {:<30}{:>11}  {:<24}{:>10,}{:>14}{:>12.1f}{:>10}{:>13}  {}".format(
+            run["id"], run["simulation_name"][:29], _format_value(run["seed"], "{}"), run["outcome"], run["steps"],
+            _format_value(run["best_energy"]), run["runtime"], _format_value(run["steps_per_second"], "{:,.1f}"),
+            _format_value(run["target_reached_step"]), run["constraint_set"]))
+    return table.getvalue()
+
+
+def get_summary_table(summary, group_by):
+    table = StringIO()
+    table.write("".join("{:<30}".format(key[:29]) for key in group_by))
+    table.write("{:>8}{:>13}{:>16}{:>17}{:>10}{:>12}".format(
+        "runs", "target hits", "min best energy", "mean best energy", "steps/s", "runtime"))
+    for group in summary:
+        table.write("\n")
+        table.write("".join("{:<30}".format(_format_value(group["group_{}".format(i)])[:29])
+                            for i in range(len(group_by))))
+        table.write("{:>8,}{:>13,}{:>16}{:>17}{:>10}{:>12.1f}".format(
+            group["runs"], group["target_hits"], _format_value(group["min_best_energy"]),
+            _format_value(group["mean_best_energy"], "{:,.1f}"),
+            _format_value(group["mean_steps_per_second"], "{:,.1f}"), group["mean_runtime"]))
+    return table.getvalue()
+
+
+def _format_value(value, value_format="{:,}"):
+    if value is None:
+        return "-"
+    if isinstance(value, str):
+        return value
+    return value_format.format(value)
+
+
+@click.command()
+@click.option(
+    "-c", "--configuration", "config_folder_path", default=None,
+    help="Relative path to a configuration folder, whose results database to query"
+)
+@click.option(
+    "-d", "--database", "database_file", type=click.Path(dir_okay=False), default=None,
+    help="Results database to query, instead of the one of a configuration"
+)
+@click.option("-f", "--filter", "filters", multiple=True, help="key=value - only the runs whose key has the value")
+@click.option(
+    "-g", "--group-by", "group_by", multiple=True,
+    help="Summarize the runs in groups of the same value of the key, instead of listing them"
+)
+@click.option(
+    "-n", "--limit", "limit", type=click.IntRange(min=1), default=20, show_default=True,
+    help="Number of runs to list, best energy first"
+)
+def main(config_folder_path, database_file, filters, group_by, limit):
+    if (config_folder_path is None) == (database_file is None):
+        raise click.UsageError("Either --configuration or --database should be given")
+    if database_file is None:
+        OtmlConfiguration.load(config_folder_path)
+        database_file = get_results_database()
+    if not os.path.exists(database_file):
+        raise click.ClickException("There is no results database at {}".format(database_file))
+
+    results_store = ResultsStore(database_file)
+    try:
+        parsed_filters = parse_filters(filters)
+        if group_by:
+            print(get_summary_table(results_store.get_summary(group_by, parsed_filters), group_by))
+        else:
+            print(get_runs_table(results_store.get_runs(parsed_filters, limit)))
+    except ResultsError as error:
+        raise click.UsageError(str(error))
+    finally:
+        results_store.close()
+
+
+if __name__ == "__main__":
+    main()
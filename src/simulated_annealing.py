@@ -2,26 +2,60 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 import logging
+import gc
 import os
 import random
 import re
-import subprocess
+import sqlite3
+import sys
 import time
-from datetime import timedelta
-from math import exp
+from datetime import datetime, timedelta
+from math import exp, log
 from random import choice
 
+from src.cooling_schedules import get_cooling_schedule, get_number_of_geometric_steps
+from src.exceptions import CheckpointError
 from src.grammar.constraint import Constraint
 from src.grammar.constraint_set import ConstraintSet
 from src.grammar.grammar import Grammar
-from src.grammar.lexicon import Word
+from src.grammar.lexicon import Word, CompactLexicon
+from src.misc.checkpoint_tools import CheckpointWriter, load_checkpoint
+from src.misc.logger import LazyFormat
 from src.misc.mail import MailManager
-from src.otml_configuration import settings
+from src.misc.memory_tools import get_memory_usage, evict_least_recently_used
+from src.misc.metrics_tools import get_metrics_writer, to_json_number
+from src.misc.profiling_tools import profiled, get_profiling_summary
+from src.misc.results_tools import write_run_results, get_configuration_record
+from src.misc.status_tools import get_status_server
+from src.misc.trace_tools import get_trace_writer, NullTraceWriter, get_hash_seed, RANDOM_HASH_SEED
+from src.models.traversable_grammar_hypothesis import EnergyMemo
+from src.mutation_operators_statistics import MutationOperatorsStatistics, get_mutation_weights, \
+    publish_mutation_weights
+from src.otml_configuration import settings, get_configuration
 
 logger = logging.getLogger(__name__)
 
 process_id = os.getpid()
 
+# the fields of the configuration that a resumed run reads from the loaded configuration - the others are the ones the
+# run was started with
+RESUME_CONFIGURATION_FIELDS = ("config_folder", "config_file", "constraints_file", "features_file", "corpus_file",
+                               "output_folder", "logs_file", "checkpoint_file", "steps_limitation", "time_limitation",
+                               "profiling")
+
+# the module level caches that `clear_modules_caching` resets, by module name
+modules_caches_names = {
+    Grammar.__module__: ("outputs_by_constraint_set_and_word", "grammar_transducers"),
+    ConstraintSet.__module__: ("constraint_set_transducers",),
+    Constraint.__module__: ("constraint_transducers",),
+    Word.__module__: ("word_transducers", "compact_lexicon_words"),
+}
+
+# the resident memory after the last eviction of `enforce_memory_limit`, or None if the memory was under the limit
+# since. the memory that an eviction frees is mostly kept by the process for new objects, so evicting again is useless
+# until the caches outgrow it
+memory_usage_after_eviction = None
+
 
 class SimulatedAnnealing(object):
 
@@ -40,8 +74,11 @@ class SimulatedAnnealing(object):
         self.step = 0
         self.current_temperature = None
         self.threshold = None
-        self.cooling_parameter = None
+        self.cooling_schedule = None
+        self.mutation_operators_statistics = None
         self.current_hypothesis_energy = None
+        self.best_hypothesis = None
+        self.best_hypothesis_energy = None
         self.neighbor_hypothesis = None
         self.neighbor_hypothesis_energy = None
         self.step_limitation = None
@@ -49,6 +86,22 @@ class SimulatedAnnealing(object):
         self.start_time = None
         self.previous_interval_time = None
         self.previous_interval_energy = None
+        self.number_of_aborted_evaluations = 0
+        self.number_of_evaluations = 0
+        self.energy_memo = None
+        self.session_start_time = None  # the time limitation is counted from here
+        self.session_start_step = None
+        self.previous_interval_best_energy = None
+        self.number_of_plateau_intervals = 0
+        self.target_reached_step = None
+        self.number_of_cache_evictions = 0
+        self.metrics_writer = None
+        self.previous_interval_step = None
+        self.previous_interval_acceptances = None
+        self.seed = None
+        self.trace_writer = NullTraceWriter()
+        self.trace_offset = None  # the size of the trace at the restored checkpoint
+        self.stop_reason = None  # the stopping criterion that ended the run, other than the temperature and steps
         self.mail_manager = MailManager()
 
     def run(self):
@@ -56,39 +109,134 @@ class SimulatedAnnealing(object):
         staring simulated annealing
         """
         self.before_loop()
+        return self._anneal()
 
-        while (self.current_temperature > self.threshold) and (self.step != self.step_limitation):
-            self.make_step()
+    def resume(self, checkpoint_file):
+        """
+        continues the run saved in the checkpoint file, publishing the configuration the run was started with.
+        the fields of `RESUME_CONFIGURATION_FIELDS` are read from the loaded configuration, so the steps limitation
+        can be raised to extend a finished run.
+        PYTHONHASHSEED must be the one of the run, otherwise a CheckpointError is raised
+        """
+        checkpoint = load_checkpoint(checkpoint_file)
+        _check_hash_seed(checkpoint["hash_seed"], checkpoint_file)
+        _publish_checkpoint_configuration(checkpoint["configuration"])
+        self._restore_checkpoint(checkpoint)
+        return self._anneal()
+
+    def _anneal(self):
+        checkpoint_writer = CheckpointWriter(settings.checkpoint_file) if settings.checkpoint_interval else None
+        self.trace_writer = self._get_trace_writer()
+        try:
+            while (self.current_temperature > self.threshold) and (self.step != self.step_limitation) and \
+                    not self._should_stop():
+                self.make_step()
+                if checkpoint_writer and not self.step % settings.checkpoint_interval:
+                    checkpoint_writer.write(self.get_checkpoint())
+        finally:
+            if checkpoint_writer:
+                checkpoint_writer.close()
+            self.trace_writer.close()
+            self.trace_writer = NullTraceWriter()
 
         self._after_loop()
         return self.step, self.current_hypothesis
 
-    # @timeit
+    def _get_trace_writer(self):
+        """
+        a resumed run continues the trace of the checkpoint, so it is traced only if the checkpointed run was
+        """
+        if settings.write_trace and self.step and self.trace_offset is None:
+            logger.warning("The checkpoint has no trace, so the resumed run is not traced")
+            return NullTraceWriter()
+        return get_trace_writer(self.seed, self.trace_offset)
+
+    @profiled("step")
     def make_step(self):
         self.step += 1
-        self.current_temperature *= self.cooling_parameter
+        self.current_temperature = self.cooling_schedule.get_next_temperature(self.current_temperature)
 
         self._check_for_intervals()
 
+        start_cpu_time = time.process_time()
         mutation_result, neighbor_hypothesis = self.current_hypothesis.get_neighbor()
+        mutation_operator = neighbor_hypothesis.grammar.mutation_operator
+        mutation_target = neighbor_hypothesis.grammar.mutation_target
         if not mutation_result:
+            self.cooling_schedule.record_step(False)
+            self.mutation_operators_statistics.record(mutation_operator, False,
+                                                      cpu_time=time.process_time() - start_cpu_time)
+            self.trace_writer.write_step(mutation_operator, mutation_target, False)
             return  # mutation failed - the neighbor hypothesis is the same as current hypothesis
 
         self.neighbor_hypothesis = neighbor_hypothesis
-        self.neighbor_hypothesis_energy = self.neighbor_hypothesis.get_energy()
+        acceptance_random_number = random.random()  # drawn first, so that it bounds the acceptable energy
+        energy_budget = get_energy_budget(self.current_hypothesis_energy, self.current_temperature,
+                                          acceptance_random_number)
+        evaluation_start_time = time.perf_counter()
+        self.neighbor_hypothesis_energy = self._get_neighbor_energy(energy_budget)
+        evaluation_time = time.perf_counter() - evaluation_start_time
         delta = self.neighbor_hypothesis_energy - self.current_hypothesis_energy
 
-        if delta < 0:
-            p = 1
-        else:
-            p = exp(-delta / self.current_temperature)
-        if random.random() < p:
+        accepted = metropolis_criterion(delta, self.current_temperature, acceptance_random_number)
+        if accepted:
             # logger.info("switch")
             self.current_hypothesis = self.neighbor_hypothesis
             self.current_hypothesis_energy = self.neighbor_hypothesis_energy
+            self._update_best_hypothesis()
         else:
             pass
             # logger.info("no switch")
+        self.cooling_schedule.record_step(accepted)
+        improvement = -delta if accepted and delta < 0 else 0
+        self.mutation_operators_statistics.record(mutation_operator, True, accepted, improvement,
+                                                  time.process_time() - start_cpu_time)
+        self.trace_writer.write_step(mutation_operator, mutation_target, True, accepted, delta, evaluation_time)
+
+    def _get_neighbor_energy(self, energy_budget):
+        """
+        returns the energy of the neighbor hypothesis, skipping its evaluation if an equal hypothesis was evaluated
+        """
+        fingerprint = self.neighbor_hypothesis.get_fingerprint()
+        evaluation = self.energy_memo.get(fingerprint)
+        if evaluation is not None:
+            self.neighbor_hypothesis.set_evaluation(evaluation)
+            return self.neighbor_hypothesis.combined_energy
+
+        energy = self.neighbor_hypothesis.get_energy(energy_budget)
+        self.number_of_evaluations += 1
+        if energy > energy_budget:  # the evaluation was aborted, so its energy is not the hypothesis energy
+            self.number_of_aborted_evaluations += 1
+        else:
+            self.energy_memo.put(fingerprint, self.neighbor_hypothesis.get_evaluation())
+        return energy
+
+    def _should_stop(self):
+        """
+        checks the stopping criteria other than the threshold temperature and the steps limitation,
+        logging the one that was met
+        """
+        if time.time() - self.session_start_time >= settings.time_limitation:
+            self.stop_reason = "time_limitation"
+            reason = "Time limitation of {} reached".format(_pretty_runtime_str(settings.time_limitation))
+        elif self.number_of_evaluations >= settings.evaluations_limitation:
+            self.stop_reason = "evaluations_limitation"
+            reason = "Evaluations limitation of {:,} reached".format(settings.evaluations_limitation)
+        elif settings.stop_at_target_energy and self.target_energy is not None and \
+                self.best_hypothesis_energy <= self.target_energy:
+            self.stop_reason = "target_energy"
+            reason = "Target energy {:,} reached".format(self.target_energy)
+        elif settings.plateau_intervals and self.number_of_plateau_intervals >= settings.plateau_intervals:
+            self.stop_reason = "plateau"
+            reason = "No improvement of the best energy in {} intervals".format(self.number_of_plateau_intervals)
+        else:
+            return False
+        logger.info("Stopping at step {:,}: {}".format(self.step, reason))
+        return True
+
+    def _start_session(self):
+        self.session_start_time = time.time()
+        self.session_start_step = self.step
 
     def before_loop(self):
         self.start_time = time.time()
@@ -101,34 +249,233 @@ class SimulatedAnnealing(object):
             seed = settings.seed
             logger.info("Seed: {} - specified".format(seed))
         random.seed(seed)
+        self.seed = seed
         logger.info(settings)
-        logger.info(self.current_hypothesis.grammar.feature_table)
-        self.step_limitation = settings.steps_limitation
-        if self.step_limitation != float("inf"):
-            self.number_of_expected_steps = self.step_limitation
-        else:
-            self.number_of_expected_steps = self._calculate_num_of_steps()
-
-        logger.info("Number of expected steps is: {:,}".format(self.number_of_expected_steps))
+        logger.info("%s", LazyFormat(str, self.current_hypothesis.grammar.feature_table))
+        self.cooling_schedule = get_cooling_schedule()
+        self.mutation_operators_statistics = MutationOperatorsStatistics(settings.mutation_weighting.exploration)
+        self._set_number_of_expected_steps()
         self.current_hypothesis_energy = self.current_hypothesis.get_energy()
         if self.current_hypothesis_energy == float("INF"):
             raise ValueError("first hypothesis energy can not be INF")
 
+        self.best_hypothesis = self.current_hypothesis
+        self.best_hypothesis_energy = self.current_hypothesis_energy
+        self.energy_memo = EnergyMemo(settings.energy_memo_size)
+        self.energy_memo.put(self.current_hypothesis.get_fingerprint(), self.current_hypothesis.get_evaluation())
         self._log_hypothesis_state()
         self.previous_interval_energy = self.current_hypothesis_energy
+        self.previous_interval_best_energy = self.best_hypothesis_energy
         self.current_temperature = settings.initial_temp
         self.threshold = settings.threshold
-        self.cooling_parameter = settings.cooling_factor
+        self._start_session()
+        self._check_target_energy()
+        self.metrics_writer = get_metrics_writer()
+        self._start_metrics_interval()
+        self._publish_status(self.get_metrics(interval_time=0))
+
+    def _set_number_of_expected_steps(self):
+        self.step_limitation = settings.steps_limitation
+        if self.step_limitation != float("inf"):
+            self.number_of_expected_steps = self.step_limitation
+        else:
+            self.number_of_expected_steps = self.cooling_schedule.get_number_of_expected_steps()
+
+        logger.info("Number of expected steps is: {:,}".format(self.number_of_expected_steps))
+
+    def _update_best_hypothesis(self):
+        if self.current_hypothesis_energy < self.best_hypothesis_energy:
+            self.best_hypothesis = self.current_hypothesis
+            self.best_hypothesis_energy = self.current_hypothesis_energy
+            self._check_target_energy()
+
+    def _check_target_energy(self):
+        """
+        logs the step and time at which the best energy first reached the target energy
+        """
+        if self.target_energy is not None and self.target_reached_step is None and \
+                self.best_hypothesis_energy <= self.target_energy:
+            self.target_reached_step = self.step
+            logger.info("Target energy {:,} reached at step {:,} after {}".format(
+                self.target_energy, self.step, _pretty_runtime_str(time.time() - self.start_time)))
+
+    def get_checkpoint(self):
+        """
+        returns the state needed to continue the run from the current step.
+        the caches are not saved - only the words whose transducers are cached, to warm them up on resume
+        """
+        return {
+            "step": self.step,
+            "current_temperature": self.current_temperature,
+            "current_hypothesis": self.current_hypothesis,
+            "current_hypothesis_energy": self.current_hypothesis_energy,
+            "best_hypothesis": self.best_hypothesis,
+            "best_hypothesis_energy": self.best_hypothesis_energy,
+            "cooling_schedule": self.cooling_schedule,
+            "mutation_operators_statistics": self.mutation_operators_statistics,
+            "mutation_weights": get_mutation_weights(),
+            "previous_interval_energy": self.previous_interval_energy,
+            "previous_interval_best_energy": self.previous_interval_best_energy,
+            "number_of_plateau_intervals": self.number_of_plateau_intervals,
+            "number_of_evaluations": self.number_of_evaluations,
+            "target_reached_step": self.target_reached_step,
+            "elapsed_time": time.time() - self.start_time,
+            "random_state": random.getstate(),
+            "trace_offset": self.trace_writer.tell(),
+            "seed": self.seed,
+            "hash_seed": get_hash_seed(),
+            "configuration": get_configuration().model_dump(),
+            "warm_up_words": list(get_modules_caches()[(Word.__module__, "word_transducers")]),
+        }
+
+    def _restore_checkpoint(self, checkpoint):
+        current_time = time.time()
+        self.start_time = current_time - checkpoint["elapsed_time"]
+        self.previous_interval_time = current_time
+        logger.info("Process Id: {}".format(process_id))
+        logger.info("Resuming from step {:,}".format(checkpoint["step"]))
+        logger.info(settings)
+        self.cooling_schedule = checkpoint["cooling_schedule"]
+        self.mutation_operators_statistics = checkpoint["mutation_operators_statistics"]
+        publish_mutation_weights(checkpoint["mutation_weights"])
+        self._set_number_of_expected_steps()
+
+        self.step = checkpoint["step"]
+        self.current_temperature = checkpoint["current_temperature"]
+        self.current_hypothesis = checkpoint["current_hypothesis"]
+        self.current_hypothesis_energy = checkpoint["current_hypothesis_energy"]
+        self.best_hypothesis = checkpoint["best_hypothesis"]
+        self.best_hypothesis_energy = checkpoint["best_hypothesis_energy"]
+        self.previous_interval_energy = checkpoint["previous_interval_energy"]
+        self.previous_interval_best_energy = checkpoint["previous_interval_best_energy"]
+        self.number_of_plateau_intervals = checkpoint["number_of_plateau_intervals"]
+        self.number_of_evaluations = checkpoint["number_of_evaluations"]
+        self.target_reached_step = checkpoint["target_reached_step"]
+        self.threshold = settings.threshold
+        self.energy_memo = EnergyMemo(settings.energy_memo_size)
+
+        feature_table = self.current_hypothesis.grammar.feature_table
+        for word_string in checkpoint["warm_up_words"]:
+            Word(word_string, feature_table).get_transducer()
+        random.setstate(checkpoint["random_state"])
+        self.trace_offset = checkpoint["trace_offset"]
+        self.seed = checkpoint["seed"]
+        self._log_hypothesis_state()
+        self._start_session()
+        self.metrics_writer = get_metrics_writer(append=True)
+        self._start_metrics_interval()
         # logger.info("distinct_words: {}".format(self.current_hypothesis.grammar.lexicon.get_number_of_distinct_words()))
 
     def _check_for_intervals(self):
         if not self.step % settings.debug_logging_interval:
+            self._update_plateau()
+            if settings.time_limitation != float("inf"):
+                self._compress_schedule()
             self._debug_interval()
         if not self.step % settings.clear_modules_caching_interval:
             self.clear_modules_caching()
+        self._enforce_memory_limit()
+        if settings.mutation_weighting.adaptive and not self.step % settings.mutation_weighting.reweighting_interval:
+            self.mutation_operators_statistics.reweight()
+            self.trace_writer.write_weights(get_mutation_weights())
+
+    def _enforce_memory_limit(self):
+        memory_usage = enforce_memory_limit(self.energy_memo)
+        if memory_usage is not None:
+            self.number_of_cache_evictions += 1
+            logger.info("Memory usage of {:,.0f} MB is over the limit, evicted the least recently used cache entries "
+                        "- memory usage is now {:,.0f} MB".format(memory_usage, get_memory_usage()))
+
+    def _update_plateau(self):
+        if self.best_hypothesis_energy < self.previous_interval_best_energy:
+            self.number_of_plateau_intervals = 0
+        else:
+            self.number_of_plateau_intervals += 1
+        self.previous_interval_best_energy = self.best_hypothesis_energy
+
+    def _compress_schedule(self):
+        """
+        fits the rest of the schedule into the time left, estimating the time of a step by the steps made so far
+        """
+        session_time = time.time() - self.session_start_time
+        session_steps = self.step - self.session_start_step
+        if not session_steps:
+            return
+        remaining_time = max(settings.time_limitation - session_time, 0)
+        remaining_steps = int(remaining_time * session_steps / session_time)
+        self.cooling_schedule.compress(self.current_temperature, remaining_steps)
+        if self.step_limitation == float("inf"):
+            self.number_of_expected_steps = self.step + get_number_of_geometric_steps(
+                self.current_temperature, self.threshold, self.cooling_schedule.cooling_factor)
+
+    def _start_metrics_interval(self):
+        self.previous_interval_step = self.step
+        self.previous_interval_acceptances = self._get_number_of_acceptances()
+
+    def _get_number_of_acceptances(self):
+        """
+        returns the number of proposed neighbors and the number of accepted ones
+        """
+        operators = self.mutation_operators_statistics.operators.values()
+        return sum(operator.proposals for operator in operators), sum(operator.acceptances for operator in operators)
+
+    def get_metrics(self, interval_time):
+        """
+        returns a record of the run state and of its progress since the previous record
+        """
+        proposals, acceptances = self._get_number_of_acceptances()
+        previous_proposals, previous_acceptances = self.previous_interval_acceptances
+        interval_proposals = proposals - previous_proposals
+        interval_steps = self.step - self.previous_interval_step
+        return {
+            "step": self.step,
+            "time": time.time() - self.start_time,
+            "temperature": self.current_temperature,
+            "energy": {
+                "combined": to_json_number(self.current_hypothesis.combined_energy),
+                "grammar": to_json_number(self.current_hypothesis.grammar_energy),
+                "data": to_json_number(self.current_hypothesis.data_energy),
+            },
+            "best_energy": to_json_number(self.best_hypothesis_energy),
+            "acceptance_rate": (acceptances - previous_acceptances) / interval_proposals if interval_proposals
+            else None,
+            "steps_per_second": interval_steps / interval_time if interval_time else None,
+            "evaluations": self.number_of_evaluations,
+            "energy_memo": {"hits": self.energy_memo.hits, "misses": self.energy_memo.misses,
+                            "size": len(self.energy_memo)},
+            "caches": {cache_name: len(cache) for (_, cache_name), cache in get_modules_caches().items()},
+            "memory_usage": get_memory_usage(),
+            "constraint_set": str(self.current_hypothesis.grammar.constraint_set),
+        }
+
+    def _write_metrics(self, interval_time, **fields):
+        metrics = dict(self.get_metrics(interval_time), **fields)
+        self.metrics_writer.write(metrics)
+        self._publish_status(metrics)
+        self._start_metrics_interval()
+
+    def _publish_status(self, metrics):
+        """
+        publishes the metrics record with the best hypothesis to the status server, if the run status is served
+        """
+        status_server = get_status_server()
+        if status_server is None:
+            return
+        status_server.publish(dict(
+            metrics,
+            state="finished" if metrics.get("final") else "running",
+            process_id=process_id,
+            expected_steps=self.number_of_expected_steps,
+            best_hypothesis={
+                "energy": to_json_number(self.best_hypothesis_energy),
+                "constraint_set": str(self.best_hypothesis.grammar.constraint_set),
+                "number_of_words": len(self.best_hypothesis.grammar.lexicon),
+            },
+        ))
 
     def _debug_interval(self):
         current_time = time.time()
+        self._write_metrics(current_time - self.previous_interval_time)
         logger.info("\n" + "-" * 125)
         percentage_completed = 100 * float(self.step) / float(self.number_of_expected_steps)
         logger.info("Step {0:,} of {1:,} ({2:.2f}%)".format(self.step, self.number_of_expected_steps,
@@ -139,6 +486,15 @@ class SimulatedAnnealing(object):
         crude_expected_time = elapsed_time * (100 / percentage_completed)
         logger.info("Expected simulation time: {} ".format(_pretty_runtime_str(crude_expected_time)))
         logger.info("Current temperature: {}".format(self.current_temperature))
+        logger.info(self.cooling_schedule)
+        logger.info(self.mutation_operators_statistics)
+        if settings.time_limitation != float("inf"):
+            logger.info("Time left: {}".format(_pretty_runtime_str(
+                max(settings.time_limitation - (current_time - self.session_start_time), 0))))
+        if settings.plateau_intervals:
+            logger.info("Intervals without improvement: {} of {}".format(self.number_of_plateau_intervals,
+                                                                        settings.plateau_intervals))
+        logger.info("Energy evaluations: {:,}".format(self.number_of_evaluations))
         self._log_hypothesis_state()
         logger.info("Energy difference from last interval: {}".format(
             self.current_hypothesis_energy - self.previous_interval_energy))
@@ -148,7 +504,15 @@ class SimulatedAnnealing(object):
         logger.info(
             "Time to finish based on current interval: {}".format(self.by_interval_time(time_from_last_interval)))
         self.previous_interval_time = current_time
-        # logger.info("Memory usage: {} MB".format(self._get_memory_usage()))
+        logger.info("Evaluations aborted over the energy budget: {:,}".format(self.number_of_aborted_evaluations))
+        logger.info("Energy memo: {:,} hits, {:,} misses, {:,} evaluations".format(
+            self.energy_memo.hits, self.energy_memo.misses, len(self.energy_memo)))
+        if settings.profiling:
+            logger.info(get_profiling_summary())
+        memory_usage = get_memory_usage()
+        if memory_usage is not None:
+            logger.info("Memory usage: {:,.0f} MB ({:,} cache evictions)".format(memory_usage,
+                                                                              self.number_of_cache_evictions))
         # logger.info(debug_tools.get_statistics())
         # logger.info("distinct_words: {}".format(self.current_hypothesis.grammar.lexicon.get_number_of_distinct_words()))
 
@@ -160,18 +524,69 @@ class SimulatedAnnealing(object):
 
     def _after_loop(self):
         current_time = time.time()
+        self._write_metrics(current_time - self.previous_interval_time, final=True)
+        self.metrics_writer.close()
         logger.info("*" * 10 + " Final Hypothesis " + "*" * 10)
         self._log_hypothesis_state()
         logger.info("simulated annealing runtime was: {}".format(_pretty_runtime_str(current_time - self.start_time)))
+        logger.info(self.mutation_operators_statistics)
+        if settings.profiling:
+            logger.info(get_profiling_summary())
+        self._write_results(current_time)
+        if settings.mutation_weighting.adaptive:  # leaves the configuration as the run found it
+            publish_mutation_weights(self.mutation_operators_statistics.initial_weights)
+
+    def get_results(self, current_time):
+        """
+        returns the summary of the finished run, as a row of the results database
+        """
+        runtime = current_time - self.start_time
+        grammar = self.current_hypothesis.grammar
+        return {
+            "simulation_name": settings.simulation_name,
+            "search": type(self).__name__,
+            "started_at": datetime.fromtimestamp(self.start_time).isoformat(timespec="seconds"),
+            "logs_file": settings.logs_file,
+            "configuration": get_configuration_record(),
+            "seed": self.seed,
+            "outcome": self.stop_reason or ("threshold" if self.current_temperature <= self.threshold
+                                            else "steps_limitation"),
+            "steps": self.step,
+            "evaluations": self.number_of_evaluations,
+            "runtime": runtime,
+            "steps_per_second": self.step / runtime if runtime else None,
+            "final_energy": to_json_number(self.current_hypothesis_energy),
+            "best_energy": to_json_number(self.best_hypothesis_energy),
+            "target_energy": self.target_energy,
+            "target_reached_step": self.target_reached_step,
+            "constraint_set": str(grammar.constraint_set),
+            "lexicon": str(grammar.lexicon),
+        }
+
+    def _write_results(self, current_time):
+        """
+        the run is over, so a database that can not be written is reported without failing it
+        """
+        if not settings.results_database:
+            return
+        try:
+            write_run_results(self.get_results(current_time))
+        except sqlite3.Error as error:
+            logger.error("The results of the run were not written to the results database: {}".format(error))
 
     def _log_hypothesis_state(self):
-        logger.info("Grammar with: {}:".format(self.current_hypothesis.grammar.constraint_set))
+        """
+        the grammar, lexicon and parse are formatted lazily - the hypothesis does not change once it is current.
+        a hypothesis evaluated from the memo has no parse, so it is parsed here, on the thread that owns the caches
+        """
+        grammar = self.current_hypothesis.grammar
+        if logger.isEnabledFor(logging.INFO):
+            self.current_hypothesis.get_data_parse()
+        logger.info("Grammar with: %s:", LazyFormat(str, grammar.constraint_set))
         if settings.restriction_on_alphabet:
-            restricted_alphabet = self.current_hypothesis.grammar.lexicon.get_distinct_segments()
-            restricted_alphabet_list = [segment.symbol for segment in restricted_alphabet]
-            logger.info("Alphabet: {}".format(restricted_alphabet_list))
-        logger.info("{}".format(self.current_hypothesis.grammar.lexicon))
-        logger.info("Parse: {}".format(self.current_hypothesis.get_recent_data_parse()))
+            logger.info("Alphabet: %s", LazyFormat(_get_restricted_alphabet, grammar.lexicon))
+        logger.info("%s", LazyFormat(str, grammar.lexicon))
+        logger.info("Parse: %s", LazyFormat(self.current_hypothesis.get_recent_data_parse))
         logger.info(self.current_hypothesis.get_recent_energy_signature())
         if self.target_energy:
             energy_delta = self.current_hypothesis.combined_energy - self.target_energy
@@ -192,26 +607,16 @@ class SimulatedAnnealing(object):
 
     @staticmethod
     def _get_memory_usage():
-        p = subprocess.Popen("ps -o rss= -p {}".format(process_id), stdout=subprocess.PIPE, shell=True)
-        (output, err) = p.communicate()
-        return int((int(output) / 1024))  # memory usage in MB
+        return int(get_memory_usage())  # memory usage in MB
 
     @staticmethod
     def _calculate_num_of_steps():
-        step = 0
-        temp = settings.initial_temp
-        while temp > settings.threshold:
-            step += 1
-            temp *= settings.cooling_factor
-        return step
+        return get_cooling_schedule().get_number_of_expected_steps()
 
     def clear_modules_caching(self):
 
         if True:
-            Grammar.clear_caching()
-            ConstraintSet.clear_caching()
-            Constraint.clear_caching()
-            Word.clear_caching()
+            clear_modules_caching()
 
         diagnostics_flag = False
         if diagnostics_flag:
@@ -254,6 +659,116 @@ class SimulatedAnnealing(object):
             logger.info("Memory usage: {} MB".format(self._get_memory_usage()))
 
 
+def _get_restricted_alphabet(lexicon):
+    return [segment.symbol for segment in lexicon.get_distinct_segments()]
+
+
+def metropolis_criterion(delta, temperature, random_number=None):
+    """
+    returns whether a move that changes the energy by delta is accepted at the given temperature.
+    random_number - a number drawn from random.random() in advance, see `get_energy_budget`
+    """
+    if delta < 0:
+        p = 1
+    else:
+        p = exp(-delta / temperature)
+    if random_number is None:
+        random_number = random.random()
+    return random_number < p
+
+
+def get_energy_budget(energy, temperature, random_number):
+    """
+    returns the highest energy of a neighbor that the Metropolis criterion can accept with the given random number:
+    random_number < exp(-delta / temperature) <=> delta < -temperature * log(random_number)
+    """
+    if not random_number:
+        return float("inf")
+    return energy - temperature * log(random_number)
+
+
+def _check_hash_seed(hash_seed, checkpoint_file):
+    """
+    a checkpoint continues bit-for-bit only with the string hashes of its run - the hypotheses draw mutations from
+    sets, and transducers break ties between states by the order of sets, which both follow the hashes
+    """
+    if hash_seed == RANDOM_HASH_SEED:
+        logger.warning("The run was checkpointed with random string hashes, so the resumed run may differ from the "
+                       "uninterrupted one")
+    elif hash_seed != get_hash_seed():
+        raise CheckpointError("The run was checkpointed with another hash seed - resume it with PYTHONHASHSEED={}"
+                              .format(hash_seed), {"checkpoint_file": checkpoint_file})
+
+
+def _publish_checkpoint_configuration(checkpoint_configuration):
+    """
+    publishes the configuration of the checkpointed run, with the fields of `RESUME_CONFIGURATION_FIELDS` of the
+    loaded configuration
+    """
+    loaded_configuration = get_configuration().model_dump()
+    ignored_fields = [field for field, value in loaded_configuration.items()
+                      if field not in RESUME_CONFIGURATION_FIELDS and value != checkpoint_configuration[field]]
+    if ignored_fields:
+        logger.warning("The loaded configuration differs from the one the run was started with in {} - the run "
+                       "continues with the values it was started with".format(", ".join(ignored_fields)))
+    resumed_fields = {field: loaded_configuration[field] for field in RESUME_CONFIGURATION_FIELDS}
+    get_configuration().update(**dict(checkpoint_configuration, **resumed_fields)).publish()
+
+
+def clear_modules_caching():
+    global memory_usage_after_eviction
+    memory_usage_after_eviction = None
+    Grammar.clear_caching()
+    ConstraintSet.clear_caching()
+    Constraint.clear_caching()
+    Word.clear_caching()
+    CompactLexicon.clear_caching()
+
+
+def evict_modules_caches(fraction):
+    """
+    removes the given fraction of the least recently used entries of every module level cache
+    """
+    for cache in get_modules_caches().values():
+        evict_least_recently_used(cache, fraction)
+    gc.collect()  # transducers have reference cycles
+
+
+def enforce_memory_limit(energy_memo=None):
+    """
+    evicts cache entries, and evaluations of the energy memo if one is given, if the resident memory is over
+    `memory_limit` and grew since the last eviction (see `memory_usage_after_eviction`).
+    returns the memory usage before the eviction, or None if there was no eviction
+    """
+    global memory_usage_after_eviction
+    if settings.memory_limit == float("inf"):
+        return None
+    memory_usage = get_memory_usage()
+    if memory_usage is None or memory_usage <= settings.memory_limit:
+        memory_usage_after_eviction = None
+        return None
+    if memory_usage_after_eviction is not None and memory_usage <= memory_usage_after_eviction:
+        return None
+    if energy_memo is not None:
+        energy_memo.evict(settings.memory_eviction_fraction)
+    evict_modules_caches(settings.memory_eviction_fraction)
+    memory_usage_after_eviction = get_memory_usage()
+    return memory_usage
+
+
+def get_modules_caches():
+    """
+    returns the module level caches, e.g. to hand transducers that were already compiled to worker processes
+    """
+    return {(module_name, cache_name): getattr(sys.modules[module_name], cache_name)
+            for module_name, caches_names in modules_caches_names.items() for cache_name in caches_names}
+
+
+def set_modules_caches(modules_caches):
+    for (module_name, cache_name), cache in modules_caches.items():
+        setattr(sys.modules[module_name], cache_name, cache)
+
+
 def _pretty_runtime_str(run_time_in_seconds):
     time_delta = timedelta(seconds=run_time_in_seconds)
     timedelta_string = str(time_delta)
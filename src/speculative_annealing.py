@@ -0,0 +1,118 @@
+import logging
+import time
+
+from src.misc.parallel_tools import get_number_of_workers, get_worker_pool
+from src.otml_configuration import settings
+from src.simulated_annealing import SimulatedAnnealing, metropolis_criterion, clear_modules_caching, \
+    enforce_memory_limit
+
+logger = logging.getLogger(__name__)
+
+# the number of neighbors evaluated by this worker process, used to clear its caches periodically
+number_of_worker_evaluations = 0
+
+
+class SpeculativeAnnealing(SimulatedAnnealing):
+    """
+    Simulated annealing that draws `batch_size` neighbors of the current hypothesis at once and evaluates their
+    energies concurrently in a process pool.
+
+    The neighbors are then tested in order, each with the temperature of its own step, and the first accepted
+    neighbor becomes the current hypothesis. The neighbors after it are discarded, since they are neighbors of a
+    hypothesis that is no longer current. Rejected steps leave the current hypothesis unchanged, so this is the same
+    Markov chain as the one of sequential simulated annealing.
+    """
+
+    def __init__(self, traversable_hypothesis, target_lexicon_indicator_function=None, sample_target_lexicon=None,
+                 sample_target_outputs=None, target_energy=None):
+        super(SpeculativeAnnealing, self).__init__(traversable_hypothesis, target_lexicon_indicator_function,
+                                                   sample_target_lexicon, sample_target_outputs, target_energy)
+        self.number_of_discarded_evaluations = 0
+
+    def run(self):
+        """
+        staring speculative simulated annealing
+        """
+        self.before_loop()
+
+        batch_size = settings.speculative_annealing.batch_size
+        number_of_workers = get_number_of_workers(settings.speculative_annealing.number_of_workers, batch_size)
+        logger.info("Evaluating batches of {} neighbors on {} workers".format(batch_size, number_of_workers))
+        with get_worker_pool(number_of_workers) as pool:
+            while (self.current_temperature > self.threshold) and (self.step < self.number_of_expected_steps) and \
+                    not self._should_stop():
+                self.make_batch(pool)
+
+        self._after_loop()
+        return self.step, self.current_hypothesis
+
+    def make_batch(self, pool):
+        """
+        makes up to `batch_size` steps, stopping at the first accepted neighbor
+        """
+        batch_size = min(settings.speculative_annealing.batch_size, self.number_of_expected_steps - self.step)
+        neighbors = []
+        cpu_times = dict()  # neighbor hypothesis id -> the cpu time of its copy, mutation and evaluation
+        for _ in range(batch_size):
+            start_cpu_time = time.process_time()
+            mutation_result, neighbor_hypothesis = self.current_hypothesis.get_neighbor()
+            cpu_times[id(neighbor_hypothesis)] = time.process_time() - start_cpu_time
+            neighbors.append((mutation_result, neighbor_hypothesis))
+        mutated_neighbors = [neighbor_hypothesis for mutation_result, neighbor_hypothesis in neighbors
+                             if mutation_result]
+        evaluations = pool.map(_evaluate_neighbor, mutated_neighbors)
+        for neighbor_hypothesis, (evaluation, cpu_time) in zip(mutated_neighbors, evaluations):
+            neighbor_hypothesis.set_evaluation(evaluation)
+            cpu_times[id(neighbor_hypothesis)] += cpu_time
+        self.number_of_evaluations += len(mutated_neighbors)
+
+        number_of_used_evaluations = 0
+        for mutation_result, neighbor_hypothesis in neighbors:
+            self.step += 1
+            self.current_temperature = self.cooling_schedule.get_next_temperature(self.current_temperature)
+            self._check_for_intervals()
+            mutation_operator = neighbor_hypothesis.grammar.mutation_operator
+            cpu_time = cpu_times[id(neighbor_hypothesis)]
+
+            if not mutation_result:
+                self.cooling_schedule.record_step(False)
+                self.mutation_operators_statistics.record(mutation_operator, False, cpu_time=cpu_time)
+                continue  # mutation failed - the neighbor hypothesis is the same as current hypothesis
+
+            number_of_used_evaluations += 1
+            self.neighbor_hypothesis = neighbor_hypothesis
+            self.neighbor_hypothesis_energy = neighbor_hypothesis.combined_energy
+            delta = self.neighbor_hypothesis_energy - self.current_hypothesis_energy
+            accepted = metropolis_criterion(delta, self.current_temperature)
+            self.cooling_schedule.record_step(accepted)
+            improvement = -delta if accepted and delta < 0 else 0
+            self.mutation_operators_statistics.record(mutation_operator, True, accepted, improvement, cpu_time)
+            if accepted:
+                self.current_hypothesis = self.neighbor_hypothesis
+                self.current_hypothesis_energy = self.neighbor_hypothesis_energy
+                self._update_best_hypothesis()
+                break
+
+        self.number_of_discarded_evaluations += len(mutated_neighbors) - number_of_used_evaluations
+
+    def _debug_interval(self):
+        super(SpeculativeAnnealing, self)._debug_interval()
+        logger.info("Speculative evaluations: {:,} ({:,} discarded)".format(self.number_of_evaluations,
+                                                                            self.number_of_discarded_evaluations))
+
+
+def _evaluate_neighbor(hypothesis):
+    """
+    computes the energy of a neighbor - executed in the worker processes.
+    returns the computed fields rather than the hypothesis, which the main process already has,
+    and the cpu time of the evaluation
+    """
+    global number_of_worker_evaluations
+    number_of_worker_evaluations += 1
+    if not number_of_worker_evaluations % settings.clear_modules_caching_interval:
+        clear_modules_caching()
+    enforce_memory_limit()
+
+    start_cpu_time = time.process_time()
+    hypothesis.get_energy()
+    return hypothesis.get_evaluation(), time.process_time() - start_cpu_time
@@ -0,0 +1,138 @@
+"""
+Summarizes the trace of an annealing run (see src/misc/trace_tools.py), and rebuilds the hypothesis of any step of
+the run without evaluating energies. The working directory for activating this file should be "otml":
+
+    python -m src.trace_replay -c examples/french_deletion -s 2000
+
+The run is replayed from the initial hypothesis of the configuration and the random seed of the trace: the mutation
+of every step is drawn again, and kept if the traced step accepted it. So the configuration must be the one the run
+was started with, and PYTHONHASHSEED the one of the run. A replay that draws a different mutation than the traced
+one raises a TraceError.
+"""
+import logging
+import random
+from collections import Counter
+from io import StringIO
+from math import isinf
+
+import click
+
+from src.exceptions import TraceError
+from src.misc.trace_tools import read_trace, get_trace_file, get_hash_seed, get_traced_target, TraceWeights, \
+    STEP_RECORD
+from src.mutation_operators_statistics import MUTATION_OPERATORS, get_mutation_weights, publish_mutation_weights
+from src.otml import load_initial_hypothesis
+from src.otml_configuration import OtmlConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+def replay_trace(trace_file, step=None):
+    """
+    returns the last replayed step and the current hypothesis of the run after it.
+    step - the step to replay up to, or None for the last traced step
+    """
+    header, records = read_trace(trace_file)
+    if header.hash_seed is None:
+        logger.warning("The run was traced with random string hashes, so mutations that choose from sets may "
+                       "not replay")
+    elif header.hash_seed != get_hash_seed():
+        raise TraceError("The run was traced with another hash seed - replay it with PYTHONHASHSEED={}".format(
+            header.hash_seed), {"trace_file": trace_file})
+
+    hypothesis = load_initial_hypothesis()
+    initial_weights = get_mutation_weights()
+    random.seed(header.seed)
+    replayed_step = 0
+    try:
+        for record in records:
+            if step is not None and record.step > step:
+                break
+            if isinstance(record, TraceWeights):
+                publish_mutation_weights(record.weights)
+                continue
+            mutation_result, neighbor_hypothesis = hypothesis.get_neighbor()
+            grammar = neighbor_hypothesis.grammar
+            replayed_mutation = (grammar.mutation_operator, get_traced_target(grammar.mutation_target),
+                                 bool(mutation_result))
+            if replayed_mutation != (record.operator, record.target, record.mutation_result):
+                raise TraceError("The replay diverged from the trace", {"step": record.step,
+                                                                        "replayed_mutation": replayed_mutation})
+            if mutation_result:
+                random.random()  # the acceptance random number of the step
+                if record.accepted:
+                    hypothesis = neighbor_hypothesis
+            replayed_step = record.step
+    finally:
+        publish_mutation_weights(initial_weights)
+    return replayed_step, hypothesis
+
+
+def get_trace_summary(trace_file):
+    """
+    returns a table of the proposals, successes, acceptances and aborted evaluations of every mutation operator,
+    with the mean energy delta of its completed evaluations and the total time of its evaluations
+    """
+    _, records = read_trace(trace_file)
+    counts = {operator: Counter() for operator in MUTATION_OPERATORS}
+    number_of_steps = 0
+    number_of_reweightings = 0
+    for record in records:
+        if isinstance(record, TraceWeights):
+            number_of_reweightings += 1
+            continue
+        number_of_steps += 1
+        operator_counts = counts[record.operator]
+        operator_counts["proposals"] += 1
+        if record.mutation_result:
+            operator_counts["successes"] += 1
+            operator_counts["acceptances"] += record.accepted
+            operator_counts["evaluation_time"] += record.evaluation_time
+            if isinf(record.delta):  # the evaluation was aborted by the energy budget
+                operator_counts["aborted"] += 1
+            else:
+                operator_counts["delta"] += record.delta
+
+    summary = StringIO()
+    summary.write("{:,} steps, {:,} re-weightings, {} bytes a step\n".format(number_of_steps, number_of_reweightings,
+                                                                             STEP_RECORD.size))
+    summary.write("{:<46}{:>11}{:>11}{:>13}{:>9}{:>12}{:>16}".format(
+        "operator", "proposals", "successes", "acceptances", "aborted", "mean delta", "evaluation sec"))
+    for operator, operator_counts in counts.items():
+        if not operator_counts["proposals"]:
+            continue
+        number_of_completed_evaluations = operator_counts["successes"] - operator_counts["aborted"]
+        summary.write("\n{:<46}{:>11,}{:>11,}{:>13,}{:>9,}{:>12,.1f}{:>16.2f}".format(
+            operator, operator_counts["proposals"], operator_counts["successes"], operator_counts["acceptances"],
+            operator_counts["aborted"],
+            operator_counts["delta"] / number_of_completed_evaluations if number_of_completed_evaluations else 0,
+            operator_counts["evaluation_time"]))
+    return summary.getvalue()
+
+
+@click.command()
+@click.option(
+    "-c", "--configuration", "config_folder_path", required=True,
+    help="Relative path to the configuration folder the run was started with"
+)
+@click.option(
+    "-t", "--trace", "trace_file", type=click.Path(exists=True, dir_okay=False), default=None,
+    help="Trace file. Default - the trace next to the logs file of the configuration"
+)
+@click.option(
+    "-s", "--step", "step", type=click.IntRange(min=0), default=None,
+    help="Step whose hypothesis to rebuild. Default - only summarize the trace"
+)
+def main(config_folder_path, trace_file, step):
+    OtmlConfiguration.load(config_folder_path)
+    trace_file = trace_file or get_trace_file()
+    print(get_trace_summary(trace_file))
+    if step is not None:
+        replayed_step, hypothesis = replay_trace(trace_file, step)
+        print("\nHypothesis after step {:,}:".format(replayed_step))
+        print("Constraint set: {}".format(hypothesis.grammar.constraint_set))
+        print(hypothesis.grammar.lexicon)
+
+
+if __name__ == "__main__":
+    main()
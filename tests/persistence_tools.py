@@ -1,6 +1,9 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import json
 import pickle
+import shutil
+import tempfile
 from os import listdir, remove
 from os.path import split, abspath, join
 
@@ -8,6 +11,7 @@ from six import PY3, StringIO
 
 from src.grammar.feature_table import FeatureTable
 from src.models.corpus import Corpus
+from src.otml_configuration import OtmlConfiguration, settings
 
 tests_dir_path, filename = split(abspath(__file__))
 
@@ -61,6 +65,66 @@ corpora_dir_path = join(fixtures_dir_path, "corpora")
 feature_table_dir_path = join(fixtures_dir_path, "feature_table")
 
 
+examples_dir_path = join(tests_dir_path, "..", "examples")
+
+# the temporary folders of the loaded examples, removed when the tests exit - a test may read the outputs of an
+# example it loaded before the current one
+example_folders = []
+
+
+def get_temporary_folder(test_case):
+    """ returns a temporary folder that is removed when the test ends """
+    temporary_folder = tempfile.TemporaryDirectory()
+    test_case.addCleanup(temporary_folder.cleanup)
+    return temporary_folder.name
+
+
+def load_example_configuration(example_name="french_deletion", **updates):
+    """ loads the configuration of an example simulation, overriding the given fields.
+        the example is copied to a temporary folder, so that its output folder is not created in the repository
+    """
+    example_folder = tempfile.TemporaryDirectory()
+    example_folders.append(example_folder)
+    configuration_folder = join(example_folder.name, example_name)
+    shutil.copytree(join(examples_dir_path, example_name), configuration_folder)
+    config_file = join(configuration_folder, "config.json")
+    with open(config_file) as f:
+        config_dict = json.load(f)
+    config_dict.update(updates)
+    with open(config_file, "w") as f:
+        json.dump(config_dict, f)
+    OtmlConfiguration.load(configuration_folder)
+    return settings
+
+
+def get_hypothesis_by_settings():
+    """ builds the initial hypothesis of the simulation described by the loaded configuration """
+    from src.grammar.constraint_set import ConstraintSet
+    from src.grammar.grammar import Grammar
+    from src.grammar.lexicon import Lexicon
+    from src.models.traversable_grammar_hypothesis import TraversableGrammarHypothesis
+
+    feature_table = FeatureTable.load(settings.features_file)
+    corpus = Corpus.load(settings.corpus_file)
+    constraint_set = ConstraintSet.load(settings.constraints_file, feature_table)
+    lexicon = Lexicon(corpus.get_words(), feature_table)
+    return TraversableGrammarHypothesis(Grammar(feature_table, constraint_set, lexicon), corpus.get_words())
+
+
+def run_example_annealing(target_energy=None, **updates):
+    """ runs simulated annealing from seed 3 on the french deletion example, overriding the given fields,
+        and returns the finished run
+    """
+    from src.otml import load_initial_hypothesis
+    from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+
+    load_example_configuration(**dict(dict(random_seed=False, seed=3), **updates))
+    clear_modules_caching()
+    simulated_annealing = SimulatedAnnealing(load_initial_hypothesis(), target_energy=target_energy)
+    simulated_annealing.run()
+    return simulated_annealing
+
+
 def get_constraint_set_fixture(constraint_set_file_name):
     return join(constraint_sets_dir_path, constraint_set_file_name)
 
@@ -0,0 +1,61 @@
+import json
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from src.benchmarks.bench import run_benchmarks, get_results_summary, main
+from src.benchmarks.workloads import WORKLOADS, load_workload_configuration
+from src.misc.memory_tools import get_memory_usage
+from src.otml import load_initial_hypothesis
+from src.otml_configuration import settings
+from src.simulated_annealing import clear_modules_caching
+from tests.persistence_tools import get_temporary_folder
+
+
+class TestWorkloads(unittest.TestCase):
+    def test_workloads_configurations(self):
+        for workload in WORKLOADS.values():
+            load_workload_configuration(workload, seed=7)
+            self.assertEqual(settings.simulation_name, workload.name)
+            self.assertEqual(settings.seed, 7)
+            for file_path in (settings.features_file, settings.corpus_file, settings.constraints_file):
+                self.assertTrue(os.path.isfile(file_path))
+
+    def test_french_deletion_energy(self):
+        load_workload_configuration(WORKLOADS["french_deletion"])
+        clear_modules_caching()
+        self.assertEqual(settings.corpus_duplication_factor, 50)
+        self.assertEqual(load_initial_hypothesis().get_energy(), 25897)
+
+
+class TestBench(unittest.TestCase):
+    def test_run_benchmarks(self):
+        results = run_benchmarks(["french_deletion"], ["python"], steps=20, repeats=2)
+        runs = results["runs"]
+        self.assertEqual([(run["workload"], run["engine"], run["repeat"]) for run in runs],
+                         [("french_deletion", "python", 0), ("french_deletion", "python", 1)])
+        for run in runs:
+            self.assertEqual(run["steps"], 20)
+            self.assertEqual(run["phases"]["step"]["count"], 20)
+            self.assertGreater(run["steps_per_second"], 0)
+            self.assertGreater(run["peak_memory_usage"], 0)
+            self.assertIn("energy_memo", run["caches_hit_rates"])
+            self.assertIn("grammar_transducers", run["caches_hit_rates"])
+        self.assertEqual(runs[0]["final_energy"], runs[1]["final_energy"])  # fixed seed
+        self.assertIn("french_deletion", get_results_summary(results))
+
+    def test_peak_memory_usage_is_the_run_own(self):
+        large_buffer = bytearray(256 * 2 ** 20)
+        large_buffer[::4096] = b"x" * len(large_buffer[::4096])  # touch every page, so it is resident
+        run = run_benchmarks(["french_deletion"], ["python"], steps=5)["runs"][0]
+        self.assertLess(run["peak_memory_usage"], get_memory_usage() - 128)
+
+    def test_command_line(self):
+        output_file = os.path.join(get_temporary_folder(self), "bench_results.json")
+        result = CliRunner().invoke(main, ["-w", "french_deletion", "-s", "5", "-o", output_file])
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(output_file) as f:
+            results = json.load(f)
+        self.assertEqual(len(results["runs"]), 1)
+        self.assertEqual(results["runs"][0]["steps"], 5)
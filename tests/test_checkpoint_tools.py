@@ -0,0 +1,106 @@
+import json
+import os
+import pickle
+import subprocess
+import sys
+import unittest
+
+from src.exceptions import CheckpointError
+from src.misc.checkpoint_tools import CheckpointWriter, load_checkpoint, CHECKPOINT_VERSION
+from src.otml_configuration import get_configuration, settings
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+from tests.persistence_tools import get_hypothesis_by_settings, get_temporary_folder, run_example_annealing, \
+    load_example_configuration, tests_dir_path
+
+
+class TestCheckpointTools(unittest.TestCase):
+    def setUp(self):
+        self.checkpoint_file = os.path.join(get_temporary_folder(self), "checkpoint.pkl")
+
+    def test_write_and_load(self):
+        checkpoint_writer = CheckpointWriter(self.checkpoint_file)
+        checkpoint_writer.write({"step": 10})
+        checkpoint_writer.write({"step": 20})
+        checkpoint_writer.close()
+        self.assertEqual(load_checkpoint(self.checkpoint_file)["step"], 20)
+        self.assertFalse(os.path.exists(self.checkpoint_file + ".tmp"))
+
+    def test_load_unsupported_checkpoint(self):
+        with open(self.checkpoint_file, "wb") as f:
+            pickle.dump({"step": 10}, f)
+        with self.assertRaises(CheckpointError):
+            load_checkpoint(self.checkpoint_file)
+        with open(self.checkpoint_file, "wb") as f:
+            pickle.dump({"step": 10, "version": CHECKPOINT_VERSION - 1}, f)
+        with self.assertRaises(CheckpointError):
+            load_checkpoint(self.checkpoint_file)
+
+
+class TestResume(unittest.TestCase):
+    def test_resume_continues_the_run(self):
+        finished_annealing = run_example_annealing(steps_limitation=40, debug_logging_interval=10,
+                                                   clear_modules_caching_interval=10, checkpoint_interval=10)
+        step, hypothesis = finished_annealing.step, finished_annealing.current_hypothesis
+
+        get_configuration().update(steps_limitation=20).publish()
+        clear_modules_caching()
+        SimulatedAnnealing(get_hypothesis_by_settings()).run()
+        checkpoint = load_checkpoint(settings.checkpoint_file)
+        self.assertEqual(checkpoint["step"], 20)
+
+        threshold = settings.threshold
+        # the threshold would end the resumed run at once, but the run continues with the threshold it started with
+        get_configuration().update(steps_limitation=40, threshold=10 ** 9).publish()
+        clear_modules_caching()
+        simulated_annealing = SimulatedAnnealing(get_hypothesis_by_settings())
+        resumed_step, resumed_hypothesis = simulated_annealing.resume(settings.checkpoint_file)
+        self.assertEqual((settings.threshold, settings.steps_limitation), (threshold, 40))
+        self.assertEqual(resumed_step, step)
+        self.assertEqual(resumed_hypothesis.combined_energy, hypothesis.combined_energy)
+        self.assertEqual(str(resumed_hypothesis.grammar.constraint_set), str(hypothesis.grammar.constraint_set))
+        self.assertEqual(str(resumed_hypothesis.grammar.lexicon), str(hypothesis.grammar.lexicon))
+        self.assertLessEqual(simulated_annealing.best_hypothesis_energy, checkpoint["best_hypothesis_energy"])
+
+
+class TestResumeInFreshProcess(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=40, debug_logging_interval=10,
+                                   clear_modules_caching_interval=10, checkpoint_interval=20)
+        self.config_folder = settings.config_folder
+        self.checkpoint_file = settings.checkpoint_file
+
+    def _run_otml(self, hash_seed, steps_limitation, *arguments):
+        config_file = os.path.join(self.config_folder, "config.json")
+        with open(config_file) as f:
+            config_dict = json.load(f)
+        config_dict["steps_limitation"] = steps_limitation
+        with open(config_file, "w") as f:
+            json.dump(config_dict, f)
+        return subprocess.run([sys.executable, "-m", "src.otml", "-c", self.config_folder] + list(arguments),
+                              cwd=os.path.dirname(tests_dir_path), env=dict(os.environ, PYTHONHASHSEED=str(hash_seed)),
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    def test_resume_continues_the_run_bit_for_bit(self):
+        result = self._run_otml(7, 40)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        finished_checkpoint = load_checkpoint(self.checkpoint_file)
+
+        result = self._run_otml(7, 20)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(load_checkpoint(self.checkpoint_file)["step"], 20)
+        interrupted_checkpoint_file = os.path.join(get_temporary_folder(self), "checkpoint.pkl")
+        os.replace(self.checkpoint_file, interrupted_checkpoint_file)
+
+        result = self._run_otml(8, 40, "--resume", interrupted_checkpoint_file)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("PYTHONHASHSEED=7", result.stderr)
+
+        result = self._run_otml(7, 40, "--resume", interrupted_checkpoint_file)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        resumed_checkpoint = load_checkpoint(self.checkpoint_file)
+        self.assertEqual(resumed_checkpoint["step"], 40)
+        for key in ("current_hypothesis", "best_hypothesis"):
+            resumed_grammar, finished_grammar = resumed_checkpoint[key].grammar, finished_checkpoint[key].grammar
+            self.assertEqual(str(resumed_grammar.constraint_set), str(finished_grammar.constraint_set))
+            self.assertEqual(str(resumed_grammar.lexicon), str(finished_grammar.lexicon))
+        self.assertEqual(resumed_checkpoint["random_state"], finished_checkpoint["random_state"])
@@ -0,0 +1,133 @@
+import unittest
+
+from src.cooling_schedules import GeometricSchedule, AdaptiveSchedule, ReheatingSchedule, \
+    get_number_of_geometric_steps, get_cooling_schedule
+from tests.persistence_tools import load_example_configuration, run_example_annealing
+
+
+def count_geometric_steps(initial_temp, threshold, cooling_factor):
+    step = 0
+    temp = initial_temp
+    while temp > threshold:
+        step += 1
+        temp *= cooling_factor
+    return step
+
+
+class TestCoolingSchedules(unittest.TestCase):
+    def test_number_of_geometric_steps(self):
+        self.assertEqual(get_number_of_geometric_steps(100, 0.01, 0.999), 9206)
+        for initial_temp, threshold, cooling_factor in [(100, 0.01, 0.9995), (50, 1, 0.99), (10, 0.1, 0.5),
+                                                        (1, 1, 0.9), (1, 10, 0.9)]:
+            self.assertEqual(get_number_of_geometric_steps(initial_temp, threshold, cooling_factor),
+                             count_geometric_steps(initial_temp, threshold, cooling_factor))
+
+    def test_geometric_schedule(self):
+        schedule = GeometricSchedule(100, 0.01, 0.999)
+        temperature = 100
+        for _ in range(schedule.get_number_of_expected_steps()):
+            temperature = schedule.get_next_temperature(temperature)
+            schedule.record_step(False)
+        self.assertLessEqual(temperature, 0.01)
+
+    def test_adaptive_schedule(self):
+        schedule = AdaptiveSchedule(100, 0.01, 0.999, acceptance_window=10, min_acceptance_rate=0.1,
+                                    max_acceptance_rate=0.9, fast_cooling_factor=0.9)
+        self.assertIsNone(schedule.get_acceptance_rate())
+        self.assertEqual(schedule.get_next_temperature(1), 0.999)
+
+        for _ in range(10):
+            schedule.record_step(True)
+        self.assertEqual(schedule.get_acceptance_rate(), 1)
+        self.assertEqual(schedule.get_next_temperature(1), 0.9)
+
+        for _ in range(5):
+            schedule.record_step(False)
+        self.assertEqual(schedule.get_acceptance_rate(), 0.5)
+        self.assertEqual(schedule.get_next_temperature(1), 0.999)
+
+        for _ in range(10):
+            schedule.record_step(False)
+        self.assertEqual(schedule.get_acceptance_rate(), 0)
+        self.assertEqual(schedule.get_next_temperature(1), 0.9)
+
+    def test_reheating_schedule(self):
+        schedule = ReheatingSchedule(100, 0.01, 0.999, stuck_steps=3, reheat_factor=10, max_reheats=2)
+        for _ in range(2):
+            schedule.record_step(False)
+        schedule.record_step(True)
+        schedule.record_step(False)
+        self.assertEqual(schedule.get_next_temperature(1), 0.999)
+
+        for _ in range(2):
+            schedule.record_step(False)
+        self.assertEqual(schedule.get_next_temperature(1), 10)
+        self.assertEqual(schedule.number_of_reheats, 1)
+        self.assertEqual(schedule.get_next_temperature(1), 0.999)
+
+        for _ in range(6):
+            schedule.record_step(False)
+        self.assertEqual(schedule.get_next_temperature(1), 10)
+        for _ in range(6):
+            schedule.record_step(False)
+        self.assertEqual(schedule.get_next_temperature(1), 0.999)  # no reheats left
+
+    def test_reheating_expected_steps(self):
+        schedule = ReheatingSchedule(100, 0.01, 0.99, stuck_steps=5, reheat_factor=10, max_reheats=3)
+        temperature = 100
+        for _ in range(schedule.get_number_of_expected_steps()):
+            temperature = schedule.get_next_temperature(temperature)
+            schedule.record_step(False)
+        self.assertEqual(schedule.number_of_reheats, 3)
+        self.assertLessEqual(temperature, 0.01)
+
+    def test_get_cooling_schedule(self):
+        load_example_configuration()
+        self.assertIsInstance(get_cooling_schedule(), GeometricSchedule)
+        load_example_configuration(cooling_schedule={"type": "reheating", "max_reheats": 1})
+        schedule = get_cooling_schedule()
+        self.assertIsInstance(schedule, ReheatingSchedule)
+        self.assertEqual(schedule.max_reheats, 1)
+
+
+class TestAnnealingWithCoolingSchedules(unittest.TestCase):
+    def _run(self, cooling_schedule):
+        simulated_annealing = run_example_annealing(initial_temp=10, threshold=1, cooling_factor=0.99,
+                                                    steps_limitation=float("inf"), debug_logging_interval=50,
+                                                    cooling_schedule=cooling_schedule)
+        return simulated_annealing, simulated_annealing.step
+
+    def test_adaptive_schedule_cools_faster(self):
+        geometric_annealing, geometric_steps = self._run({"type": "geometric"})
+        adaptive_annealing, adaptive_steps = self._run({"type": "adaptive", "acceptance_window": 10,
+                                                        "min_acceptance_rate": 0.5, "max_acceptance_rate": 1,
+                                                        "fast_cooling_factor": 0.9})
+        self.assertEqual(geometric_steps, geometric_annealing.number_of_expected_steps)
+        self.assertLess(adaptive_steps, geometric_steps)
+
+    def test_reheating_schedule_reheats(self):
+        simulated_annealing, steps = self._run({"type": "reheating", "stuck_steps": 10, "reheat_factor": 2,
+                                                "max_reheats": 2})
+        self.assertEqual(simulated_annealing.cooling_schedule.number_of_reheats, 2)
+        self.assertLessEqual(steps, simulated_annealing.number_of_expected_steps)
+
+
+class TestScheduleCompression(unittest.TestCase):
+    def test_compress(self):
+        schedule = GeometricSchedule(100, 0.01, 0.999)
+        schedule.compress(10, 100)
+        self.assertAlmostEqual(schedule.cooling_factor, 0.001 ** (1 / 100))
+        self.assertEqual(get_number_of_geometric_steps(10, 0.01, schedule.cooling_factor), 100)
+
+        schedule.compress(10, 100000)  # there is enough time for the configured schedule
+        self.assertEqual(schedule.cooling_factor, 0.999)
+
+        schedule.compress(10, 0)
+        self.assertLessEqual(schedule.get_next_temperature(10), 0.01)
+
+    def test_compress_stops_reheating(self):
+        schedule = ReheatingSchedule(100, 0.01, 0.999, stuck_steps=1, reheat_factor=10, max_reheats=3)
+        schedule.record_step(False)
+        schedule.compress(10, 100)
+        self.assertEqual(schedule.max_reheats, 0)
+        self.assertAlmostEqual(schedule.get_next_temperature(1), schedule.cooling_factor)
@@ -0,0 +1,67 @@
+import random
+import unittest
+from unittest import mock
+
+from src.grammar.constraint_set import ConstraintSet
+from src.grammar.grammar import Grammar
+from src.grammar.lexicon import Lexicon
+from src.models.traversable_grammar_hypothesis import TraversableGrammarHypothesis
+from src.otml_configuration import settings
+from src.simulated_annealing import get_energy_budget, metropolis_criterion, clear_modules_caching
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings, \
+    get_feature_table_by_fixture, get_constraint_set_fixture, get_corpus_by_fixture
+
+
+def get_target_hypothesis():
+    """ returns the french deletion target hypothesis - three of its five lexicon words have two outputs """
+    feature_table = get_feature_table_by_fixture("french_deletion_feature_table.json")
+    constraint_set = ConstraintSet.load(get_constraint_set_fixture("french_deletion_target_constraint_set.json"),
+                                        feature_table)
+    lexicon = Lexicon(get_corpus_by_fixture("french_deletion_target_lexicon.txt").get_words(), feature_table)
+    data = get_corpus_by_fixture("french_deletion_corpus.txt").get_words()
+    return TraversableGrammarHypothesis(Grammar(feature_table, constraint_set, lexicon), data)
+
+
+class TestEnergyBudget(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration()
+        clear_modules_caching()
+
+    def test_get_energy_budget(self):
+        self.assertEqual(get_energy_budget(100, 10, 0), float("inf"))
+        self.assertEqual(get_energy_budget(100, 10, 1), 100)
+
+        random.seed(1)
+        for _ in range(100):
+            random_number = random.random()
+            budget = get_energy_budget(100, 10, random_number)
+            self.assertTrue(metropolis_criterion(int(budget) - 100, 10, random_number))
+            self.assertFalse(metropolis_criterion(int(budget) + 1 - 100, 10, random_number))
+
+    def test_get_energy_with_budget(self):
+        energy = get_hypothesis_by_settings().get_energy()
+        self.assertEqual(get_hypothesis_by_settings().get_energy(energy), energy)
+        self.assertEqual(get_hypothesis_by_settings().get_energy(energy - 1), float("inf"))
+
+    def test_get_energy_aborts_before_parsing(self):
+        hypothesis = get_hypothesis_by_settings()
+        self.assertEqual(hypothesis.get_energy(hypothesis.grammar.get_encoding_length()), float("inf"))
+        self.assertIsNone(hypothesis.data_parse)
+
+    def test_get_energy_aborts_while_generating(self):
+        hypothesis = get_target_hypothesis()
+        energy = hypothesis.get_energy()
+        # every data word costs at least the 3 bits of choosing one of the 5 inputs
+        minimal_data_energy = len(hypothesis.data) * 3 * settings.data_encoding_length_multiplier
+        self.assertGreater(hypothesis.data_energy, minimal_data_energy)
+
+        energy_budget = hypothesis.grammar_energy + minimal_data_energy + settings.data_encoding_length_multiplier / 2
+        clear_modules_caching()
+        with mock.patch.object(Grammar, "generate", autospec=True, side_effect=Grammar.generate) as generate:
+            self.assertEqual(get_target_hypothesis().get_energy(energy_budget), float("inf"))
+        self.assertLess(generate.call_count, len(hypothesis.grammar.lexicon.get_words()))
+
+        clear_modules_caching()
+        with mock.patch.object(Grammar, "generate", autospec=True, side_effect=Grammar.generate) as generate:
+            self.assertEqual(get_target_hypothesis().get_energy(energy), energy)
+        self.assertEqual(generate.call_count, len(hypothesis.grammar.lexicon.get_words()))
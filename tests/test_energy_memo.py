@@ -0,0 +1,59 @@
+import unittest
+
+from src.models.traversable_grammar_hypothesis import EnergyMemo
+from src.simulated_annealing import clear_modules_caching
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+class TestEnergyMemo(unittest.TestCase):
+    def test_least_recently_used_evaluation_is_dropped(self):
+        energy_memo = EnergyMemo(2)
+        energy_memo.put("a", 1)
+        energy_memo.put("b", 2)
+        self.assertEqual(energy_memo.get("a"), 1)
+        energy_memo.put("c", 3)
+        self.assertIsNone(energy_memo.get("b"))
+        self.assertEqual(energy_memo.get("a"), 1)
+        self.assertEqual(energy_memo.get("c"), 3)
+        self.assertEqual((energy_memo.hits, energy_memo.misses), (3, 1))
+
+    def test_evict(self):
+        energy_memo = EnergyMemo(4)
+        for fingerprint in "abcd":
+            energy_memo.put(fingerprint, 1)
+        energy_memo.get("a")
+        energy_memo.evict(0.5)
+        self.assertEqual(list(energy_memo.evaluations), ["d", "a"])
+
+    def test_empty_memo(self):
+        energy_memo = EnergyMemo(0)
+        energy_memo.put("a", 1)
+        self.assertIsNone(energy_memo.get("a"))
+        self.assertEqual(len(energy_memo), 0)
+
+
+class TestHypothesisFingerprint(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration(constraint_set_mutation_weights={
+            "insert_constraint": 0, "remove_constraint": 0, "demote_constraint": 1,
+            "insert_feature_bundle_phonotactic_constraint": 0, "remove_feature_bundle_phonotactic_constraint": 0,
+            "augment_feature_bundle": 0})
+        clear_modules_caching()
+
+    def test_fingerprint(self):
+        hypothesis = get_hypothesis_by_settings()
+        self.assertEqual(hypothesis.get_fingerprint(), get_hypothesis_by_settings().get_fingerprint())
+
+        self.assertTrue(hypothesis.grammar.constraint_set.make_mutation())  # demotes a constraint
+        demoted_fingerprint = hypothesis.get_fingerprint()
+        self.assertNotEqual(demoted_fingerprint, get_hypothesis_by_settings().get_fingerprint())
+        self.assertEqual(demoted_fingerprint[0], str(hypothesis.grammar.constraint_set))
+
+    def test_evaluation_of_equal_hypothesis(self):
+        hypothesis = get_hypothesis_by_settings()
+        hypothesis.get_energy()
+        equal_hypothesis = get_hypothesis_by_settings()
+        equal_hypothesis.set_evaluation(hypothesis.get_evaluation())
+        self.assertEqual(equal_hypothesis.get_recent_energy_signature(), hypothesis.get_recent_energy_signature())
+        self.assertIsNone(equal_hypothesis.data_parse)  # the memo keeps the energies only
+        self.assertEqual(equal_hypothesis.get_recent_data_parse(), hypothesis.get_recent_data_parse())
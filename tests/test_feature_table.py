@@ -1,8 +1,11 @@
 # Python2 and Python 3 compatibility:
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import pickle
+
 from src.grammar.feature_bundle import FeatureBundle
-from src.grammar.feature_table import FeatureTable, FeatureParseError, Segment, FeatureType
+from src.grammar.feature_table import FeatureTable, FeatureParseError, Segment, FeatureType, NULL_SEGMENT
+from src.grammar.lexicon import Word
 from tests.persistence_tools import get_feature_table_fixture, get_feature_table_by_fixture
 from tests.stochastic_testcase import StochasticTestCase
 
@@ -49,12 +52,38 @@ class TestFeatureTable(StochasticTestCase):
         feature_table = self.correct_set_filename = get_feature_table_by_fixture("a_b_and_son_feature_table.csv")
         self.assertEqual(feature_table['a', "cons"], '-')
 
+    def test_get_natural_class(self):
+        a, b, c, d = [1 << self.feature_table.get_segment_index(symbol) for symbol in "abcd"]
+        self.assertEqual(self.feature_table.get_natural_class({'syll': '+'}), a | c)
+        self.assertEqual(self.feature_table.get_natural_class({'son': '+'}), c | d)
+        self.assertEqual(self.feature_table.get_natural_class({'syll': '+', 'son': '+'}), c)
+        self.assertEqual(self.feature_table.get_natural_class({}), a | b | c | d)
+        self.assertEqual(self.feature_table.get_natural_class({'son': '?'}), 0)
+
     # segment tests:
     def test_segment(self):
         segment = Segment('a', self.feature_table)
         self.assertEqual(str(segment), "Segment a[+, -]")
         self.assertEqual(segment['son'], u'-')
 
+    def test_segments_are_interned(self):
+        segment = self.feature_table.get_segment('a')
+        self.assertIs(segment, self.feature_table.get_segment('a'))
+        self.assertIs(self.feature_table.get_segments()[self.feature_table.get_segment_index('a')], segment)
+        self.assertIs(Word('aba', self.feature_table).get_segments()[2], segment)
+
+    def test_segment_is_immutable(self):
+        segment = self.feature_table.get_segment('a')
+        with self.assertRaises(AttributeError):
+            segment.symbol = 'b'
+        self.assertFalse(hasattr(segment, '__dict__'))
+
+    def test_copied_segments_are_interned_in_the_copied_feature_table(self):
+        feature_table_copy, segment_copy = pickle.loads(pickle.dumps((self.feature_table,
+                                                                      self.feature_table.get_segment('b')), -1))
+        self.assertIs(segment_copy, feature_table_copy.get_segment('b'))
+        self.assertIs(pickle.loads(pickle.dumps(NULL_SEGMENT, -1)), NULL_SEGMENT)
+
     def test_segment_encoding_Length(self):
         segment = Segment('a', self.feature_table)
         self.assertEqual(segment.get_encoding_length(), 2)
@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from src.genetic_search import GeneticSearch
+from src.grammar.constraint_set import ConstraintSet
+from src.grammar.lexicon import Lexicon, CompactLexicon
+from src.simulated_annealing import clear_modules_caching
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+class TestCrossover(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration()
+        clear_modules_caching()
+        self.hypothesis = get_hypothesis_by_settings()
+        self.feature_table = self.hypothesis.grammar.feature_table
+        random.seed(1)
+
+    def _get_constraint_set(self, constraints):
+        constraint_set_list = [{"type": constraint_type, "bundles": bundles}
+                               for constraint_type, bundles in constraints]
+        return ConstraintSet(constraint_set_list, self.feature_table)
+
+    def test_constraint_set_crossover(self):
+        faith = ("Faith", [])
+        max_labial = ("Max", [{"labial": "-"}])
+        max_consonant = ("Max", [{"cons": "+"}])
+        other_constraint_set = self._get_constraint_set([max_consonant, faith, max_labial])
+        for _ in range(20):
+            constraint_set = self._get_constraint_set([faith, max_labial])
+            other_constraint_set_string = str(other_constraint_set)
+            crossover_result = constraint_set.make_crossover(other_constraint_set)
+            constraints = [str(constraint) for constraint in constraint_set.constraints]
+            self.assertEqual(len(constraints), len(set(constraints)))
+            self.assertEqual(set(constraints), {str(constraint) for constraint in other_constraint_set.constraints})
+            self.assertEqual(crossover_result, constraints != ["Faith[]", "Max[-labial]"])
+            self.assertEqual(str(other_constraint_set), other_constraint_set_string)
+            self.assertEqual(constraint_set.get_fingerprint(), str(constraint_set))
+
+    def test_constraint_set_crossover_shares_no_constraints(self):
+        constraint_set = self._get_constraint_set([("Faith", [])])
+        other_constraint_set = self._get_constraint_set([("Faith", []), ("Max", [{"labial": "-"}])])
+        while not constraint_set.make_crossover(other_constraint_set):
+            pass
+        for constraint in constraint_set.constraints:
+            self.assertFalse(any(constraint is other_constraint
+                                 for other_constraint in other_constraint_set.constraints))
+
+    def test_lexicon_crossover(self):
+        for lexicon_class in (Lexicon, CompactLexicon):
+            for _ in range(20):
+                lexicon = lexicon_class(["tab", "tap", "lab"], self.feature_table)
+                other_lexicon = lexicon_class(["labil", "paril", "radil", "tabil"], self.feature_table)
+                crossover_result = lexicon.make_crossover(other_lexicon)
+                words = [str(word) for word in lexicon.get_words()]
+                self.assertTrue(words)
+                self.assertEqual(crossover_result, words != ["tab", "tap", "lab"])
+                self.assertTrue(set(words) <= {"tab", "tap", "lab", "labil", "paril", "radil", "tabil"})
+                self.assertEqual(lexicon.fingerprint, lexicon_class(words, self.feature_table).fingerprint)
+
+    def test_get_offspring(self):
+        _, neighbor_hypothesis = self.hypothesis.get_neighbor()
+        grammar_string = str(self.hypothesis.grammar.constraint_set)
+        crossover_result, offspring = self.hypothesis.get_offspring(neighbor_hypothesis)
+        self.assertIsNot(offspring.grammar, self.hypothesis.grammar)
+        self.assertEqual(str(self.hypothesis.grammar.constraint_set), grammar_string)
+
+
+class TestGeneticSearch(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=90, debug_logging_interval=30,
+                                   genetic_search={"population_size": 8, "elite_size": 2, "number_of_workers": 2})
+        clear_modules_caching()
+
+    def test_run(self):
+        genetic_search = GeneticSearch(get_hypothesis_by_settings(), target_energy=float("inf"))
+        step, hypothesis = genetic_search.run()
+        self.assertEqual(step, 90)  # the last generation is cut to the remaining steps
+        self.assertEqual(genetic_search.generation, 15)
+        self.assertEqual(len(genetic_search.population), 8)
+        self.assertEqual(genetic_search.population_energies, sorted(genetic_search.population_energies))
+        self.assertEqual(genetic_search.best_hypothesis_energy, genetic_search.population_energies[0])
+        self.assertEqual(hypothesis.get_energy(), genetic_search.best_hypothesis_energy)
+        self.assertEqual(genetic_search.target_reached_step, 0)
+        self.assertLessEqual(genetic_search.number_of_evaluations, 90)
+
+    def test_run_is_reproducible(self):
+        genetic_search = GeneticSearch(get_hypothesis_by_settings())
+        genetic_search.run()
+
+        clear_modules_caching()
+        repeated_genetic_search = GeneticSearch(get_hypothesis_by_settings())
+        repeated_genetic_search.run()
+        self.assertEqual(repeated_genetic_search.population_energies, genetic_search.population_energies)
@@ -1,9 +1,11 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import pickle
+import random
 from copy import deepcopy
 
-from src.grammar.lexicon import Word, Lexicon
-from tests.persistence_tools import get_feature_table_by_fixture
+from src.grammar.lexicon import Word, Lexicon, CompactLexicon
+from tests.persistence_tools import get_feature_table_by_fixture, load_example_configuration
 from tests.stochastic_testcase import StochasticTestCase
 
 
@@ -135,10 +137,78 @@ class TestLexicon(StochasticTestCase):
     def test_word_slots(self):
         word = Word('abb', self.feature_table)
         print(dir(word))
-        print(word.__dict__)
+        self.assertFalse(hasattr(word, '__dict__'))
         print(word.__slots__)
 
 
+class TestCompactLexicon(StochasticTestCase):
+    def setUp(self):
+        load_example_configuration(lexicon_mutation_weights={"insert_segment": 1, "delete_segment": 1,
+                                                             "change_segment": 0})
+        self.feature_table = get_feature_table_by_fixture("feature_table.json")
+        self.words = ['abb', 'bbaa', 'c', 'dcba', 'c']
+        self.compact_lexicon = CompactLexicon(self.words, self.feature_table)
+
+    def test_compact_lexicon(self):
+        lexicon = Lexicon(self.words, self.feature_table)
+        self.assertEqual(self.compact_lexicon.get_word_strings(), self.words)
+        self.assertEqual(self.compact_lexicon.get_words(), lexicon.get_words())
+        self.assertEqual(str(self.compact_lexicon), str(lexicon))
+        self.assertEqual(self.compact_lexicon.get_encoding_length(), lexicon.get_encoding_length())
+        self.assertEqual(self.compact_lexicon.get_distinct_segments(), lexicon.get_distinct_segments())
+        self.assertEqual(self.compact_lexicon.get_number_of_distinct_words(), 4)
+        self.assertEqual(self.compact_lexicon[3], lexicon[3])
+
+    def test_compact_lexicon_mutations_match_lexicon(self):
+        lexicon = Lexicon(self.words, self.feature_table)
+        for seed in range(20):
+            random.seed(seed)
+            for _ in range(30):
+                lexicon.make_mutation()
+            random.seed(seed)
+            for _ in range(30):
+                self.compact_lexicon.make_mutation()
+            self.assertEqual(self.compact_lexicon.get_word_strings(), [str(word) for word in lexicon.get_words()])
+
+    def test_change_segment(self):
+        random.seed(1)
+        self.assertTrue(self.compact_lexicon._change_segment())
+        self.assertEqual(self.compact_lexicon._get_number_of_segments(), 13)
+        self.assertNotEqual(self.compact_lexicon.get_word_strings(), self.words)
+
+    def test_pickled_copy(self):
+        lexicon_copy = pickle.loads(pickle.dumps(self.compact_lexicon, -1))
+        self.compact_lexicon._insert_segment()
+        self.assertEqual(lexicon_copy.get_word_strings(), self.words)
+        self.assertNotEqual(lexicon_copy, self.compact_lexicon)
+        self.assertEqual(hash(lexicon_copy), hash(CompactLexicon(self.words, self.feature_table)))
+        self.assertEqual(vars(lexicon_copy).keys(), vars(self.compact_lexicon).keys())
+
+
+class TestLexiconFingerprint(StochasticTestCase):
+    def setUp(self):
+        load_example_configuration(lexicon_mutation_weights={"insert_segment": 2, "delete_segment": 1,
+                                                             "change_segment": 0})
+        self.feature_table = get_feature_table_by_fixture("feature_table.json")
+        self.words = ['abb', 'bbaa', 'c', 'dcba', 'c']
+
+    def test_fingerprint_ignores_word_order(self):
+        for lexicon_class in (Lexicon, CompactLexicon):
+            self.assertEqual(lexicon_class(self.words, self.feature_table).fingerprint,
+                             lexicon_class(list(reversed(self.words)), self.feature_table).fingerprint)
+            self.assertNotEqual(lexicon_class(self.words, self.feature_table).fingerprint,
+                                lexicon_class(self.words[:-1], self.feature_table).fingerprint)
+
+    def test_fingerprint_is_updated_by_mutations(self):
+        random.seed(1)
+        for lexicon_class in (Lexicon, CompactLexicon):
+            lexicon = lexicon_class(self.words, self.feature_table)
+            for _ in range(100):
+                lexicon.make_mutation()
+                word_strings = [str(word) for word in lexicon.get_words()]
+                self.assertEqual(lexicon.fingerprint, lexicon_class(word_strings, self.feature_table).fingerprint)
+
+
 def _find_out_mutation_type(original_lexicon, mutated_lexicon):
     if len(original_lexicon) < len(mutated_lexicon):
         return "insert"
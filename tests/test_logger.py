@@ -0,0 +1,89 @@
+import logging
+import threading
+import unittest
+
+from src.misc.logger import LazyFormat, setup_logs_file, stop_logs_thread
+from src.otml import load_initial_hypothesis
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+from src.otml_configuration import settings
+from tests.persistence_tools import load_example_configuration
+
+logger = logging.getLogger(__name__)
+
+
+class Counter(object):
+    def __init__(self):
+        self.value = 0
+        self.threads = []
+
+    def get_value(self):
+        self.threads.append(threading.current_thread())
+        return self.value
+
+    def __str__(self):
+        return "counter {}".format(self.value)
+
+
+class TestLogger(unittest.TestCase):
+    def tearDown(self):
+        stop_logs_thread()
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+            handler.close()
+        root_logger.setLevel(logging.WARNING)
+
+    def _read_logs(self):
+        stop_logs_thread()
+        with open(settings.logs_file) as f:
+            return f.read()
+
+    def test_lazy_format_of_disabled_level(self):
+        load_example_configuration()
+        setup_logs_file(logging.WARNING)
+        counter = Counter()
+        logger.info("Value: %s", LazyFormat(counter.get_value))
+        self.assertEqual(counter.threads, [])
+
+    def test_asynchronous_logging(self):
+        load_example_configuration(asynchronous_logging=True)
+        setup_logs_file(logging.INFO)
+        counter = Counter()
+        logger.info("Value: %s", LazyFormat(counter.get_value))
+        logger.info(counter)  # formatted when logged, since it may change
+        counter.value = 1
+        try:
+            raise ValueError("failed")
+        except ValueError:
+            logger.exception("Error")
+        logs = self._read_logs()
+
+        self.assertIn("INFO     Value: 1\n", logs)
+        self.assertIn("INFO     counter 0\n", logs)
+        self.assertIn("ERROR    Error\nTraceback", logs)
+        self.assertIn("ValueError: failed", logs)
+        self.assertNotEqual(counter.threads, [threading.current_thread()])
+
+    def test_synchronous_logging(self):
+        load_example_configuration(asynchronous_logging=False)
+        setup_logs_file(logging.INFO)
+        counter = Counter()
+        logger.info("Value: %s", LazyFormat(counter.get_value))
+        self.assertEqual(counter.threads, [threading.current_thread()])
+        self.assertIn("INFO     Value: 0\n", self._read_logs())
+
+    def test_hypothesis_state(self):
+        load_example_configuration(asynchronous_logging=True, random_seed=False, seed=3, steps_limitation=20,
+                                   log_lexicon_words=True)
+        setup_logs_file(logging.WARNING)
+        clear_modules_caching()
+        simulated_annealing = SimulatedAnnealing(load_initial_hypothesis())
+        simulated_annealing.run()
+        logging.getLogger().setLevel(logging.INFO)
+        simulated_annealing._log_hypothesis_state()
+        logs = self._read_logs()
+
+        hypothesis = simulated_annealing.current_hypothesis
+        self.assertIn("Grammar with: {}:".format(hypothesis.grammar.constraint_set), logs)
+        self.assertIn(str(hypothesis.grammar.lexicon), logs)
+        self.assertIn("Parse: {}".format(hypothesis.get_recent_data_parse()), logs)
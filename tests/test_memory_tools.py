@@ -0,0 +1,77 @@
+import unittest
+
+from src.misc.memory_tools import get_memory_usage, get_peak_memory_usage, cache_lookup, evict_least_recently_used, \
+    get_caches_hit_rates, clear_caches_statistics
+from src.models.traversable_grammar_hypothesis import EnergyMemo
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching, get_modules_caches, \
+    evict_modules_caches, enforce_memory_limit
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+class TestMemoryTools(unittest.TestCase):
+    def test_get_memory_usage(self):
+        memory_usage = get_memory_usage()
+        self.assertGreater(memory_usage, 0)
+        large_buffer = bytearray(64 * 2 ** 20)
+        large_buffer[::4096] = b"x" * len(large_buffer[::4096])  # touch every page, so it is resident
+        self.assertGreater(get_memory_usage(), memory_usage + 32)
+        self.assertGreaterEqual(get_peak_memory_usage(), get_memory_usage() - 1)
+
+    def test_cache_lookup(self):
+        clear_caches_statistics()
+        cache = {"a": 1, "b": 2, "c": 3}
+        self.assertEqual(cache_lookup(cache, "a", "letters"), 1)
+        self.assertIsNone(cache_lookup(cache, "d", "letters"))
+        self.assertEqual(list(cache), ["b", "c", "a"])
+        self.assertEqual(cache_lookup(cache, "b", "letters"), 2)
+        self.assertIsNone(cache_lookup(cache, "e", "numbers"))
+        self.assertEqual(get_caches_hit_rates(), {"letters": 2 / 3, "numbers": 0})
+
+    def test_evict_least_recently_used(self):
+        cache = {key: key for key in range(10)}
+        cache_lookup(cache, 0, "numbers")
+        evict_least_recently_used(cache, 0.5)
+        self.assertEqual(list(cache), [6, 7, 8, 9, 0])
+        evict_least_recently_used(cache, 1)
+        self.assertEqual(cache, {})
+
+
+class TestMemoryLimit(unittest.TestCase):
+    def setUp(self):
+        clear_modules_caching()
+
+    def test_evict_modules_caches(self):
+        load_example_configuration()
+        get_hypothesis_by_settings().get_energy()
+        caches_sizes = {name: len(cache) for name, cache in get_modules_caches().items()}
+        self.assertTrue(any(caches_sizes.values()))
+        evict_modules_caches(0.5)
+        for name, cache in get_modules_caches().items():
+            self.assertEqual(len(cache), caches_sizes[name] - caches_sizes[name] // 2)
+
+    def test_run_over_memory_limit(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=100, debug_logging_interval=50,
+                                   clear_modules_caching_interval=1000, memory_limit=1)
+        simulated_annealing = SimulatedAnnealing(get_hypothesis_by_settings())
+        step, hypothesis = simulated_annealing.run()
+        self.assertEqual(step, 100)
+        # the memory stays over the limit, but it is evicted again only when it grows
+        self.assertGreater(simulated_annealing.number_of_cache_evictions, 0)
+        self.assertLess(simulated_annealing.number_of_cache_evictions, 50)
+        self.assertGreater(simulated_annealing.number_of_evaluations, 10)
+        self.assertLess(len(simulated_annealing.energy_memo), simulated_annealing.number_of_evaluations)
+
+    def test_evictions_wait_for_memory_growth(self):
+        load_example_configuration(memory_limit=1)
+        get_hypothesis_by_settings().get_energy()
+        energy_memo = EnergyMemo(100)
+        for fingerprint in range(10):
+            energy_memo.put(fingerprint, (fingerprint, 0, fingerprint))
+        memory_usages = [enforce_memory_limit(energy_memo) for _ in range(100)]
+        self.assertIsNotNone(memory_usages[0])
+        self.assertLessEqual(len(energy_memo), 5)
+        self.assertLessEqual(len([memory_usage for memory_usage in memory_usages if memory_usage is not None]), 2)
+
+        large_buffer = bytearray(16 * 2 ** 20)
+        large_buffer[::4096] = b"x" * len(large_buffer[::4096])  # touch every page, so it is resident
+        self.assertIsNotNone(enforce_memory_limit(energy_memo))
@@ -0,0 +1,67 @@
+import os
+import unittest
+
+from src.misc.metrics_tools import MetricsWriter, read_metrics, get_metrics_file, to_json_number
+from src.otml_configuration import settings
+from tests.persistence_tools import get_temporary_folder, run_example_annealing
+
+
+class TestMetricsWriter(unittest.TestCase):
+    def setUp(self):
+        self.metrics_file = os.path.join(get_temporary_folder(self), "log.metrics.jsonl")
+
+    def test_write_and_read(self):
+        records = [{"step": 1, "energy": {"combined": 10}}, {"step": 2, "energy": {"combined": None}}]
+        metrics_writer = MetricsWriter(self.metrics_file)
+        for record in records:
+            metrics_writer.write(record)
+        metrics_writer.close()
+        self.assertEqual(list(read_metrics(self.metrics_file)), records)
+
+        metrics_writer = MetricsWriter(self.metrics_file, append=True)
+        metrics_writer.write({"step": 3})
+        metrics_writer.close()
+        self.assertEqual(list(read_metrics(self.metrics_file)), records + [{"step": 3}])
+
+    def test_partial_line_is_skipped(self):
+        with open(self.metrics_file, "w") as f:
+            f.write('{"step": 1}\n{"st')
+        self.assertEqual(list(read_metrics(self.metrics_file)), [{"step": 1}])
+
+    def test_metrics_file(self):
+        self.assertEqual(get_metrics_file("/out/log_restart_2.txt"), "/out/log_restart_2.metrics.jsonl")
+
+    def test_to_json_number(self):
+        self.assertEqual(to_json_number(3.5), 3.5)
+        self.assertIsNone(to_json_number(float("inf")))
+        self.assertIsNone(to_json_number(None))
+
+
+class TestRunMetrics(unittest.TestCase):
+    def _run(self, **updates):
+        return run_example_annealing(**dict(dict(steps_limitation=100, debug_logging_interval=25), **updates))
+
+    def test_records(self):
+        simulated_annealing = self._run()
+        records = list(read_metrics(get_metrics_file()))
+        self.assertEqual([record["step"] for record in records], [25, 50, 75, 100, 100])
+        self.assertEqual([record.get("final", False) for record in records], [False] * 4 + [True])
+        final_record = records[-1]
+        self.assertEqual(final_record["energy"]["combined"], simulated_annealing.current_hypothesis_energy)
+        self.assertEqual(final_record["energy"]["combined"],
+                         final_record["energy"]["grammar"] + final_record["energy"]["data"])
+        self.assertEqual(final_record["constraint_set"], str(simulated_annealing.current_hypothesis.grammar
+                                                             .constraint_set))
+        self.assertEqual(final_record["evaluations"], simulated_annealing.number_of_evaluations)
+        self.assertEqual(set(final_record["caches"]), {"outputs_by_constraint_set_and_word", "grammar_transducers",
+                                                       "constraint_set_transducers", "constraint_transducers",
+                                                       "word_transducers", "compact_lexicon_words"})
+        for record in records[:-1]:
+            self.assertGreater(record["steps_per_second"], 0)
+            self.assertTrue(0 <= record["acceptance_rate"] <= 1)
+            self.assertGreater(record["memory_usage"], 0)
+
+    def test_metrics_off(self):
+        self._run(write_metrics=False)
+        self.assertFalse(os.path.exists(get_metrics_file()))
+        self.assertFalse(settings.write_metrics)
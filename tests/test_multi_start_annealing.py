@@ -0,0 +1,37 @@
+import os
+import unittest
+
+from src.multi_start_annealing import MultiStartAnnealing, derive_seed
+from src.simulated_annealing import clear_modules_caching
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+class TestMultiStartAnnealing(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=30, debug_logging_interval=10)
+        clear_modules_caching()
+        self.multi_start_annealing = MultiStartAnnealing(get_hypothesis_by_settings(), number_of_restarts=3,
+                                                         number_of_workers=2, target_energy=float("inf"))
+
+    def test_derive_seed(self):
+        self.assertEqual(derive_seed(3, 0), derive_seed(3, 0))
+        self.assertEqual(len({derive_seed(3, restart) for restart in range(10)}), 10)
+        self.assertNotEqual(derive_seed(3, 0), derive_seed(4, 0))
+
+    def test_run(self):
+        results = self.multi_start_annealing.run()
+        self.assertEqual(sorted(result.restart for result in results), [0, 1, 2])
+        self.assertEqual([result.energy for result in results], sorted(result.energy for result in results))
+        for result in results:
+            self.assertEqual(result.seed, derive_seed(3, result.restart))
+            self.assertEqual(result.steps, 30)
+            self.assertTrue(os.path.exists(result.logs_file))
+        self.assertIn("reached by 3 of 3 restarts", self.multi_start_annealing.get_summary())
+
+    def test_run_is_reproducible(self):
+        results = self.multi_start_annealing.run()
+
+        clear_modules_caching()
+        repeated_multi_start_annealing = MultiStartAnnealing(get_hypothesis_by_settings(), number_of_restarts=3,
+                                                             number_of_workers=1)
+        self.assertEqual(repeated_multi_start_annealing.run(), results)
@@ -0,0 +1,90 @@
+import unittest
+
+from src.mutation_operators_statistics import MutationOperatorsStatistics, MUTATION_OPERATORS, \
+    LEXICON_MUTATION_OPERATORS, CONSTRAINT_SET_MUTATION_OPERATORS, WEIGHTS_SCALE, get_mutation_weights, \
+    publish_mutation_weights
+from src.otml_configuration import settings
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings, run_example_annealing
+
+
+class TestMutationOperatorsStatistics(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration()
+        self.statistics = MutationOperatorsStatistics(exploration=0.1)
+        self.enabled_operators = [operator for operator, weight in get_mutation_weights().items() if weight]
+
+    def test_mutation_weights(self):
+        weights = get_mutation_weights()
+        self.assertEqual(set(weights), set(MUTATION_OPERATORS))
+        self.assertEqual(weights["insert_segment"], settings.lexicon_mutation_weights.insert_segment)
+
+        publish_mutation_weights({"insert_segment": 7})
+        self.assertEqual(settings.lexicon_mutation_weights.insert_segment, 7)
+        self.assertEqual(settings.lexicon_mutation_weights.sum,
+                         sum(get_mutation_weights()[operator] for operator in LEXICON_MUTATION_OPERATORS))
+        self.assertEqual(get_mutation_weights()["remove_constraint"], weights["remove_constraint"])
+
+    def test_weights_without_improvement(self):
+        self.statistics.record("remove_constraint", True, True, 0, 0.1)
+        initial_weights = get_mutation_weights()
+        weights = self.statistics.get_weights()
+        self.assertEqual(set(weights), set(self.enabled_operators))
+        self.assertAlmostEqual(weights["remove_constraint"],
+                               initial_weights["remove_constraint"] / sum(initial_weights.values()))
+
+    def test_reweight(self):
+        self.statistics.record("remove_constraint", True, True, 100, 1.0)
+        self.statistics.record("insert_constraint", True, True, 10, 1.0)
+        for operator in self.enabled_operators:
+            if operator not in ("remove_constraint", "insert_constraint"):
+                self.statistics.record(operator, False, cpu_time=1.0)
+
+        weights = self.statistics.get_weights()
+        self.assertAlmostEqual(sum(weights.values()), 1)
+        self.assertAlmostEqual(weights["delete_segment"], 0.1 / len(self.enabled_operators))
+        self.assertAlmostEqual(weights["remove_constraint"] / weights["insert_constraint"],
+                               (0.9 * 100 / 110 + 0.1 / len(self.enabled_operators)) /
+                               (0.9 * 10 / 110 + 0.1 / len(self.enabled_operators)))
+
+        self.statistics.reweight()
+        published_weights = get_mutation_weights()
+        self.assertEqual(published_weights["remove_constraint"], round(weights["remove_constraint"] * WEIGHTS_SCALE))
+        self.assertGreater(published_weights["remove_constraint"], published_weights["insert_constraint"])
+        self.assertEqual(published_weights["change_segment"], 0)  # disabled operators stay disabled
+        self.assertEqual(self.statistics.operators["remove_constraint"].recent_improvement, 50)
+        self.assertEqual(self.statistics.operators["remove_constraint"].improvement, 100)
+
+    def test_unused_operators_are_optimistic(self):
+        self.statistics.record("remove_constraint", True, True, 100, 1.0)
+        weights = self.statistics.get_weights()
+        self.assertAlmostEqual(weights["insert_constraint"], weights["remove_constraint"])
+
+    def test_mutation_operator(self):
+        hypothesis = get_hypothesis_by_settings()
+        for _ in range(20):
+            mutation_result, neighbor_hypothesis = hypothesis.get_neighbor()
+            grammar = neighbor_hypothesis.grammar
+            self.assertIn(grammar.mutation_operator, self.enabled_operators)
+            if grammar.mutation_operator in CONSTRAINT_SET_MUTATION_OPERATORS:
+                self.assertEqual(grammar.mutation_operator, grammar.constraint_set.mutation_operator)
+            else:
+                self.assertEqual(grammar.mutation_operator, grammar.lexicon.mutation_operator)
+
+
+class TestAdaptiveMutationWeighting(unittest.TestCase):
+    def _run(self, adaptive):
+        return run_example_annealing(steps_limitation=200, debug_logging_interval=100,
+                                     mutation_weighting={"adaptive": adaptive, "reweighting_interval": 50})
+
+    def test_statistics(self):
+        simulated_annealing = self._run(adaptive=False)
+        statistics = simulated_annealing.mutation_operators_statistics
+        self.assertEqual(sum(operator.proposals for operator in statistics.operators.values()), 200)
+        self.assertEqual(statistics.number_of_reweightings, 0)
+        self.assertIn("remove_constraint", str(statistics))
+
+    def test_adaptive_weighting(self):
+        simulated_annealing = self._run(adaptive=True)
+        statistics = simulated_annealing.mutation_operators_statistics
+        self.assertEqual(statistics.number_of_reweightings, 4)
+        self.assertEqual(get_mutation_weights(), statistics.initial_weights)  # restored after the run
@@ -2,7 +2,8 @@ import os
 import unittest
 
 from src.exceptions import OtmlConfigurationError
-from src.otml_configuration import OtmlConfiguration, ConstraintInsertionWeights
+from src.otml_configuration import OtmlConfiguration, ConstraintInsertionWeights, settings, get_configuration
+from tests.persistence_tools import load_example_configuration
 
 
 class TestOtmlConfigurationManager(unittest.TestCase):
@@ -38,3 +39,32 @@ class TestOtmlConfigurationManager(unittest.TestCase):
 
     def tearDown(self):
         self.config.reset()
+
+
+class TestSettingsSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.settings = load_example_configuration(seed=3)
+
+    def test_settings_are_plain_attributes(self):
+        self.assertIn("seed", vars(settings))
+        self.assertEqual(settings.seed, 3)
+        self.assertEqual(settings.constraint_insertion_weights.sum, 2)
+        self.assertEqual(settings.max_constraints_in_constraint_set, float("inf"))
+
+    def test_settings_are_read_only(self):
+        with self.assertRaises(OtmlConfigurationError):
+            settings.seed = 4
+        with self.assertRaises(OtmlConfigurationError):
+            settings.lexicon_mutation_weights.insert_segment = 4
+
+    def test_update_is_applied_only_when_published(self):
+        published_configuration = get_configuration()
+        updated_configuration = OtmlConfiguration.get_instance().update(seed=4)
+        self.assertIsNot(updated_configuration, published_configuration)
+        self.assertEqual(settings.seed, 3)
+        self.assertEqual(get_configuration().seed, 3)
+        self.assertIs(OtmlConfiguration.get_instance(), published_configuration)
+        updated_configuration.publish()
+        self.assertEqual(settings.seed, 4)
+        self.assertIs(get_configuration(), updated_configuration)
+        self.assertIs(OtmlConfiguration.get_instance(), updated_configuration)
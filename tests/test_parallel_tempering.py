@@ -0,0 +1,39 @@
+import unittest
+
+from src.parallel_tempering import ParallelTempering, get_temperature_ladder
+from src.simulated_annealing import clear_modules_caching
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+class TestParallelTempering(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=30, debug_logging_interval=10,
+                                   parallel_tempering={"number_of_replicas": 3, "min_temp": 1, "max_temp": 100,
+                                                       "swap_interval": 10, "number_of_workers": 2})
+        clear_modules_caching()
+        self.parallel_tempering = ParallelTempering(get_hypothesis_by_settings())
+
+    def test_get_temperature_ladder(self):
+        ladder = get_temperature_ladder(1, 100, 3)
+        self.assertAlmostEqual(ladder[0], 1)
+        self.assertAlmostEqual(ladder[1], 10)
+        self.assertAlmostEqual(ladder[2], 100)
+
+    def test_swap_replicas(self):
+        self.parallel_tempering.temperatures = [1, 10]
+        self.parallel_tempering.replica_hypotheses = ["cold", "hot"]
+        self.parallel_tempering.replica_energies = [200, 100]  # the hot replica is better - always swapped
+        self.parallel_tempering.swap_attempts = [0]
+        self.parallel_tempering.swap_acceptances = [0]
+        self.parallel_tempering._swap_replicas()
+        self.assertEqual(self.parallel_tempering.replica_hypotheses, ["hot", "cold"])
+        self.assertEqual(self.parallel_tempering.replica_energies, [100, 200])
+        self.assertEqual(self.parallel_tempering.swap_acceptances, [1])
+
+    def test_run(self):
+        initial_energy = self.parallel_tempering.current_hypothesis.get_energy()
+        step, best_hypothesis = self.parallel_tempering.run()
+        self.assertEqual(step, 30)
+        self.assertEqual(len(self.parallel_tempering.replica_hypotheses), 3)
+        self.assertLessEqual(best_hypothesis.combined_energy, initial_energy)
+        self.assertEqual(sum(self.parallel_tempering.swap_attempts), 3)
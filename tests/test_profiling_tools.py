@@ -0,0 +1,77 @@
+import unittest
+
+from src.misc import profiling_tools
+from src.misc.profiling_tools import SpanStatistics, HISTOGRAM_BUCKETS_BOUNDS, span, profiled, \
+    get_profiling_summary, clear_profiling
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+@profiled("profiled_function")
+def profiled_function(x):
+    return x + 1
+
+
+class TestSpanStatistics(unittest.TestCase):
+    def test_percentiles(self):
+        span_statistics = SpanStatistics()
+        for duration in range(1000, 101000, 1000):  # 1 to 100 microseconds
+            span_statistics.record(duration)
+        self.assertEqual(span_statistics.count, 100)
+        self.assertEqual(span_statistics.max_time, 100000)
+        for percentile in (50, 90, 99):
+            estimate = span_statistics.get_percentile(percentile)
+            self.assertGreaterEqual(estimate, percentile * 1000)
+            self.assertLessEqual(estimate, percentile * 1000 * 2 ** (1 / 4))
+        self.assertEqual(span_statistics.get_percentile(100), 100000)
+
+    def test_out_of_range_durations(self):
+        span_statistics = SpanStatistics()
+        span_statistics.record(1)
+        span_statistics.record(HISTOGRAM_BUCKETS_BOUNDS[-1] * 2)
+        self.assertEqual(span_statistics.get_percentile(50), HISTOGRAM_BUCKETS_BOUNDS[0])
+        self.assertEqual(span_statistics.get_percentile(99), HISTOGRAM_BUCKETS_BOUNDS[-1] * 2)
+
+
+class TestSpans(unittest.TestCase):
+    def setUp(self):
+        clear_profiling()
+
+    def tearDown(self):
+        clear_profiling()
+
+    def test_disabled(self):
+        load_example_configuration(profiling=False)
+        with span("block"):
+            pass
+        self.assertEqual(profiled_function(1), 2)
+        self.assertEqual(profiling_tools.spans_statistics, dict())
+
+    def test_enabled(self):
+        load_example_configuration(profiling=True)
+        for _ in range(3):
+            with span("block"):
+                pass
+        self.assertEqual(profiled_function(1), 2)
+        self.assertEqual(profiling_tools.spans_statistics["block"].count, 3)
+        self.assertEqual(profiling_tools.spans_statistics["profiled_function"].count, 1)
+        summary = get_profiling_summary()
+        self.assertIn("block", summary)
+        self.assertIn("p99", summary)
+
+    def test_annealing_spans(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=20, debug_logging_interval=10,
+                                   profiling=True)
+        clear_modules_caching()
+        SimulatedAnnealing(get_hypothesis_by_settings()).run()
+        spans_statistics = profiling_tools.spans_statistics
+        self.assertEqual(spans_statistics["step"].count, 20)
+        self.assertEqual(spans_statistics["mutation"].count, 20)
+        self.assertEqual(spans_statistics["neighbor_copy"].count, 20)
+        for name in ("energy", "grammar_encoding", "data_encoding", "generate", "grammar_transducer",
+                     "constraint_set_transducer"):
+            self.assertIn(name, spans_statistics)
+        # the grammar transducers are built while the data is encoded, but not within the generate span
+        self.assertLessEqual(sum(spans_statistics[name].total_time
+                                 for name in ("generate", "grammar_transducer", "constraint_set_transducer")),
+                             spans_statistics["data_encoding"].total_time)
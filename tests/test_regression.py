@@ -0,0 +1,144 @@
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from src.benchmarks import bench, transducers
+from src.benchmarks.regression import get_summary, compare_workloads_runs, compare_transducers_points, \
+    save_workloads_baselines, load_baseline, check_workloads_baselines, get_comparisons_report, save_baseline, \
+    TRANSDUCERS_BASELINE
+from tests.persistence_tools import get_temporary_folder
+
+
+def make_run(steps_per_second, peak_memory_usage=100, engine="python", workload="french_deletion", steps=500):
+    return {"workload": workload, "engine": engine, "steps": steps, "steps_per_second": steps_per_second,
+            "peak_memory_usage": peak_memory_usage}
+
+
+def make_times(median, first_quartile, third_quartile):
+    return {"get_range": {"median": median, "first_quartile": first_quartile, "third_quartile": third_quartile,
+                          "min": first_quartile}}
+
+
+def make_point(*grammars_times, word_length=4):
+    """
+    grammars_times - the (median, first quartile, third quartile) of the time of every grammar of the point
+    """
+    return {"sweep": "word_length", "point": {"word_length": word_length},
+            "grammars": [{"seed": seed, "times": make_times(*times)}
+                         for seed, times in enumerate(grammars_times, start=1)]}
+
+
+class TestRegression(unittest.TestCase):
+    def setUp(self):
+        self.baseline_runs = [make_run(steps_per_second) for steps_per_second in (98, 100, 102, 100, 99)]
+
+    def test_summary(self):
+        summary = get_summary([1, 2, 3, 4, 5])
+        self.assertEqual((summary.first_quartile, summary.median, summary.third_quartile), (2, 3, 4))
+        self.assertEqual(summary.interquartile_range, 2)
+        self.assertEqual(get_summary([7]), (7, 7, 7))
+
+    def test_throughput_regression(self):
+        runs = [make_run(steps_per_second) for steps_per_second in (80, 81, 79)]
+        comparisons = compare_workloads_runs(self.baseline_runs, runs, 0.1, 0.1)
+        self.assertEqual([(comparison.metric, comparison.regression) for comparison in comparisons],
+                         [("steps_per_second", True), ("peak_memory_usage", False)])
+        self.assertAlmostEqual(comparisons[0].change, -0.2)
+        self.assertIn("REGRESSION", get_comparisons_report(comparisons))
+
+    def test_changes_within_tolerance_or_noise(self):
+        runs = [make_run(steps_per_second) for steps_per_second in (95, 96, 94)]
+        self.assertFalse(any(comparison.regression
+                             for comparison in compare_workloads_runs(self.baseline_runs, runs, 0.1, 0.1)))
+        # a median beyond the tolerance whose interquartile range overlaps the baseline's is noise
+        noisy_runs = [make_run(steps_per_second) for steps_per_second in (50, 60, 70, 101, 103)]
+        self.assertFalse(any(comparison.regression
+                             for comparison in compare_workloads_runs(self.baseline_runs, noisy_runs, 0.1, 0.1)))
+        faster_runs = [make_run(steps_per_second) for steps_per_second in (150, 151, 149)]
+        self.assertFalse(any(comparison.regression
+                             for comparison in compare_workloads_runs(self.baseline_runs, faster_runs, 0.1, 0.1)))
+
+    def test_memory_regression(self):
+        runs = [make_run(100, peak_memory_usage) for peak_memory_usage in (130, 131, 129)]
+        comparisons = compare_workloads_runs(self.baseline_runs, runs, 0.1, 0.5)
+        self.assertFalse(any(comparison.regression for comparison in comparisons))
+        comparisons = compare_workloads_runs(self.baseline_runs, runs, 0.1, 0.2)
+        self.assertEqual([comparison.metric for comparison in comparisons if comparison.regression],
+                         ["peak_memory_usage"])
+
+    def test_runs_without_baseline(self):
+        runs = [make_run(10, engine="numpy"), make_run(10, steps=20)]
+        self.assertEqual(compare_workloads_runs(self.baseline_runs, runs, 0.1, 0.1), [])
+
+    def test_transducers_regression(self):
+        baseline_points = [make_point((0.010, 0.009, 0.011))]
+        comparisons = compare_transducers_points(baseline_points, [make_point((0.020, 0.019, 0.021))], 0.25)
+        self.assertEqual([(comparison.metric, comparison.regression) for comparison in comparisons],
+                         [("get_range", True)])
+        self.assertEqual(comparisons[0].name, "word_length word_length=4 grammar 1")
+        comparisons = compare_transducers_points(baseline_points, [make_point((0.012, 0.010, 0.013))], 0.25)
+        self.assertFalse(comparisons[0].regression)
+        self.assertEqual(compare_transducers_points(baseline_points,
+                                                    [make_point((0.020, 0.019, 0.021), word_length=8)], 0.25), [])
+
+    def test_transducers_regression_of_one_grammar(self):
+        # the grammars of a point differ in their times far more than the repeats of a grammar, so the slowdown of
+        # one grammar is within the interquartile range of the pooled times of all of them
+        baseline_point = make_point((0.10, 0.098, 0.102), (0.20, 0.196, 0.204), (0.30, 0.294, 0.306))
+        point = make_point((0.10, 0.098, 0.102), (0.40, 0.392, 0.408), (0.30, 0.294, 0.306))
+        comparisons = compare_transducers_points([baseline_point], [point], 0.25)
+        self.assertEqual([(comparison.name, comparison.regression) for comparison in comparisons],
+                         [("word_length word_length=4 grammar 1", False),
+                          ("word_length word_length=4 grammar 2", True),
+                          ("word_length word_length=4 grammar 3", False)])
+        self.assertAlmostEqual(comparisons[1].change, 1)
+
+    def test_workloads_baselines(self):
+        baselines_folder = get_temporary_folder(self)
+        save_workloads_baselines(baselines_folder, {"version": 1, "runs": self.baseline_runs})
+        save_workloads_baselines(baselines_folder, {"version": 1, "runs": [make_run(50, engine="numpy")]})
+        baseline = load_baseline(baselines_folder, "french_deletion")
+        self.assertEqual(len(baseline["runs"]), len(self.baseline_runs) + 1)  # the python runs are kept
+        self.assertIsNone(load_baseline(baselines_folder, "t_aspiration"))
+
+        results = {"runs": [make_run(80, engine="numpy"), make_run(10, workload="t_aspiration")]}
+        comparisons = check_workloads_baselines(baselines_folder, results, 0.1, 0.1)
+        self.assertEqual([(comparison.name, comparison.metric, comparison.regression) for comparison in comparisons],
+                         [("french_deletion numpy 500 steps", "steps_per_second", False),
+                          ("french_deletion numpy 500 steps", "peak_memory_usage", False)])
+
+
+class TestRegressionCommandLine(unittest.TestCase):
+    def test_workloads_gate(self):
+        baselines_folder = get_temporary_folder(self)
+        output_file = os.path.join(get_temporary_folder(self), "bench_results.json")
+        arguments = ["-w", "french_deletion", "-s", "5", "-o", output_file]
+        result = CliRunner().invoke(bench.main, arguments + ["--check-baselines", baselines_folder])
+        self.assertNotEqual(result.exit_code, 0)  # no baselines
+        result = CliRunner().invoke(bench.main, arguments + ["--save-baselines", baselines_folder])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        baseline = load_baseline(baselines_folder, "french_deletion")
+        baseline["runs"][0]["steps_per_second"] *= 1000
+        save_baseline(baselines_folder, "french_deletion", baseline)
+        result = CliRunner().invoke(bench.main, arguments + ["--check-baselines", baselines_folder])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("REGRESSION", result.output)
+
+    def test_transducers_gate(self):
+        baselines_folder = get_temporary_folder(self)
+        output_file = os.path.join(get_temporary_folder(self), "transducers_results.json")
+        arguments = ["-d", "bundles_depth", "-r", "2", "-g", "1", "-o", output_file]
+        result = CliRunner().invoke(transducers.main, arguments + ["--save-baselines", baselines_folder])
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        baseline = load_baseline(baselines_folder, TRANSDUCERS_BASELINE)
+        for point in baseline["points"]:
+            for grammar in point["grammars"]:
+                for times in grammar["times"].values():
+                    times.update(median=1e-9, first_quartile=1e-9, third_quartile=1e-9)
+        save_baseline(baselines_folder, TRANSDUCERS_BASELINE, baseline)
+        result = CliRunner().invoke(transducers.main, arguments + ["--check-baselines", baselines_folder])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("REGRESSION", result.output)
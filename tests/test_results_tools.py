@@ -0,0 +1,101 @@
+import json
+import os
+import unittest
+
+from click.testing import CliRunner
+
+from src.exceptions import ResultsError
+from src.misc.results_tools import ResultsStore, RESULTS_COLUMNS, get_results_database
+from src.otml_configuration import settings
+from src.results_query import main, parse_filters
+from tests.persistence_tools import get_temporary_folder, run_example_annealing
+
+
+def get_results(simulation_name, seed, best_energy, outcome="steps_limitation", target_reached_step=None,
+                cooling_factor=0.999):
+    results = dict.fromkeys(RESULTS_COLUMNS)
+    results.update(simulation_name=simulation_name, search="SimulatedAnnealing", started_at="2020-01-01T00:00:00",
+                   configuration=json.dumps({"cooling_factor": cooling_factor, "steps_limitation": "INF"}),
+                   seed=seed, outcome=outcome, steps=100, evaluations=90, runtime=2.0, steps_per_second=50.0,
+                   final_energy=best_energy + 10, best_energy=best_energy, target_reached_step=target_reached_step,
+                   constraint_set="Faith[]", lexicon="Lexicon")
+    return results
+
+
+class TestResultsStore(unittest.TestCase):
+    def setUp(self):
+        self.results_store = ResultsStore(os.path.join(get_temporary_folder(self), "results.sqlite"))
+        self.results_store.add_run(get_results("sweep", 1, 300))
+        self.results_store.add_run(get_results("sweep", 2, 200, outcome="plateau", target_reached_step=80))
+        self.results_store.add_run(get_results("sweep", 3, 250, cooling_factor=0.99))
+        self.results_store.add_run(get_results("other", 1, 100, target_reached_step=10))
+
+    def tearDown(self):
+        self.results_store.close()
+
+    def test_get_runs(self):
+        self.assertEqual([run["best_energy"] for run in self.results_store.get_runs()], [100, 200, 250, 300])
+        self.assertEqual([run["seed"] for run in self.results_store.get_runs({"simulation_name": "sweep"}, 2)],
+                         [2, 3])
+        self.assertEqual([run["seed"] for run in self.results_store.get_runs({"simulation_name": "sweep",
+                                                                              "target_reached_step": None})], [3, 1])
+        self.assertEqual([run["seed"] for run in self.results_store.get_runs({"cooling_factor": 0.99})], [3])
+        self.assertEqual(len(self.results_store.get_runs({"steps_limitation": "INF"})), 4)
+
+    def test_get_summary(self):
+        summary = self.results_store.get_summary(["simulation_name", "cooling_factor"])
+        self.assertEqual([tuple(group) for group in summary],
+                         [("other", 0.999, 1, 1, 100, 100, 50, 2), ("sweep", 0.999, 2, 1, 200, 250, 50, 2),
+                          ("sweep", 0.99, 1, 0, 250, 250, 50, 2)])
+        summary = self.results_store.get_summary(["outcome"], {"simulation_name": "sweep"})
+        self.assertEqual([(group["group_0"], group["runs"]) for group in summary],
+                         [("plateau", 1), ("steps_limitation", 2)])
+
+    def test_unknown_key(self):
+        with self.assertRaises(ResultsError):
+            self.results_store.get_runs({"seed; DROP TABLE runs": 1})
+
+    def test_parse_filters(self):
+        self.assertEqual(parse_filters(["seed=3", "outcome=plateau", "target_reached_step=null"]),
+                         {"seed": 3, "outcome": "plateau", "target_reached_step": None})
+        with self.assertRaises(ResultsError):
+            parse_filters(["seed"])
+
+
+class TestRunResults(unittest.TestCase):
+    def _run(self, **updates):
+        return run_example_annealing(float("inf"), **dict(dict(steps_limitation=20, debug_logging_interval=10),
+                                                          **updates))
+
+    def test_run_writes_results(self):
+        results_database = os.path.join(get_temporary_folder(self), "results.sqlite")  # shared by the two runs
+        simulated_annealing = self._run(results_database=results_database)
+        self._run(results_database=results_database, seed=4, steps_limitation=10)
+        self.assertEqual(get_results_database(), results_database)
+        results_store = ResultsStore(results_database)
+        runs = results_store.get_runs({"seed": 3})
+        results_store.close()
+
+        self.assertEqual(len(runs), 1)
+        run = runs[0]
+        self.assertEqual(run["simulation_name"], settings.simulation_name)
+        self.assertEqual(run["search"], "SimulatedAnnealing")
+        self.assertEqual(run["outcome"], "steps_limitation")
+        self.assertEqual(run["steps"], 20)
+        self.assertEqual(run["best_energy"], simulated_annealing.best_hypothesis_energy)
+        self.assertEqual(run["target_reached_step"], 0)
+        self.assertEqual(run["constraint_set"], str(simulated_annealing.current_hypothesis.grammar.constraint_set))
+        configuration = json.loads(run["configuration"])
+        self.assertEqual(configuration["steps_limitation"], 20)
+        self.assertEqual(configuration["time_limitation"], "INF")
+
+        result = CliRunner().invoke(main, ["-c", settings.config_folder, "-g", "steps_limitation"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("target hits", result.output)
+        result = CliRunner().invoke(main, ["-d", results_database, "-f", "seed=4"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(result.output.strip().split("\n")), 2)
+
+    def test_results_off(self):
+        self._run(results_database=None, steps_limitation=5)
+        self.assertFalse(os.path.exists(os.path.join(settings.output_folder, "results.sqlite")))
@@ -0,0 +1,29 @@
+import unittest
+
+from src.simulated_annealing import clear_modules_caching
+from src.speculative_annealing import SpeculativeAnnealing
+from tests.persistence_tools import load_example_configuration, get_hypothesis_by_settings
+
+
+class TestSpeculativeAnnealing(unittest.TestCase):
+    def setUp(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=30, debug_logging_interval=10,
+                                   speculative_annealing={"batch_size": 4, "number_of_workers": 2})
+        clear_modules_caching()
+        self.speculative_annealing = SpeculativeAnnealing(get_hypothesis_by_settings())
+
+    def test_run(self):
+        step, hypothesis = self.speculative_annealing.run()
+        self.assertEqual(step, 30)  # the last batch is cut to the remaining steps
+        used_evaluations = self.speculative_annealing.number_of_evaluations - \
+            self.speculative_annealing.number_of_discarded_evaluations
+        self.assertGreater(used_evaluations, 0)
+        self.assertLessEqual(used_evaluations, 30)  # at most one evaluation per step
+
+    def test_evaluations_match_the_main_process(self):
+        self.speculative_annealing.run()
+        current_hypothesis = self.speculative_annealing.current_hypothesis
+        energy = current_hypothesis.combined_energy
+        data_parse = current_hypothesis.get_data_parse()
+        self.assertEqual(current_hypothesis.get_energy(), energy)
+        self.assertEqual(current_hypothesis.data_parse, data_parse)
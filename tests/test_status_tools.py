@@ -0,0 +1,74 @@
+import json
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from click.testing import CliRunner
+
+from src.misc.status_tools import StatusServer, start_status_server, stop_status_server, get_status_server
+from src.otml import load_initial_hypothesis, main
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+from tests.persistence_tools import load_example_configuration
+
+
+def get_status(url):
+    with urlopen(url, timeout=10) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+class TestStatusServer(unittest.TestCase):
+    def setUp(self):
+        self.status_server = StatusServer(0)
+        self.status_server.start()
+
+    def tearDown(self):
+        self.status_server.close()
+
+    def test_serve_published_status(self):
+        self.assertEqual(get_status(self.status_server.url), {"state": "starting"})
+        self.status_server.publish({"step": 10, "energy": {"combined": 5.0}})
+        self.assertEqual(get_status(self.status_server.url), {"step": 10, "energy": {"combined": 5.0}})
+        self.assertEqual(get_status(self.status_server.url.replace("/status", "/")), {"step": 10,
+                                                                                      "energy": {"combined": 5.0}})
+
+    def test_unknown_path(self):
+        with self.assertRaises(HTTPError) as context:
+            urlopen(self.status_server.url.replace("/status", "/other"), timeout=10)
+        self.assertEqual(context.exception.code, 404)
+        context.exception.close()
+
+
+class TestRunStatus(unittest.TestCase):
+    def tearDown(self):
+        stop_status_server()
+
+    def test_annealing_publishes_status(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=40, debug_logging_interval=20)
+        clear_modules_caching()
+        status_server = start_status_server(0)
+        simulated_annealing = SimulatedAnnealing(load_initial_hypothesis())
+        simulated_annealing.run()
+
+        status = get_status(status_server.url)
+        self.assertEqual(status["state"], "finished")
+        self.assertEqual(status["step"], 40)
+        self.assertEqual(status["expected_steps"], 40)
+        self.assertEqual(status["best_energy"], simulated_annealing.best_hypothesis_energy)
+        self.assertEqual(status["best_hypothesis"]["constraint_set"],
+                         str(simulated_annealing.best_hypothesis.grammar.constraint_set))
+        self.assertIn("hits", status["energy_memo"])
+        self.assertIn("steps_per_second", status)
+
+        stop_status_server()
+        self.assertIsNone(get_status_server())
+
+    def test_annealing_without_server(self):
+        load_example_configuration(random_seed=False, seed=3, steps_limitation=5)
+        clear_modules_caching()
+        SimulatedAnnealing(load_initial_hypothesis()).run()
+        self.assertIsNone(get_status_server())
+
+    def test_restarts_are_not_served(self):
+        result = CliRunner().invoke(main, ["-c", "examples/french_deletion", "-r", "2", "--status-port", "0"])
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("--status-port", result.output)
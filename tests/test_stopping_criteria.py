@@ -0,0 +1,34 @@
+import time
+import unittest
+
+from src.cooling_schedules import get_cooling_schedule
+from tests.persistence_tools import run_example_annealing
+
+
+class TestStoppingCriteria(unittest.TestCase):
+    def _run(self, target_energy=None, **updates):
+        return run_example_annealing(target_energy, debug_logging_interval=10, **updates)
+
+    def test_evaluations_limitation(self):
+        simulated_annealing = self._run(steps_limitation=400, evaluations_limitation=30)
+        self.assertEqual(simulated_annealing.number_of_evaluations, 30)
+        self.assertLess(simulated_annealing.step, 400)
+
+    def test_target_energy(self):
+        simulated_annealing = self._run(steps_limitation=400, target_energy=float("inf"))
+        self.assertEqual(simulated_annealing.step, 400)  # reaching the target energy stops only when configured
+
+        simulated_annealing = self._run(steps_limitation=400, stop_at_target_energy=True, target_energy=float("inf"))
+        self.assertEqual(simulated_annealing.step, 0)
+
+    def test_plateau_intervals(self):
+        simulated_annealing = self._run(steps_limitation=400, plateau_intervals=2)
+        self.assertEqual(simulated_annealing.number_of_plateau_intervals, 2)
+        self.assertLess(simulated_annealing.step, 400)
+
+    def test_time_limitation(self):
+        start_time = time.time()
+        simulated_annealing = self._run(steps_limitation="INF", time_limitation=1)
+        self.assertLess(time.time() - start_time, 10)
+        # the schedule is compressed during the run, so the steps are compared with the configured schedule
+        self.assertLess(simulated_annealing.step, get_cooling_schedule().get_number_of_expected_steps())
@@ -0,0 +1,154 @@
+import os
+import unittest
+from math import isnan
+
+from click.testing import CliRunner
+
+from src.exceptions import TraceError
+from src.misc.checkpoint_tools import load_checkpoint
+from src.misc.trace_tools import TraceWriter, read_trace, get_trace_file, get_traced_target, TraceStep, \
+    TraceWeights, HEADER, STEP_RECORD
+from src.mutation_operators_statistics import get_mutation_weights, MUTATION_OPERATORS
+from src.otml import load_initial_hypothesis
+from src.otml_configuration import settings, get_configuration
+from src.simulated_annealing import SimulatedAnnealing, clear_modules_caching
+from src.trace_replay import replay_trace, get_trace_summary, main
+from tests.persistence_tools import get_temporary_folder, run_example_annealing
+
+
+class TestTraceWriter(unittest.TestCase):
+    def setUp(self):
+        self.trace_file = os.path.join(get_temporary_folder(self), "log.trace")
+        self.weights = {operator: 100 * i for i, operator in enumerate(MUTATION_OPERATORS)}
+
+    def _write_trace(self):
+        trace_writer = TraceWriter(self.trace_file, seed=7)
+        trace_writer.write_step("demote_constraint", (1, None), True, True, -12.0, 0.25)
+        trace_writer.write_weights(self.weights)
+        trace_writer.write_step("insert_segment", (4, 2), True, False, 30.0, 0.5)
+        trace_writer.write_step("remove_constraint", None, False)
+        offset = trace_writer.tell()
+        trace_writer.write_step("delete_segment", (70000, 1), True, False, float("inf"), 0.125)
+        trace_writer.close()
+        return offset
+
+    def test_write_and_read(self):
+        self._write_trace()
+        header, records = read_trace(self.trace_file)
+        self.assertEqual(header.seed, 7)
+        records = list(records)
+        self.assertEqual(records[0], TraceStep(1, "demote_constraint", (1, None), True, True, -12.0, 0.25))
+        self.assertEqual(records[1], TraceWeights(2, self.weights))
+        self.assertEqual(records[2], TraceStep(2, "insert_segment", (4, 2), True, False, 30.0, 0.5))
+        self.assertEqual(records[3][:5], (3, "remove_constraint", None, False, False))
+        self.assertTrue(isnan(records[3].delta))
+        self.assertEqual(records[4], TraceStep(4, "delete_segment", None, True, False, float("inf"), 0.125))
+        self.assertEqual(os.path.getsize(self.trace_file),
+                         HEADER.size + 4 * STEP_RECORD.size + 1 + 4 * len(MUTATION_OPERATORS))
+        self.assertEqual(STEP_RECORD.size, 12)
+
+    def test_partial_record_is_skipped(self):
+        self._write_trace()
+        with open(self.trace_file, "r+b") as f:
+            f.truncate(os.path.getsize(self.trace_file) - 1)
+        self.assertEqual(len(list(read_trace(self.trace_file)[1])), 4)
+
+    def test_continue_from_offset(self):
+        offset = self._write_trace()
+        trace_writer = TraceWriter(self.trace_file, offset=offset)
+        trace_writer.write_step("change_segment", (0, 0), True, True, 0.0, 0.0)
+        trace_writer.close()
+        records = list(read_trace(self.trace_file)[1])
+        self.assertEqual([record[:2] for record in records[3:]], [(3, "remove_constraint"), (4, "change_segment")])
+        with self.assertRaises(TraceError):
+            TraceWriter(self.trace_file, offset=os.path.getsize(self.trace_file) + 1)
+
+    def test_not_a_trace(self):
+        with open(self.trace_file, "wb") as f:
+            f.write(b"x" * 100)
+        with self.assertRaises(TraceError):
+            read_trace(self.trace_file)
+
+    def test_traced_target(self):
+        self.assertEqual(get_traced_target((3, None)), (3, None))
+        self.assertEqual(get_traced_target((3, 70000)), (3, None))
+        self.assertIsNone(get_traced_target(None))
+
+
+class TestTraceReplay(unittest.TestCase):
+    def _run(self, **updates):
+        return run_example_annealing(**dict(dict(steps_limitation=60, debug_logging_interval=20, write_trace=True),
+                                            **updates))
+
+    def assertSameGrammar(self, hypothesis, other_hypothesis):
+        self.assertEqual(str(hypothesis.grammar.constraint_set), str(other_hypothesis.grammar.constraint_set))
+        self.assertEqual(str(hypothesis.grammar.lexicon), str(other_hypothesis.grammar.lexicon))
+
+    def test_replay(self):
+        simulated_annealing = self._run()
+        records = list(read_trace(get_trace_file())[1])
+        self.assertEqual(len(records), 60)
+        accepted_records = [record for record in records if record.accepted]
+        self.assertTrue(accepted_records)
+        self.assertEqual(load_initial_hypothesis().get_energy() + sum(record.delta for record in accepted_records),
+                         simulated_annealing.current_hypothesis_energy)
+
+        replayed_step, hypothesis = replay_trace(get_trace_file())
+        self.assertEqual(replayed_step, 60)
+        self.assertSameGrammar(hypothesis, simulated_annealing.current_hypothesis)
+        self.assertEqual(hypothesis.get_energy(), simulated_annealing.current_hypothesis_energy)
+
+        intermediate_trace_file = get_trace_file()
+        intermediate_simulated_annealing = self._run(steps_limitation=25)
+        self.assertSameGrammar(replay_trace(intermediate_trace_file, 25)[1],
+                               intermediate_simulated_annealing.current_hypothesis)
+
+    def test_replay_adaptive_weights(self):
+        simulated_annealing = self._run(mutation_weighting={"adaptive": True, "reweighting_interval": 10})
+        records = list(read_trace(get_trace_file())[1])
+        self.assertEqual([record.step for record in records if isinstance(record, TraceWeights)], [10, 20, 30, 40, 50, 60])
+        initial_weights = get_mutation_weights()
+        self.assertSameGrammar(replay_trace(get_trace_file())[1], simulated_annealing.current_hypothesis)
+        self.assertEqual(get_mutation_weights(), initial_weights)
+
+    def test_storages_trace_the_same_mutations(self):
+        self._run()
+        words_records = list(read_trace(get_trace_file())[1])
+        self._run(lexicon_storage="compact")
+        compact_records = list(read_trace(get_trace_file())[1])
+        self.assertEqual([(record[:5], str(record.delta)) for record in words_records],
+                         [(record[:5], str(record.delta)) for record in compact_records])
+
+    def test_divergence(self):
+        self._run()
+        with open(get_trace_file(), "r+b") as f:
+            f.seek(HEADER.size + STEP_RECORD.size + 1)  # the target of the second step
+            f.write(b"\x00\x10")
+        with self.assertRaises(TraceError):
+            replay_trace(get_trace_file())
+
+    def test_resumed_run_continues_the_trace(self):
+        simulated_annealing = self._run(steps_limitation=40, checkpoint_interval=10)
+
+        get_configuration().update(steps_limitation=25).publish()
+        clear_modules_caching()
+        SimulatedAnnealing(load_initial_hypothesis()).run()
+        self.assertEqual(load_checkpoint(settings.checkpoint_file)["step"], 20)
+
+        get_configuration().update(steps_limitation=40).publish()
+        clear_modules_caching()
+        SimulatedAnnealing(load_initial_hypothesis()).resume(settings.checkpoint_file)
+        self.assertEqual(len(list(read_trace(get_trace_file())[1])), 40)
+        self.assertSameGrammar(replay_trace(get_trace_file())[1], simulated_annealing.current_hypothesis)
+
+    def test_trace_off(self):
+        self._run(write_trace=False, steps_limitation=5)
+        self.assertFalse(os.path.exists(get_trace_file()))
+
+    def test_command_line(self):
+        self._run()
+        self.assertIn("60 steps", get_trace_summary(get_trace_file()))
+        result = CliRunner().invoke(main, ["-c", settings.config_folder, "-s", "30"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("Hypothesis after step 30", result.output)
+        self.assertIn("Constraint set: ", result.output)
@@ -3,8 +3,8 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import unittest
 from copy import deepcopy
 
-from transducers_optimization_tools import remove_suboptimal_paths, make_optimal_paths, \
-    optimize_transducer_grammar_for_word
+from src.misc.transducers_optimization_tools import remove_suboptimal_paths, make_optimal_paths, \
+    optimize_transducer_grammar_for_word, optimize_transducer_grammar_for_word_vectorized
 
 from src.grammar.constraint import PhonotacticConstraint
 from src.grammar.feature_table import FeatureTable, Segment, NULL_SEGMENT
@@ -65,6 +65,19 @@ class TestingTransducerOptimizationTools(unittest.TestCase):
         self.optimized_no_CC_MAX_DEP_for_abab = optimize_transducer_grammar_for_word(abab, new_transducer)
         self.assertEqual(self.optimized_no_CC_MAX_DEP_for_abab, get_pickle("optimized_no_CC_MAX_DEP_for_abab"))
 
+    def test_optimize_transducer_grammar_for_word_vectorized(self):
+        no_CC_MAX_DEP_with_optimal_paths = make_optimal_paths(self.no_CC_MAX_DEP, self.feature_table)
+        for word_string in ["a", "b", "bb", "abab", "bbab", "babba"]:
+            word = Word(word_string, self.feature_table)
+            new_transducer = Transducer.intersection(word.get_transducer(), no_CC_MAX_DEP_with_optimal_paths)
+            new_transducer.clear_dead_states()
+            expected_transducer = optimize_transducer_grammar_for_word(word, new_transducer)
+            vectorized_transducer = optimize_transducer_grammar_for_word_vectorized(word, new_transducer)
+            self.assertEqual([str(arc) for arc in vectorized_transducer.get_arcs()],
+                             [str(arc) for arc in expected_transducer.get_arcs()])
+            self.assertEqual(vectorized_transducer.get_final_states(), expected_transducer.get_final_states())
+            self.assertEqual(vectorized_transducer.get_range(), expected_transducer.get_range())
+
 
 def _manually_create_DEP(feature_table):
     """ manually creates a DEP constraint transducer that is featured in Riggle 2004 p.34 fig. 10
@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from src.benchmarks.transducers import make_feature_table, make_constraint_set, make_word, run_sweeps, \
+    get_growth_exponent, get_scaling_tables, SWEEPS, OPERATIONS
+from src.benchmarks.workloads import load_base_configuration
+
+
+class TestTransducersBenchmarks(unittest.TestCase):
+    def setUp(self):
+        load_base_configuration(max_feature_bundles_in_phonotactic_constraint=3)
+        self.random_generator = random.Random(1)
+
+    def test_make_grammar(self):
+        feature_table = make_feature_table(8, 3, self.random_generator)
+        segments = feature_table.get_segments()
+        self.assertEqual(len(segments), 8)
+        self.assertEqual(feature_table.get_number_of_features(), 3)
+        self.assertEqual(len({tuple(feature_table[segment.get_symbol()].items()) for segment in segments}), 8)
+
+        constraint_set = make_constraint_set(feature_table, 5, 3, self.random_generator)
+        constraints_names = [constraint.get_constraint_name() for constraint in constraint_set.constraints]
+        self.assertEqual(constraints_names, ["Faith", "Phonotactic", "Max", "Dep", "Phonotactic"])
+        self.assertEqual(len(constraint_set.constraints[1].feature_bundles), 3)
+        self.assertEqual(len({str(constraint) for constraint in constraint_set.constraints}), 5)
+
+        self.assertEqual(len(make_word(feature_table, 6, self.random_generator).get_segments()), 6)
+
+    def test_too_many_constraints(self):
+        feature_table = make_feature_table(2, 1, self.random_generator)
+        with self.assertRaises(ValueError):
+            make_constraint_set(feature_table, 10, 1, self.random_generator)
+
+    def test_growth_exponent(self):
+        self.assertAlmostEqual(get_growth_exponent([2, 4, 8], [0.3, 1.2, 4.8]), 2)
+        self.assertAlmostEqual(get_growth_exponent([2, 4, 8], [1, 1, 1]), 0)
+
+    def test_run_sweeps(self):
+        results = run_sweeps(["word_length"], repeats=2, number_of_grammars=2)
+        points = results["points"]
+        self.assertEqual([point["point"]["word_length"] for point in points], list(SWEEPS["word_length"]))
+        for point in points:
+            self.assertEqual(set(point["times"]) - set(OPERATIONS), set())
+            self.assertIn("make_optimal_paths", point["times"])
+            self.assertEqual([grammar["seed"] for grammar in point["grammars"]], [1, 2])
+            for grammar in point["grammars"]:
+                self.assertEqual(set(grammar["times"]), set(point["times"]))
+                self.assertIn("grammar", grammar["sizes"])
+            self.assertLessEqual(point["times"]["get_range"]["min"], point["times"]["get_range"]["median"])
+        tables = get_scaling_tables(results)
+        self.assertIn("Scaling with word_length", tables)
+        self.assertIn("exponent", tables)
+        self.assertNotIn("Scaling with segments", tables)